@@ -0,0 +1,301 @@
+"""
+Spatial helpers for the tiles of a `~dkist.TiledDataset`.
+
+This module finds the footprints of tiles on the sky and regrids the tiles
+onto one pixel grid. The regridded output is a dask array where each block
+is computed by a separate task. Which tiles, and which region of each tile,
+a block needs is worked out when the array is built, so computing a block
+only reads the parts of the tiles which intersect it.
+"""
+from itertools import product
+from contextlib import nullcontext
+
+import dask
+import dask.array as da
+import numpy as np
+from dask.array.core import normalize_chunks
+
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+from astropy.wcs.utils import pixel_to_pixel
+
+from sunpy.coordinates import Helioprojective
+from sunpy.coordinates.screens import SphericalScreen
+
+from .dataset import Dataset
+
+__all__ = []
+
+COMBINE_FUNCTIONS = ("mean", "sum", "first", "last", "min", "max")
+
+
+def _edge_pixels(shape, n_max=32):
+    """
+    Pixel coordinates along the edges of an array of ``shape``, in WCS order.
+
+    The points lie on the outer edges of the edge pixels, so the bounding box
+    of their positions in another pixel grid contains the whole array.
+    """
+    ny, nx = shape
+    x = np.linspace(-0.5, nx - 0.5, max(2, min(nx + 1, n_max)))
+    y = np.linspace(-0.5, ny - 0.5, max(2, min(ny + 1, n_max)))
+    xs = np.concatenate([x, x, np.full_like(y, -0.5), np.full_like(y, nx - 0.5)])
+    ys = np.concatenate([np.full_like(x, -0.5), np.full_like(x, ny - 0.5), y, y])
+    return xs, ys
+
+
+def _bounding_box(x, y, shape, margin):
+    """
+    The array slices of the pixels of an array of ``shape`` within the bounds of the pixel coordinates ``x`` and ``y``.
+
+    Returns `None` if the bounds don't overlap the array, and the whole
+    array if any of the coordinates are not finite.
+    """
+    if not (np.isfinite(x).all() and np.isfinite(y).all()):
+        return (slice(0, shape[0]), slice(0, shape[1]))
+    bounds = []
+    for coord, size in ((y, shape[0]), (x, shape[1])):
+        start = max(int(np.floor(coord.min() + 0.5)) - margin, 0)
+        stop = min(int(np.ceil(coord.max() + 0.5)) + margin, size)
+        if stop <= start:
+            return None
+        bounds.append(slice(start, stop))
+    return tuple(bounds)
+
+
+def _celestial_pixel_axes(wcs):
+    """
+    The pixel axes, in WCS order, which the celestial world axes of ``wcs`` depend on.
+    """
+    components = wcs.low_level_wcs.world_axis_object_components
+    classes = wcs.low_level_wcs.world_axis_object_classes
+    world = [i for i, (key, *_) in enumerate(components)
+             if isinstance(classes[key][0], type) and issubclass(classes[key][0], SkyCoord)]
+    if not world:
+        raise ValueError("The WCS of a tile does not have any celestial axes.")
+    return np.flatnonzero(wcs.axis_correlation_matrix[world].any(axis=0))
+
+
+def _frame_context(frame):
+    """
+    Treat helioprojective coordinates off the solar disk as being on a sphere around the observer.
+
+    This means the positions of points off the disk can be transformed
+    between helioprojective frames with different observers.
+    """
+    if isinstance(frame, Helioprojective) and frame.observer is not None:
+        return SphericalScreen(frame.observer, only_off_disk=True)
+    return nullcontext()
+
+
+def _lonlat(coord, frame):
+    """
+    The longitude and latitude of ``coord`` in ``frame`` in arcsec, stacked along the last axis.
+    """
+    with _frame_context(frame):
+        spherical = coord.transform_to(frame).spherical
+    return np.stack([spherical.lon.wrap_at(180 * u.deg).to_value(u.arcsec),
+                     spherical.lat.to_value(u.arcsec)], axis=-1)
+
+
+def tile_footprint(tile):
+    """
+    The corners of the footprint of ``tile`` on the sky.
+
+    The first two pixel axes the celestial coordinates depend on are the
+    axes of the image. If the celestial coordinates also depend on other
+    pixel axes, such as time when the pointing changes during an
+    observation, there is a footprint for every step along those axes.
+
+    Returns
+    -------
+    `~astropy.coordinates.SkyCoord`
+        The corners of the outer edges of the image with shape ``(n_steps, 4)``.
+    """
+    wcs = tile.wcs
+    pixel_axes = _celestial_pixel_axes(wcs)
+    pixel_shape = tile.data.shape[::-1]
+    image_axes, step_axes = pixel_axes[:2], pixel_axes[2:]
+
+    steps = np.zeros((0, 1), dtype=int)
+    if step_axes.size:
+        steps = np.indices([pixel_shape[i] for i in step_axes]).reshape(len(step_axes), -1)
+    pixel = np.zeros((wcs.pixel_n_dim, steps.shape[1], 4))
+    for axis, corners in zip(image_axes, ([0, 1, 1, 0], [0, 0, 1, 1])):
+        pixel[axis] = np.array(corners) * pixel_shape[axis] - 0.5
+    for axis, step in zip(step_axes, steps):
+        pixel[axis] = step[:, None]
+
+    world = wcs.pixel_to_world(*pixel)
+    world = world if isinstance(world, list | tuple) else [world]
+    return next(w for w in world if isinstance(w, SkyCoord))
+
+
+class FootprintIndex:
+    """
+    The footprints of a grid of tiles, in the celestial frame of the first tile.
+
+    Parameters
+    ----------
+    tiles
+        An object array of tiles, elements which are not `~dkist.Dataset`
+        objects are ignored.
+    """
+
+    def __init__(self, tiles):
+        self.shape = tiles.shape
+        self.footprints = {}
+        self.frame = None
+        for index in np.ndindex(tiles.shape):
+            if not isinstance(tiles[index], Dataset):
+                continue
+            footprint = tile_footprint(tiles[index])
+            if self.frame is None:
+                self.frame = footprint.frame.replicate_without_data()
+            self.footprints[index] = _lonlat(footprint, self.frame)
+
+    def intersecting(self, region):
+        """
+        Which tiles intersect the bounding box of the coordinates in ``region``.
+
+        Parameters
+        ----------
+        region
+            A list of `~astropy.coordinates.SkyCoord` objects.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            A boolean array with the shape of the grid of tiles.
+        """
+        lonlat = np.concatenate([_lonlat(coord, self.frame).reshape(-1, 2) for coord in region])
+        lower, upper = lonlat.min(axis=0), lonlat.max(axis=0)
+        result = np.zeros(self.shape, dtype=bool)
+        for index, corners in self.footprints.items():
+            result[index] = _polygons_intersect_box(corners, lower, upper).any()
+        return result
+
+
+def _polygons_intersect_box(polygons, lower, upper):
+    """
+    Which of the convex ``polygons`` intersect the box from ``lower`` to ``upper``.
+
+    This checks that the projections of the polygon and the box onto the
+    axes of the box and the normals of the polygon edges all overlap (the
+    separating axis theorem). Polygons with non-finite corners are treated
+    as intersecting.
+    """
+    box = np.array([lower, [upper[0], lower[1]], upper, [lower[0], upper[1]]])
+    edges = np.roll(polygons, -1, axis=-2) - polygons
+    axes = np.concatenate([
+        np.broadcast_to(np.eye(2), (*polygons.shape[:-2], 2, 2)),
+        np.stack([-edges[..., 1], edges[..., 0]], axis=-1),
+    ], axis=-2)
+    polygon_proj = np.einsum("...ad,...pd->...ap", axes, polygons)
+    box_proj = np.einsum("...ad,pd->...ap", axes, box)
+    separated = ((polygon_proj.max(axis=-1) < box_proj.min(axis=-1))
+                 | (box_proj.max(axis=-1) < polygon_proj.min(axis=-1)))
+    finite = np.isfinite(polygons).all(axis=(-2, -1))
+    return ~finite | ~separated.any(axis=-1)
+
+
+def _overlaps(region, block):
+    return all(r.start < b.stop and b.start < r.stop for r, b in zip(region, block))
+
+
+def _regrid_block(block, target_wcs, tiles, order, combine):
+    """
+    Regrid the tiles onto one block of the output.
+
+    ``tiles`` is a list of tuples of the WCS of a tile, the shape of the
+    tile, the region of the tile which was read and the data in that region.
+    Returns an array of the regridded data and the number of tiles which
+    contributed to each pixel stacked along the first axis.
+    """
+    from scipy.ndimage import map_coordinates  # noqa: PLC0415
+
+    y_out, x_out = np.mgrid[block]
+    shape = y_out.shape
+    value = np.full(shape, np.nan)
+    footprint = np.zeros(shape)
+
+    for wcs, tile_shape, region, data in tiles:
+        x, y = pixel_to_pixel(target_wcs, wcs, x_out.astype(float), y_out.astype(float))
+        # Output pixels whose centres fall in a pixel of the tile
+        inside = ((x >= -0.5) & (x < tile_shape[1] - 0.5) & (y >= -0.5) & (y < tile_shape[0] - 0.5))
+        if not inside.any():
+            continue
+        tile_value = np.full(shape, np.nan)
+        tile_value[inside] = map_coordinates(
+            np.asarray(data, dtype=float),
+            [y[inside] - region[0].start, x[inside] - region[1].start],
+            order=order,
+            mode="nearest",
+        )
+        valid = np.isfinite(tile_value)
+
+        if combine in ("mean", "sum"):
+            value[valid] = np.where(footprint[valid] > 0, value[valid], 0) + tile_value[valid]
+        elif combine == "first":
+            first = valid & (footprint == 0)
+            value[first] = tile_value[first]
+        elif combine == "last":
+            value[valid] = tile_value[valid]
+        elif combine == "min":
+            value[valid] = np.fmin(value[valid], tile_value[valid])
+        elif combine == "max":
+            value[valid] = np.fmax(value[valid], tile_value[valid])
+        footprint += valid
+
+    if combine == "mean":
+        covered = footprint > 0
+        value[covered] /= footprint[covered]
+    return np.stack([value, footprint])
+
+
+def regrid_tiles(tiles, target_wcs, shape_out, *, chunks="auto", order=1, combine="mean"):
+    """
+    Regrid 2D tiles onto the pixel grid of ``target_wcs``.
+
+    See `dkist.TiledDataset.regrid` for a description of the parameters.
+    """
+    if combine not in COMBINE_FUNCTIONS:
+        raise ValueError(f"combine must be one of {COMBINE_FUNCTIONS}, not {combine!r}")
+    shape_out = tuple(shape_out)
+    chunks = normalize_chunks(chunks, shape_out, dtype=np.float64)
+
+    # The region of the output covered by each tile
+    outlines = []
+    for tile in tiles:
+        x, y = pixel_to_pixel(tile.wcs, target_wcs, *_edge_pixels(tile.data.shape))
+        outlines.append(_bounding_box(x, y, shape_out, margin=1))
+
+    starts = [np.cumsum((0, *c[:-1])) for c in chunks]
+    blocks = np.empty(tuple(map(len, chunks)), dtype=object)
+    for index in product(*(range(len(c)) for c in chunks)):
+        block = tuple(slice(s[i], s[i] + c[i]) for s, c, i in zip(starts, chunks, index))
+        block_shape = tuple(c[i] for c, i in zip(chunks, index))
+        block_edges = None
+
+        block_tiles = []
+        for tile, outline in zip(tiles, outlines):
+            if outline is None or not _overlaps(outline, block):
+                continue
+            if block_edges is None:
+                x, y = _edge_pixels(block_shape)
+                block_edges = (x + block[1].start, y + block[0].start)
+            # The region of the tile needed for this block, with a margin for the interpolation
+            x, y = pixel_to_pixel(target_wcs, tile.wcs, *block_edges)
+            region = _bounding_box(x, y, tile.data.shape, margin=order + 1)
+            if region is not None:
+                block_tiles.append((tile.wcs, tile.data.shape, region, tile.data[region]))
+
+        if block_tiles:
+            task = dask.delayed(_regrid_block, pure=False)(block, target_wcs, block_tiles, order, combine)
+            blocks[index] = da.from_delayed(task, shape=(2, *block_shape), dtype=np.float64)
+        else:
+            empty = da.full(block_shape, np.nan, chunks=block_shape)
+            blocks[index] = da.stack([empty, da.zeros(block_shape, chunks=block_shape)])
+
+    regridded = da.block(blocks.tolist())
+    return regridded[0], regridded[1]
@@ -1,13 +1,18 @@
 from textwrap import dedent
 
+import dask.array as da
 import numpy as np
+from dask.array.core import normalize_chunks
 
 import gwcs
+from astropy.table import Table
 from astropy.wcs.wcsapi.wrappers import SlicedLowLevelWCS
+from astropy.wcs.wcsapi.wrappers.sliced_wcs import sanitize_slices
 
 from ndcube.ndcube import NDCube, NDCubeLinkedDescriptor
 
 from dkist.io.dask.striped_array import FileManager
+from dkist.io.dask.utils import _compose_slices
 from dkist.io.file_manager import DKISTFileManager
 from dkist.utils.decorators import deprecated
 
@@ -98,11 +103,20 @@ class Dataset(NDCube):
     to the relevant files. However, note that they behave slightly differently.
     The file manager will be a reference to the file manager of the original
     Dataset, meaning that any file name changes made to the sliced object will
-    propagate to the original. This is not the case for the header table, as
-    slicing creates a new object in this case.
+    propagate to the original. The sliced dataset has a new header table, so
+    adding, removing or replacing columns does not affect the original. The
+    columns of the sliced table may share data with the original table, so
+    they are read-only, use ``dataset.headers.copy()`` to modify values in
+    place.
     """
 
     _file_manager = FileManagerDescriptor(default_type=DKISTFileManager)
+    # The HeaderRows of the table in the ASDF file the header table was
+    # selected from.
+    _header_source = None
+    # The dask array this dataset's data was sliced from, the index into it
+    # and the array that index produced.
+    _data_source = None
 
     def __init__(self, data, wcs=None, uncertainty=None, mask=None, meta=None,
                  unit=None, copy=False, psf=None, **kwargs):
@@ -117,40 +131,131 @@ class Dataset(NDCube):
         if "inventory" not in meta:
             raise ValueError("The meta dict must contain the inventory record.")
 
+        # Passed by _slice when the data were sliced from another array
+        data_source = kwargs.pop("_data_source", None)
+
         super().__init__(data, wcs, uncertainty=uncertainty, mask=mask, meta=meta,
                          unit=unit, copy=copy, psf=psf, **kwargs)
 
+        if data_source is not None:
+            self._data_source = (*data_source, self.data)
+
     def __getitem__(self, item):
+        return self._getitem(item)
+
+    def _getitem(self, item, header_rows=None):
+        """
+        Slice the dataset, optionally with the header rows already selected.
+
+        ``header_rows`` is a tuple of the rows returned by
+        ``_slice_header_rows(item)`` and the header table of those rows. This
+        lets `.TiledDataset.slice_tiles` select the rows of all the tiles at
+        once.
+        """
         sliced_dataset = super().__getitem__(item)
         if self._file_manager is not None:
             sliced_dataset._file_manager = self._file_manager._fm._slice_by_cube(item)
             sliced_dataset.meta = sliced_dataset.meta.copy()
-            sliced_dataset.meta["headers"] = self._slice_headers(item)
+            if header_rows is None:
+                rows = self._slice_header_rows(item)
+                headers = self._slice_headers(rows)
+            else:
+                rows, headers = header_rows
+            sliced_dataset.meta["headers"] = headers
+            if self._header_source is not None and self._header_source.matches(self.headers):
+                sliced_dataset._header_source = self._header_source.select(rows, sliced_dataset.headers)
         return sliced_dataset
 
-    def _slice_headers(self, slice_):
+    def _slice(self, item):
+        """
+        Collect the sliced attributes to pass to the constructor of the sliced dataset.
+
+        This overrides `astropy.nddata.NDSlicingMixin._slice` so that if the
+        data were sliced from another dask array, the slices are composed and
+        that array is indexed instead. This means that the dask graph of a
+        dataset which has been sliced many times has only one getitem layer on
+        top of the original array.
+        """
+        kwargs = {}
+        source_item = None
+        if isinstance(self.data, da.Array):
+            try:
+                source, source_item = self.data, tuple(sanitize_slices(item, self.data.ndim))
+                if self._data_source is not None and self._data_source[2] is self.data:
+                    source, parent_item, _ = self._data_source
+                    source_item = _compose_slices(source.shape, parent_item, source_item)
+            except (IndexError, ValueError):
+                source_item = None
+
+        if source_item is None:
+            kwargs["data"] = self.data[item]
+        else:
+            kwargs["data"] = source[source_item]
+            kwargs["_data_source"] = (source, source_item)
+        kwargs["uncertainty"] = self._slice_uncertainty(item)
+        kwargs["mask"] = self._slice_mask(item)
+        kwargs["wcs"] = self._slice_wcs(item)
+        kwargs["unit"] = self.unit
+        kwargs["meta"] = self.meta
+        return kwargs
+
+    def _slice_headers(self, rows):
+        """
+        A new header table of the rows ``rows``, or all of them if `None`.
+
+        The parent table is never copied. Selecting a contiguous block of rows
+        gives a new table which views the columns of the parent, and selecting
+        any other rows only copies the selected rows. Whichever rows are
+        selected the columns of the new table are read-only, so modifying the
+        values always needs a copy and never changes the parent table.
+        """
+        headers = self.headers[:] if rows is None else self.headers[rows]
+        if isinstance(headers, Table):
+            for column in headers.itercols():
+                if isinstance(column, np.ndarray):
+                    column.flags.writeable = False
+                mask = getattr(column, "mask", np.ma.nomask)
+                if isinstance(mask, np.ndarray):
+                    mask.flags.writeable = False
+        return headers
+
+    def _slice_header_rows(self, slice_):
+        """
+        The rows of the header table selected by ``slice_``, or `None` for all of them.
+
+        The rows are computed from the start, stop and step of the slice along
+        each file axis. If the rows are contiguous a `slice` is returned,
+        otherwise an array of only the selected row indices.
+        """
         idx = self.files._fm._array_slice_to_loader_slice(slice_)
         if idx == (np.s_[:],):
-            return self.headers.copy()
+            return None
 
         files_shape = [i for i in self.files.fileuri_array.shape if i != 1]
-        file_idx = []
-        for ax, slc in enumerate(idx):
-            if not isinstance(slc, slice):
-                slc = slice(slc, slc+1, 1)
-            else:
-                # mgrid has to have a stop, so if it's missing from the slice we
-                # add it.
-                stop = slc.stop or files_shape[ax]
-                slc = slice(slc.start, stop, slc.step)
-            file_idx.append(slc)
-        grid = np.mgrid[tuple(file_idx)]
-        file_idx = tuple(grid[i].ravel() for i in range(grid.shape[0]))
-        flat_idx = np.ravel_multi_index(file_idx[::-1], files_shape[::-1], order="F")
-
-        # Explicitly create new header table to ensure consistency
-        # Otherwise would return a reference sometimes and a new table others
-        return self.meta["headers"].copy()[flat_idx]
+        # A range normalises negative indices and missing starts and stops
+        ranges = [range(n)[slc] for slc, n in zip(idx, files_shape)]
+        ranges = [r if isinstance(r, range) else range(r, r + 1) for r in ranges]
+        ranges += [range(n) for n in files_shape[len(ranges):]]
+
+        # The header table is in C order over the file axes
+        strides = [int(np.prod(files_shape[ax+1:])) for ax in range(len(files_shape))]
+        n_rows = int(np.prod([len(r) for r in ranges]))
+        if n_rows == 0:
+            return slice(0, 0)
+
+        # The rows are contiguous if the last axes are all selected, the axis
+        # before them has a step of one, and all the others have one element.
+        partial = [ax for ax, (r, n) in enumerate(zip(ranges, files_shape)) if r != range(n)]
+        if not partial:
+            return slice(0, n_rows)
+        last = partial[-1]
+        if all(len(r) == 1 for r in ranges[:last]) and (ranges[last].step == 1 or len(ranges[last]) == 1):
+            start = sum(r[0] * stride for r, stride in zip(ranges, strides))
+            return slice(start, start + n_rows)
+
+        axes_rows = np.ix_(*(np.arange(r.start, r.stop, r.step, dtype=np.int64) * stride
+                             for r, stride in zip(ranges, strides)))
+        return sum(axes_rows).ravel()
 
     """
     Properties.
@@ -168,6 +273,86 @@ class Dataset(NDCube):
         """
         return self.meta["headers"]
 
+    def header_columns(self, names):
+        """
+        A table of only some of the columns of the header table.
+
+        Only the requested columns are read, so when the dataset was loaded
+        with ``dkist.io.conf.lazy_headers`` set this avoids reading the whole
+        header table. If ``dkist.io.conf.header_cache`` is set the columns
+        are also cached on disk, so they are not read from the ASDF file
+        again the next time it is loaded.
+
+        Parameters
+        ----------
+        names : `str` or `list` of `str`
+            The names of the columns, e.g. ``["DATE-BEG", "EXPTIME"]``.
+
+        Returns
+        -------
+        `astropy.table.Table`
+        """
+        from dkist.io import conf  # noqa: PLC0415
+
+        names = [names] if isinstance(names, str) else list(names)
+        if self._header_source is not None and self._header_source.matches(self.headers):
+            return self._header_source.columns(names, use_cache=conf.header_cache)
+        return Table([self.headers[name] for name in names], names=names, copy=False)
+
+    def world_grid_values(self, chunks=None):
+        """
+        The world coordinates of every pixel in the dataset, as dask arrays.
+
+        Each world coordinate is only computed over the pixel axes it depends
+        on, and then broadcast to the shape of the data, so the memory used to
+        compute any chunk of the grids is at most the size of that chunk.
+
+        Parameters
+        ----------
+        chunks : optional
+            The chunks of the returned arrays, in any form accepted by
+            `dask.array.core.normalize_chunks`. Defaults to the chunks of the
+            data array.
+
+        Returns
+        -------
+        `tuple` of `dask.array.Array`
+            One array, with the same shape as the data, for each world axis
+            in the same order as ``wcs.pixel_to_world_values``.
+        """
+        from dkist.wcs import dask_pixel_to_world_values  # noqa: PLC0415
+
+        wcs = self.wcs.low_level_wcs
+        shape = self.data.shape
+        if chunks is None:
+            chunks = getattr(self.data, "chunks", "auto")
+        chunks = normalize_chunks(chunks, shape, dtype=float)
+        # Pixel axes are in the reverse order to the array axes
+        array_axes = range(wcs.pixel_n_dim - 1, -1, -1)
+        correlation = wcs.axis_correlation_matrix
+
+        grids = [None] * wcs.world_n_dim
+        for world_axis, depends in enumerate(correlation):
+            if grids[world_axis] is not None:
+                continue
+
+            # Only vary the pixel coordinates along the axes this world axis depends on
+            pixel = []
+            for pixel_axis, array_axis in enumerate(array_axes):
+                if depends[pixel_axis]:
+                    coord = da.arange(shape[array_axis], chunks=(chunks[array_axis],), dtype=float)
+                else:
+                    coord = da.zeros(1, chunks=1)
+                pixel.append(coord[tuple(slice(None) if i == array_axis else None for i in range(len(shape)))])
+            world = dask_pixel_to_world_values(wcs, *pixel)
+
+            # Other world axes which depend on the same pixel axes come from the same evaluation
+            for other_axis, other_depends in enumerate(correlation):
+                if grids[other_axis] is None and (other_depends == depends).all():
+                    grids[other_axis] = da.broadcast_to(world[other_axis], shape, chunks=chunks)
+
+        return tuple(grids)
+
     @property
     def quality_report(self):
         """
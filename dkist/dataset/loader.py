@@ -1,16 +1,20 @@
 import re
 import warnings
+import contextlib
 from pathlib import Path
-from functools import cache, singledispatch
+from functools import cache, partial, singledispatch
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from packaging.version import Version
 from parfive import Results
 
 import asdf
+from asdf.exceptions import AsdfBlockIndexWarning
 
 import dkist
 from dkist.io.asdf.entry_points import get_extensions as get_dkist_extensions
+from dkist.io.asdf.lazy_table import get_lazy_table_extension
 from dkist.utils.exceptions import DKISTOutOfDateError, DKISTUserWarning
 
 ASDF_FILENAME_PATTERN = re.compile(
@@ -20,7 +24,7 @@ DKIST_EXTENSION_REGEX = re.compile(r"asdf:\/\/dkist\.nso\.edu\/dkist\/extensions
 
 
 @singledispatch
-def load_dataset(target, *, ignore_version_mismatch=False):
+def load_dataset(target, *, ignore_version_mismatch=False, workers=None):
     """
     Load a DKIST dataset from a variety of inputs.
 
@@ -36,6 +40,17 @@ def load_dataset(target, *, ignore_version_mismatch=False):
 
         {types_list}
 
+    ignore_version_mismatch : `bool`, optional
+        If `True` do not raise an error if an ASDF file requires a newer
+        version of the `dkist` package than is installed.
+
+    workers : `int`, optional
+        The number of threads used to read the ASDF files when loading more
+        than one dataset. The datasets are returned in the same order as
+        the inputs. If any files fail to load, the errors for all of them
+        are raised together in an `ExceptionGroup`. By default the files are
+        read one at a time.
+
     Returns
     -------
     datasets
@@ -52,6 +67,8 @@ def load_dataset(target, *, ignore_version_mismatch=False):
 
     >>> dkist.load_dataset(Path("/path/to/ABCDE"))  # doctest: +SKIP
 
+    >>> dkist.load_dataset(["/path/to/ABCDE/", "/path/to/FGHIJ/"], workers=4)  # doctest: +SKIP
+
     >>> from dkist.data.sample import VISP_L1_KMUPT  # doctest: +REMOTE_DATA
     >>> print(dkist.load_dataset(VISP_L1_KMUPT))  # doctest: +REMOTE_DATA
     This VISP Dataset consists of 1700 frames.
@@ -63,7 +80,7 @@ def load_dataset(target, *, ignore_version_mismatch=False):
     This Dataset has 4 pixel and 5 world dimensions.
     <BLANKLINE>
     The data are represented by a <class 'dask.array.core.Array'> object:
-    dask.array<reshape, shape=(4, 425, 980, 2554), dtype=float64, chunksize=(1, 1, 980, 2554), chunktype=numpy.ndarray>
+    dask.array<load_files, shape=(4, 425, 980, 2554), dtype=float64, chunksize=(1, 1, 980, 2554), chunktype=numpy.ndarray>
     <BLANKLINE>
     Array Dim  Axis Name                Data size  Bounds
             0  polarization state               4  None
@@ -95,35 +112,57 @@ def load_dataset(target, *, ignore_version_mismatch=False):
 
 
 @load_dataset.register
-def _load_from_results(results: Results, *, ignore_version_mismatch=False):
+def _load_from_results(results: Results, *, ignore_version_mismatch=False, workers=None):
     """
     The results from a call to ``Fido.fetch``, all results must be valid DKIST ASDF files.
     """
-    return _load_from_iterable(results)
+    return _load_from_iterable(results, ignore_version_mismatch=ignore_version_mismatch, workers=workers)
 
 
 @load_dataset.register
-def _load_from_iterable(iterable: tuple | list, *, ignore_version_mismatch=False):
+def _load_from_iterable(iterable: tuple | list, *, ignore_version_mismatch=False, workers=None):
     """
     A list or tuple of valid inputs to ``load_dataset``.
     """
-    datasets = [load_dataset(item) for item in iterable]
+    load = partial(_load_item, ignore_version_mismatch=ignore_version_mismatch)
+    if not workers or workers < 2 or len(iterable) < 2:
+        datasets = [load(item) for item in iterable]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(load, item) for item in iterable]
+        if errors := [f.exception() for f in futures if f.exception() is not None]:
+            if len(errors) == 1:
+                raise errors[0]
+            raise ExceptionGroup(f"{len(errors)} of {len(futures)} datasets failed to load", errors)
+        datasets = [f.result() for f in futures]
+
     if len(datasets) == 1:
         return datasets[0]
     return datasets
 
 
+def _load_item(item, *, ignore_version_mismatch=False):
+    """
+    Load one item of an iterable, noting which item any error came from.
+    """
+    try:
+        return load_dataset(item, ignore_version_mismatch=ignore_version_mismatch)
+    except Exception as e:
+        e.add_note(f"This error was raised while loading {item}.")
+        raise
+
+
 @load_dataset.register
-def _load_from_string(path: str, *, ignore_version_mismatch=False):
+def _load_from_string(path: str, *, ignore_version_mismatch=False, workers=None):
     """
     A string representing a directory or an ASDF file.
     """
     # TODO Adjust this to accept URLs as well
-    return _load_from_path(Path(path))
+    return _load_from_path(Path(path), ignore_version_mismatch=ignore_version_mismatch, workers=workers)
 
 
 @load_dataset.register
-def _load_from_path(path: Path, *, ignore_version_mismatch=False):
+def _load_from_path(path: Path, *, ignore_version_mismatch=False, workers=None):
     """
     A path object representing a directory or an ASDF file.
     """
@@ -133,10 +172,10 @@ def _load_from_path(path: Path, *, ignore_version_mismatch=False):
             raise ValueError(f"{path} does not exist.")
         return _load_from_asdf(path, ignore_version_mismatch=ignore_version_mismatch)
 
-    return _load_from_directory(path, ignore_version_mismatch=ignore_version_mismatch)
+    return _load_from_directory(path, ignore_version_mismatch=ignore_version_mismatch, workers=workers)
 
 
-def _load_from_directory(directory, *, ignore_version_mismatch=False):
+def _load_from_directory(directory, *, ignore_version_mismatch=False, workers=None):
     """
     Construct a `~dkist.dataset.Dataset` from a directory containing one (or
     more) ASDF files and a collection of FITS files.
@@ -220,23 +259,44 @@ def _load_from_directory(directory, *, ignore_version_mismatch=False):
     if len(asdfs_to_load) == 1:
         return _load_from_asdf(asdfs_to_load[0], ignore_version_mismatch=ignore_version_mismatch)
 
-    return _load_from_iterable(asdfs_to_load, ignore_version_mismatch=ignore_version_mismatch)
+    return _load_from_iterable(asdfs_to_load, ignore_version_mismatch=ignore_version_mismatch, workers=workers)
 
 
 def _load_from_asdf(filepath, *, ignore_version_mismatch=False):
     from dkist.dataset import Dataset, Inversion, TiledDataset  # noqa: PLC0415
+    from dkist.io import conf  # noqa: PLC0415
+
+    open_kwargs = {"lazy_load": False, "memmap": False}
+    lazy_extension = None
+    if conf.lazy_headers:
+        # Leave the table data in the file until it's used
+        lazy_extension = get_lazy_table_extension()
+        open_kwargs = {"lazy_load": True, "memmap": False, "extensions": [lazy_extension]}
 
     # Load the file without a custom schema so that we can validate it against multiple schemas
-    with asdf.open(filepath, lazy_load=False, memmap=False) as ff:
+    with contextlib.ExitStack() as stack:
+        with warnings.catch_warnings():
+            # Lazy loading reads the block index, which is not always valid,
+            # but asdf falls back to reading the blocks as the eager loading does.
+            warnings.simplefilter("ignore", AsdfBlockIndexWarning)
+            ff = stack.enter_context(asdf.open(filepath, **open_kwargs))
         if not ignore_version_mismatch:
             _check_dkist_version(filepath, ff)
 
+        loaded = None
         # First validate against level 1
         if "dataset" in ff.tree and isinstance(ff.tree["dataset"], (Dataset, TiledDataset)):
-            return _load_l1_from_asdf(ff, filepath)
+            loaded = _load_l1_from_asdf(ff, filepath)
         # If l1 validation fails, assume l2
-        if "inversion" in ff.tree and isinstance(ff.tree["inversion"], Inversion):
-            return _load_l2_from_asdf(ff, filepath)
+        elif "inversion" in ff.tree and isinstance(ff.tree["inversion"], Inversion):
+            loaded = _load_l2_from_asdf(ff, filepath)
+
+        if loaded is not None:
+            if lazy_extension is not None:
+                # The tables close the file once they have read all their columns
+                lazy_extension.attach(ff)
+                stack.pop_all()
+            return loaded
 
         # If you get here, it's neither level 1 nor 2
         raise TypeError(
@@ -254,13 +314,24 @@ def _load_l1_from_asdf(asdf_file, filepath):
     ds = asdf_file.tree["dataset"]
     ds.meta["history"] = asdf_file.tree["history"]
     if isinstance(ds, TiledDataset):
-        for sub in ds.flat:
+        for i, sub in enumerate(ds.flat):
             sub.files.basepath = base_path
+            _set_header_source(sub, filepath, f"tile{i}")
     else:
         ds.files.basepath = base_path
+        _set_header_source(ds, filepath, "dataset")
     return ds
 
 
+def _set_header_source(ds, filepath, key):
+    """
+    Record the ASDF file the header table of ``ds`` was read from.
+    """
+    from dkist.io.header_cache import HeaderRows, HeaderSource  # noqa: PLC0415
+
+    ds._header_source = HeaderRows(HeaderSource(filepath, key, ds.headers), None, ds.headers)
+
+
 def _load_l2_from_asdf(asdf_file, filepath):
     """
     Construct a level 2 inversion object from a filepath of a suitable asdf file.
@@ -7,12 +7,13 @@ import pytest
 import asdf
 import astropy.units as u
 import gwcs
+from astropy.table import Table
 from astropy.table.row import Row
 from astropy.tests.helper import assert_quantity_allclose
 
 from dkist.data.test import rootdir
 from dkist.dataset import Dataset, TiledDataset, load_dataset
-from dkist.io import DKISTFileManager
+from dkist.io import DKISTFileManager, conf
 from dkist.utils.exceptions import DKISTDeprecationWarning
 
 
@@ -193,6 +194,141 @@ def test_header_slicing_3D_slice(large_visp_dataset):
     assert (sliced.headers["DINDEX3", "DINDEX4"] == sliced_headers["DINDEX3", "DINDEX4"]).all()
 
 
+@pytest.mark.parametrize("idx", [np.s_[1], np.s_[-1], np.s_[1:3], np.s_[:, 4], np.s_[2, 5:], np.s_[1:3, 10:15],
+                                 np.s_[-2:, :3], np.s_[2:2], np.s_[:, :, 0]])
+def test_header_slicing_rows(large_visp_dataset, idx, mocker):
+    dataset = large_visp_dataset
+    file_rows = np.arange(len(dataset.headers)).reshape(dataset.files.fileuri_array.shape)
+    item = idx if isinstance(idx, tuple) else (idx,)
+    expected = np.atleast_1d(file_rows[item[:2]]).ravel()
+
+    rows = dataset._slice_header_rows(idx)
+    assert (np.arange(len(dataset.headers))[rows] == expected).all()
+    # Contiguous rows are selected with a slice, so the table columns are views
+    assert isinstance(rows, slice) == bool(expected.size == 0 or (np.diff(expected) == 1).all())
+
+    copy = mocker.spy(Table, "copy")
+    sliced = dataset[idx]
+    copy.assert_not_called()
+    assert (sliced.headers["DINDEX3", "DINDEX4"] == dataset.headers[expected]["DINDEX3", "DINDEX4"]).all()
+    assert (sliced.header_columns("DINDEX4")["DINDEX4"] == sliced.headers["DINDEX4"]).all()
+
+
+@pytest.mark.parametrize("idx", [np.s_[...], np.s_[1:3], np.s_[:, 4]])
+def test_header_slicing_readonly(large_visp_dataset, idx):
+    dataset = large_visp_dataset
+    sliced = dataset[idx]
+    original = dataset.headers["DINDEX3"].copy()
+
+    # The values can't be modified in place whether or not the rows are views
+    with pytest.raises(ValueError, match="read-only"):
+        sliced.headers["DINDEX3"][0] = -1
+    assert (dataset.headers["DINDEX3"] == original).all()
+
+    headers = sliced.headers.copy()
+    headers["DINDEX3"][0] = -1
+    assert (dataset.headers["DINDEX3"] == original).all()
+    # Columns can still be replaced
+    sliced.headers["DINDEX3"] = np.zeros(len(sliced.headers))
+    assert (dataset.headers["DINDEX3"] == original).all()
+
+
+def test_repeated_slicing(large_visp_dataset, mocker):
+    ds = large_visp_dataset
+    getitem = mocker.spy(da.Array, "__getitem__")
+    sliced = ds[1:][1][:, 3:40][-1][10:]
+    # The data are only sliced once for each slice of the dataset
+    assert getitem.call_count == 5
+    expected = ds[2, :, 3:40][-1][10:]
+    assert len(sliced.data.dask.layers) == len(expected.data.dask.layers) == len(ds[2, -1].data.dask.layers)
+    assert sliced.data.shape == expected.data.shape
+    np.testing.assert_array_equal(sliced.data.compute(), ds.data[2, -1, 13:40].compute())
+    # The WCS slices are also combined into one
+    assert sliced.wcs.low_level_wcs._wcs is ds.wcs.low_level_wcs
+
+    # Replacing the data stops it from being sliced from the original array
+    sliced._data = sliced.data.compute()
+    assert isinstance(sliced[1:].data, np.ndarray)
+
+
+def test_header_columns(large_visp_dataset):
+    ds = large_visp_dataset
+    columns = ds.header_columns(["DINDEX3", "DATE-BEG"])
+    assert columns.colnames == ["DINDEX3", "DATE-BEG"]
+    assert (columns == ds.headers["DINDEX3", "DATE-BEG"]).all()
+
+    sliced = ds[:2, 10:15, 0]
+    assert sliced._header_source.source is ds._header_source.source
+    assert (sliced.header_columns("DINDEX3")["DINDEX3"] == sliced.headers["DINDEX3"]).all()
+    assert (sliced[1].header_columns("DINDEX3")["DINDEX3"] == sliced[1].headers["DINDEX3"]).all()
+
+
+def test_header_columns_no_source(dataset):
+    dataset.meta["headers"] = Table({"DINDEX3": [1], "EXPTIME": [2.0]})
+    assert dataset._header_source is None
+    columns = dataset.header_columns(["EXPTIME"])
+    assert columns.colnames == ["EXPTIME"]
+    assert columns["EXPTIME"][0] == 2.0
+
+
+def test_header_columns_cache(large_visp_dataset_file, tmp_path, mocker):
+    mocker.patch("platformdirs.user_cache_dir", return_value=str(tmp_path))
+    with conf.set_temp("header_cache", True), conf.set_temp("lazy_headers", True):
+        ds = load_dataset(large_visp_dataset_file)
+        sliced = ds[:2, 10:15, 0]
+        expected = sliced.header_columns(["DINDEX3", "DATE-BEG"])
+        cache_files = list((tmp_path / "headers").glob("*/*.npz"))
+        assert sorted(f.name for f in cache_files) == ["DATE-BEG.npz", "DINDEX3.npz"]
+        assert not ds.headers.loaded
+
+        # The cached columns are not read from the ASDF file again
+        ds = load_dataset(large_visp_dataset_file)
+        read = mocker.spy(ds.headers._source, "column")
+        columns = ds[:2, 10:15, 0].header_columns(["DATE-BEG", "DINDEX3"])
+        read.assert_not_called()
+        assert (columns["DINDEX3", "DATE-BEG"] == expected).all()
+
+        # New columns are added to the cache without rewriting the others
+        mtimes = {f: f.stat().st_mtime_ns for f in cache_files}
+        write = mocker.spy(ds._header_source.source, "_write_cache")
+        ds.header_columns(["DINDEX4"])
+        read.assert_called_once_with("DINDEX4")
+        assert [c.args[0] for c in write.call_args_list] == ["DINDEX4"]
+        assert (cache_files[0].parent / "DINDEX4.npz").exists()
+        assert {f: f.stat().st_mtime_ns for f in cache_files} == mtimes
+
+
+def test_header_columns_modified_headers(large_visp_dataset_file):
+    ds = load_dataset(large_visp_dataset_file)
+    ds.meta["headers"] = ds.headers[::-1]
+    # The source no longer matches the table, so the columns come from the table
+    assert (ds.header_columns("DINDEX3")["DINDEX3"] == ds.headers["DINDEX3"]).all()
+
+
+def test_world_grid_values(large_visp_dataset):
+    ds = large_visp_dataset[:, :10]
+    grids = ds.world_grid_values()
+    assert len(grids) == ds.wcs.world_n_dim
+    assert all(grid.chunks == ds.data.chunks for grid in grids)
+
+    pixel = np.meshgrid(*[np.arange(n) for n in ds.data.shape[::-1]], indexing="ij")
+    expected = ds.wcs.low_level_wcs.pixel_to_world_values(*pixel)
+    for grid, world in zip(da.compute(*grids), expected):
+        np.testing.assert_allclose(grid, world.T)
+
+
+def test_world_grid_values_chunks(large_visp_dataset, mocker):
+    ds = large_visp_dataset
+    grids = ds.world_grid_values(chunks=(1, 10, 20, -1))
+    assert all(grid.chunksize == (1, 10, 20, ds.data.shape[-1]) for grid in grids)
+
+    # The wavelength only depends on one pixel axis, so is only computed along that axis
+    evaluate = mocker.spy(ds.wcs.low_level_wcs, "pixel_to_world_values")
+    grids[1].compute(scheduler="synchronous")
+    assert evaluate.call_count == len(grids[1].chunks[2])
+    assert all(np.broadcast(*call.args).size <= 20 for call in evaluate.call_args_list)
+
+
 @pytest.mark.accept_cli_dataset
 def test_file_slicing_with_dummy_axis(dataset_5d_dummy_filemanager_axis):
     ds = dataset_5d_dummy_filemanager_axis
@@ -98,6 +98,28 @@ def test_multiple_from_dir(multiple_asdf_in_folder):
     assert all(isinstance(d, Dataset) for d in ds)
 
 
+@pytest.mark.parametrize("workers", [None, 1, 4])
+def test_load_multiple_workers(asdf_path, asdf_tileddataset_path, multiple_asdf_in_folder, workers):
+    datasets = load_dataset([asdf_tileddataset_path, asdf_path, asdf_tileddataset_path], workers=workers)
+    assert [type(ds) for ds in datasets] == [TiledDataset, Dataset, TiledDataset]
+
+    datasets = load_dataset(multiple_asdf_in_folder, workers=workers)
+    assert len(datasets) == 2
+    assert all(isinstance(d, Dataset) for d in datasets)
+
+
+def test_load_multiple_workers_errors(asdf_path, tmp_path):
+    missing = [tmp_path / "one.asdf", tmp_path / "two.asdf"]
+
+    with pytest.raises(ValueError, match=re.escape("one.asdf does not exist")) as exc_info:
+        load_dataset([asdf_path, missing[0]], workers=2)
+    assert f"while loading {missing[0]}" in exc_info.value.__notes__[0]
+
+    with pytest.raises(ExceptionGroup, match="2 of 3 datasets failed to load") as exc_info:
+        load_dataset([missing[0], asdf_path, missing[1]], workers=2)
+    assert [str(e) for e in exc_info.value.exceptions] == [f"{m} does not exist." for m in missing]
+
+
 def test_tiled_dataset(asdf_tileddataset_path):
     ds = load_dataset(asdf_tileddataset_path)
     assert isinstance(ds, TiledDataset)
@@ -288,3 +310,6 @@ def test_version_error(asdf_extensions):
 
     ds = load_dataset(test_file, ignore_version_mismatch=True)
     assert isinstance(ds, Dataset)
+
+    datasets = load_dataset([test_file, test_file], ignore_version_mismatch=True, workers=2)
+    assert all(isinstance(ds, Dataset) for ds in datasets)
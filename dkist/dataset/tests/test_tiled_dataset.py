@@ -2,14 +2,22 @@ import re
 import copy
 from importlib import resources
 
+import dask
+import dask.array as da
 import matplotlib.pyplot as plt
 import numpy as np
 import pytest
 
 import asdf
-from astropy.table import Table
+import astropy.units as u
+from astropy.table import Table, vstack
+from astropy.time import Time
+from astropy.wcs import WCS
+from astropy.wcs.utils import pixel_to_pixel
 
 from dkist import Dataset, TiledDataset, load_dataset
+from dkist.dataset import _mosaic
+from dkist.dataset._mosaic import _polygons_intersect_box
 from dkist.tests.helpers import figure_test
 from dkist.utils.exceptions import DKISTUserWarning
 
@@ -67,6 +75,41 @@ def test_tiled_dataset_slice_tiles(large_tiled_dataset, aslice):
         assert tile.data.shape == (100, 100)
 
 
+@pytest.mark.parametrize("aslice", [np.s_[1], np.s_[1:], np.s_[:, 10:20]])
+def test_tiled_dataset_slice_tiles_header_rows(large_tiled_dataset, aslice, mocker):
+    slice_header_rows = mocker.spy(Dataset, "_slice_header_rows")
+    sliced = large_tiled_dataset.slice_tiles[aslice]
+    # All the tiles have the same shape so the rows are only computed once
+    assert slice_header_rows.call_count == 1
+
+    for tile, original in zip(sliced.flat, large_tiled_dataset.flat):
+        assert (tile.headers == original[aslice].headers).all()
+    assert (sliced.combined_headers == vstack([tile.headers for tile in sliced.flat])).all()
+    # The tile headers are slices of the combined headers
+    sliced.combined_headers["DINDEX3"][0] = -1
+    assert sliced.flat[0].headers["DINDEX3"][0] == -1
+
+
+def test_tiled_dataset_slice_tiles_subgrid_headers(large_tiled_dataset):
+    # The headers of this grid are the headers of all the original tiles
+    subgrid = large_tiled_dataset[:2, 1:]
+    sliced = subgrid.slice_tiles[1]
+    for tile, original in zip(sliced.flat, subgrid.flat):
+        assert (tile.headers == original[1].headers).all()
+    assert len(sliced.combined_headers) == len(sliced.flat)
+
+
+def test_tiled_dataset_slice_tiles_mismatched_headers(large_tiled_dataset):
+    # The sizes of the tiles add up to the length of the combined table, but
+    # the rows of the table are in the order of the original grid
+    tds = large_tiled_dataset
+    reordered = TiledDataset(tds._data.data[::-1], meta=tds._meta, mask=tds.mask[::-1])
+    assert len(reordered.combined_headers) == sum(len(tile.headers) for tile in tds._data.data.flat)
+    sliced = reordered.slice_tiles[1]
+    for tile, original in zip(sliced.flat, reordered.flat):
+        assert (tile.headers == original[1].headers).all()
+
+
 def test_tiled_dataset_headers(simple_tiled_dataset, dataset):
     assert len(simple_tiled_dataset.combined_headers) == len(dataset.meta["headers"]) * 4
     assert simple_tiled_dataset.combined_headers.colnames == dataset.meta["headers"].colnames
@@ -219,6 +262,30 @@ def test_tileddataset_plot_non2d_sliceindex():
             already_sliced_ds.plot(0, figure=fig)
 
 
+@pytest.mark.parametrize("share_zscale", [True, False])
+def test_tileddataset_plot_single_compute(eit_dataset, share_zscale, mocker):
+    inventory = {**eit_dataset.inventory, "instrumentName": "EIT", "datasetId": "EITTEST"}
+    tiles = [copy.deepcopy(eit_dataset) for _ in range(4)]
+    for i, tile in enumerate(tiles):
+        tile.meta["inventory"] = inventory
+        tile._data = tile.data * (i + 1)
+    tds = TiledDataset(np.array(tiles).reshape((2, 2)), meta={"inventory": inventory})
+
+    compute = mocker.spy(dask, "compute")
+    fig = plt.figure()
+    with pytest.warns(DKISTUserWarning, match="metadata ASDF file that produced this dataset is out of date"):
+        tds.plot(0, share_zscale=share_zscale, figure=fig)
+    # All the tiles are computed at once, and not again when plotting
+    assert compute.call_count == 1
+    assert len(compute.call_args.args) == 4
+
+    images = [ax.get_images()[0] for ax in fig.axes]
+    np.testing.assert_allclose(images[0].get_array(), tiles[0].data[0].compute())
+    clims = {image.get_clim() for image in images}
+    assert len(clims) == (1 if share_zscale else 4)
+    plt.close(fig)
+
+
 @pytest.mark.accept_cli_tiled_dataset
 def test_repr(simple_tiled_dataset):
     r = repr(simple_tiled_dataset)
@@ -260,6 +327,74 @@ def test_broadcast_headers(dataset):
     assert tds[0, 0].headers["spam"][0] == 10
 
 
+@pytest.mark.accept_cli_dataset
+def test_broadcast_headers_lazily(dataset, mocker):
+    datasets = np.array([copy.deepcopy(dataset) for _ in range(4)]).reshape([2, 2])
+    for i, ds in enumerate(datasets.flat):
+        ds.meta["headers"] = Table([[i], [i*10]], names=["spam", "eggs"])
+        ds.meta["inventory"] = dataset.meta["inventory"]
+    stack = mocker.spy(TiledDataset, "_stack_tile_headers")
+    tds = TiledDataset(datasets, meta={"inventory": datasets[0, 0].meta["inventory"]})
+    subgrid = tds[1]
+    sliced = tds.slice_tiles[...]
+    assert len(tds.flat) == 4
+    stack.assert_not_called()
+
+    # A sub-grid uses the table of the grid it was taken from
+    assert (subgrid.combined_headers["spam"] == [0, 1, 2, 3]).all()
+    assert (sliced.combined_headers["spam"] == [0, 1, 2, 3]).all()
+    assert (tds.meta["headers"]["spam"] == [0, 1, 2, 3]).all()
+    assert stack.call_count == 2
+    # The table is only stacked once
+    assert tds.combined_headers is tds.meta["headers"]
+    assert subgrid.combined_headers is tds.combined_headers
+    assert stack.call_count == 2
+
+
+@pytest.mark.accept_cli_dataset
+def test_subgrid_headers_access_order(dataset):
+    def grid():
+        datasets = np.array([copy.deepcopy(dataset) for _ in range(4)]).reshape([2, 2])
+        for i, ds in enumerate(datasets.flat):
+            ds.meta["headers"] = Table([[i], [i*10]], names=["spam", "eggs"])
+            ds.meta["inventory"] = dataset.meta["inventory"]
+        return TiledDataset(datasets, meta={"inventory": dataset.meta["inventory"]})
+
+    # The headers of a sub-grid are the same whether or not the table of
+    # the grid it was taken from has been built
+    first = grid()
+    subgrid_first = first[1].combined_headers
+    second = grid()
+    second.combined_headers
+    subgrid_second = second[1].combined_headers
+    assert (subgrid_first == subgrid_second).all()
+    assert subgrid_first is first.combined_headers
+
+    # Only the grid the tiles were given to replaces their headers
+    tds = grid()
+    for subgrid in (tds[1], tds[:, 0], tds.flat):
+        subgrid.combined_headers
+        for tile in tds.flat:
+            assert np.shares_memory(tile.headers["spam"], tds.combined_headers["spam"])
+
+
+def test_tiled_dataset_subgrid_header_offsets(large_tiled_dataset, mocker):
+    tds = large_tiled_dataset
+    grid = TiledDataset(tds._data.data, mask=tds.mask, meta={**tds._meta, "headers": None})
+    subgrid = grid[:2, 1:]
+    subgrid.combined_headers
+    stack = mocker.spy(TiledDataset, "_stack_tile_headers")
+
+    # The rows of the tiles of a sub-grid are selected from the table of the
+    # grid it was taken from without stacking the headers again
+    sliced = subgrid.slice_tiles[1]
+    stack.assert_not_called()
+    for tile, original in zip(sliced.flat, subgrid.flat):
+        assert (tile.headers == original[1].headers).all()
+    assert len(sliced.combined_headers) == len(sliced.flat)
+    stack.assert_not_called()
+
+
 @pytest.mark.accept_cli_tiled_dataset
 def test_copy_dataset_headers_on_write(tmp_path, large_tiled_dataset):
     with resources.as_file(resources.files("dkist.io") / "level_1_dataset_schema.yaml") as schema_path:
@@ -267,3 +402,179 @@ def test_copy_dataset_headers_on_write(tmp_path, large_tiled_dataset):
             afile.write_to(tmp_path / "test-header-copies.asdf")
     for ds in large_tiled_dataset.flat:
         assert not isinstance(ds.headers, dict)
+
+
+def _hpc_wcs(crval, cdelt=1):
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["HPLN-TAN", "HPLT-TAN"]
+    wcs.wcs.cunit = ["arcsec", "arcsec"]
+    wcs.wcs.cdelt = [cdelt, cdelt]
+    wcs.wcs.crpix = [1, 1]
+    wcs.wcs.crval = crval
+    wcs.wcs.dateobs = "2023-10-16T18:47:15"
+    return wcs
+
+
+@pytest.fixture
+def overlapping_tiled_dataset():
+    """
+    A 2x2 grid of (40, 50) tiles which overlap by 10 pixels, with the longitude of each pixel as its value.
+    """
+    tiles = []
+    for i in range(2):
+        for j in range(2):
+            wcs = _hpc_wcs([j * 40, i * 30])
+            y, x = np.mgrid[:40, :50]
+            lon = wcs.pixel_to_world(x, y).Tx.to_value(u.arcsec)
+            data = da.from_array(lon, chunks=(20, 25), name=f"tile-{i}-{j}")
+            tiles.append(Dataset(data, wcs=wcs, meta={"inventory": {}, "headers": None}))
+    return TiledDataset(np.array(tiles, dtype=object).reshape((2, 2)), meta={"inventory": {}})
+
+
+def test_regrid(overlapping_tiled_dataset):
+    target = _hpc_wcs([-5, -5], cdelt=0.7)
+    array, footprint = overlapping_tiled_dataset.regrid(target, (120, 150), chunks=(40, 50))
+    assert isinstance(array, da.Array)
+    assert array.shape == footprint.shape == (120, 150)
+    assert array.chunks == ((40,) * 3, (50,) * 3)
+
+    array, footprint = dask.compute(array, footprint)
+    assert set(np.unique(footprint)) == {0, 1, 2, 4}
+    assert np.isnan(array[footprint == 0]).all()
+
+    # Compare the pixels which are not within half a pixel of the edge of any tile
+    y, x = np.mgrid[:120, :150]
+    interior = footprint > 0
+    for tile in overlapping_tiled_dataset.flat:
+        tile_x, tile_y = pixel_to_pixel(target, tile.wcs, x.astype(float), y.astype(float))
+        covered = (tile_x >= -0.5) & (tile_x < 49.5) & (tile_y >= -0.5) & (tile_y < 39.5)
+        inside = (tile_x >= 0) & (tile_x <= 49) & (tile_y >= 0) & (tile_y <= 39)
+        interior &= ~covered | inside
+    expected = target.pixel_to_world(x, y).Tx.to_value(u.arcsec)
+    np.testing.assert_allclose(array[interior], expected[interior], atol=1e-6)
+
+
+class _RecordReads:
+    """
+    An array which records which slices of it are read.
+    """
+    def __init__(self, array, reads):
+        self.array = array
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.ndim = array.ndim
+        self.reads = reads
+
+    def __getitem__(self, item):
+        self.reads.append(item)
+        return self.array[item]
+
+
+def test_regrid_reads_intersecting_tiles(overlapping_tiled_dataset):
+    reads = {}
+    for i, tile in enumerate(overlapping_tiled_dataset.flat):
+        reads[i] = []
+        tile._data = da.from_array(_RecordReads(tile.data.compute(), reads[i]), chunks=(20, 25))
+    target = _hpc_wcs([-5, -5], cdelt=0.7)
+    array, footprint = overlapping_tiled_dataset.regrid(target, (120, 150), chunks=(40, 50))
+
+    def read_for(block):
+        for tile_reads in reads.values():
+            tile_reads.clear()
+        block.compute()
+        return {i: len(tile_reads) for i, tile_reads in reads.items() if tile_reads}
+
+    # Only the chunks of the tiles which overlap a block are read
+    assert read_for(array.blocks[0, 0]) == {0: 4}
+    assert read_for(array.blocks[2, 2]) == {3: 4}
+    assert read_for(array.blocks[1, 1]).keys() == {0, 1, 2, 3}
+    assert read_for(footprint.blocks[0, 2]).keys() == {1}
+
+
+@pytest.mark.parametrize(("combine", "overlap_value"), [
+    ("mean", 1.5), ("sum", 3), ("first", 1), ("last", 2), ("min", 1), ("max", 2),
+])
+def test_regrid_combine(overlapping_tiled_dataset, combine, overlap_value):
+    tds = overlapping_tiled_dataset[0]
+    for i, tile in enumerate(tds.flat):
+        tile._data = da.full(tile.data.shape, i + 1.0)
+    target = _hpc_wcs([0, 0])
+    array, footprint = tds.regrid(target, (40, 90), order=0, combine=combine)
+    array, footprint = dask.compute(array, footprint)
+    np.testing.assert_array_equal(footprint[:, 40:50], 2)
+    np.testing.assert_array_equal(array[:, 40:50], overlap_value)
+    np.testing.assert_array_equal(array[:, :40], 1)
+    np.testing.assert_array_equal(array[:, 50:], 2)
+
+
+def test_regrid_invalid(overlapping_tiled_dataset, large_tiled_dataset):
+    target = _hpc_wcs([0, 0])
+    with pytest.raises(ValueError, match="combine must be one of"):
+        overlapping_tiled_dataset.regrid(target, (10, 10), combine="median")
+    with pytest.raises(ValueError, match="Only tiles with two pixel dimensions can be regridded, not 3"):
+        large_tiled_dataset.regrid(target, (10, 10))
+
+
+def test_polygons_intersect_box():
+    # A square rotated by 45 degrees, with corners at (0, ±1) and (±1, 0)
+    diamond = np.array([[[0, -1], [1, 0], [0, 1], [-1, 0]]], dtype=float)
+    assert _polygons_intersect_box(diamond, [-0.1, -0.1], [0.1, 0.1]).all()
+    assert _polygons_intersect_box(diamond, [0.4, 0.4], [2, 2]).all()
+    # Overlaps the bounding box of the diamond but not the diamond
+    assert not _polygons_intersect_box(diamond, [0.6, 0.6], [2, 2]).any()
+    assert not _polygons_intersect_box(diamond, [2, -2], [3, 2]).any()
+    assert _polygons_intersect_box(np.full((1, 4, 2), np.nan), [0, 0], [1, 1]).all()
+
+
+def test_tiles_intersecting(large_tiled_dataset):
+    tds = large_tiled_dataset
+    for pixel in [(2048, 2048), (100, 100), (4000, 100)]:
+        coord, _ = tds[2, 2].wcs.pixel_to_world(*pixel, 0)
+        expected = np.zeros(tds.shape, dtype=bool)
+        for index in np.ndindex(tds.shape):
+            if not tds.mask[index]:
+                x, y, _ = tds[index].wcs.world_to_pixel(coord, tds[index].wcs.pixel_to_world(0, 0, 0)[1])
+                expected[index] = -0.5 <= x < 4095.5 and -0.5 <= y < 4095.5
+        assert (tds.tiles_intersecting(coord) == expected).all()
+    assert tds.tiles_intersecting(coord)[2, 2]
+
+
+def test_tiles_intersecting_cached(overlapping_tiled_dataset, mocker):
+    footprint = mocker.spy(_mosaic, "tile_footprint")
+    target = overlapping_tiled_dataset[0, 0].wcs.pixel_to_world(45, 5)
+    assert (overlapping_tiled_dataset.tiles_intersecting(target) == [[True, True], [False, False]]).all()
+    assert footprint.call_count == 4
+    overlapping_tiled_dataset.tiles_intersecting(target)
+    assert footprint.call_count == 4
+
+    # Masked tiles never intersect
+    overlapping_tiled_dataset.mask = [[False, True], [False, False]]
+    assert (overlapping_tiled_dataset.tiles_intersecting(target) == [[True, False], [False, False]]).all()
+
+
+def test_crop(large_tiled_dataset):
+    tds = large_tiled_dataset
+    times = Time(tds.inventory["startTime"]), Time(tds.inventory["endTime"])
+    lower, _ = tds._data.data[0, 0].wcs.pixel_to_world(4000, 4000, 0)
+    upper, _ = tds[1, 1].wcs.pixel_to_world(2048, 2048, 0)
+    intersecting = tds._footprints.intersecting([lower, upper]) & ~tds.mask
+
+    cropped = tds.crop([lower, times[0]], [upper, times[1]])
+    assert isinstance(cropped, TiledDataset)
+    rows, cols = np.nonzero(intersecting)
+    grid = (slice(rows.min(), rows.max() + 1), slice(cols.min(), cols.max() + 1))
+    assert (cropped.mask == ~intersecting[grid]).all()
+    for tile, original in zip(cropped.flat, tds[grid].flat):
+        assert tile.data.shape[0] == 3
+        assert all(cropped_size < size for cropped_size, size in zip(tile.data.shape[1:], original.data.shape[1:]))
+    assert len(cropped.combined_headers) == 3 * len(cropped.flat)
+    if not tds.mask.any():
+        assert cropped.tiles_shape[0][0] == (3, 96, 96)
+
+
+def test_crop_invalid(overlapping_tiled_dataset):
+    with pytest.raises(ValueError, match="must contain celestial coordinates"):
+        overlapping_tiled_dataset.crop([None], [None])
+    outside = overlapping_tiled_dataset[0, 0].wcs.pixel_to_world(-100, -100)
+    with pytest.raises(ValueError, match="None of the tiles overlap"):
+        overlapping_tiled_dataset.crop([outside], [outside])
@@ -14,6 +14,8 @@ from typing import Any, Self, Literal
 from textwrap import dedent
 from collections.abc import Iterable, Collection
 
+import dask
+import dask.array as da
 import matplotlib.figure
 import matplotlib.pyplot as plt
 import numpy as np
@@ -21,11 +23,13 @@ from matplotlib.gridspec import GridSpec
 from numpy.typing import NDArray
 
 import astropy
+from astropy.coordinates import SkyCoord
 from astropy.table import Table, vstack
 
 from dkist.io.file_manager import DKISTFileManager
 from dkist.utils.exceptions import DKISTDeprecationWarning, DKISTUserWarning
 
+from ._mosaic import FootprintIndex, regrid_tiles
 from .dataset import Dataset
 from .utils import dataset_info_str
 
@@ -90,25 +94,104 @@ class TiledDatasetSlicer:
     Basic class to provide the slicing
     """
 
-    def __init__(self, data, meta):
+    def __init__(self, data, meta, offsets=None):
         self.data = data
         self.meta = meta
+        # The row of the combined header table each tile starts at, if known
+        self.offsets = offsets
 
     def __getitem__(self, slice_):
         new_data = np.zeros_like(self.data.data)
+        tiles = [(i, ds) for i, ds in enumerate(self.data.data.flat) if not self.data.mask.flat[i]]
+        meta = copy.copy(self.meta)  # shallow copy so we don't share the dict
+
+        header_rows = self._tile_header_rows(slice_)
+        if header_rows is None:
+            for i, ds in tiles:
+                new_data.flat[i] = ds[slice_]
+            # We want the TiledDataset constructor to reconstitute the
+            # header table from all the sliced header tables of the
+            # sub-datasets
+            meta["headers"] = None
+        else:
+            # Select the rows of all the tiles from the combined header table
+            # at once, and give each tile a slice of the result
+            meta["headers"] = self.meta["headers"][np.concatenate([rows for _, rows in header_rows])]
+            offset = 0
+            for (i, ds), (rows, combined_rows) in zip(tiles, header_rows):
+                headers = meta["headers"][offset:offset + len(combined_rows)]
+                new_data.flat[i] = ds._getitem(slice_, (rows, headers))
+                offset += len(combined_rows)
+
+        return TiledDataset(new_data, meta=meta, mask=self.data.mask)
 
-        for i, ds in enumerate(self.data.flat):
-            if self.data.mask.flat[i]:
+    def _tile_header_rows(self, slice_):
+        """
+        The header rows selected by ``slice_`` in each unmasked tile and in the combined header table.
+
+        The rows selected in a tile only depend on the shape of its files, so
+        they are only computed once for all the tiles with the same shape.
+        Returns `None` if the header tables of the tiles are not consecutive
+        rows of the combined header table.
+        """
+        combined = self.meta.get("headers")
+        if combined is None:
+            return None
+        tiles = list(zip(self.data.data.flat, np.ma.getmaskarray(self.data).flat))
+        if self.offsets is not None:
+            # The grid knows where the rows of each tile are
+            offsets = self.offsets.ravel()
+            if not all(masked or (ds.files is not None and offset >= 0)
+                       for (ds, masked), offset in zip(tiles, offsets)):
+                return None
+            candidate = tiles
+            sizes = [0 if masked else len(ds.headers) for ds, masked in tiles]
+        else:
+            # The combined table is made of either all the tiles, or only the
+            # tiles which were unmasked when it was made
+            for candidate in (tiles, [(ds, False) for ds, masked in tiles if not masked]):
+                if all(isinstance(ds, Dataset) and ds.files is not None for ds, _ in candidate):
+                    sizes = [len(ds.headers) for ds, _ in candidate]
+                    offsets = np.cumsum([0, *sizes[:-1]])
+                    if sum(sizes) == len(combined) and self._headers_match(combined, candidate, offsets, sizes):
+                        break
+            else:
+                return None
+
+        plans = {}
+        header_rows = []
+        for (ds, masked), offset, size in zip(candidate, offsets, sizes):
+            if masked:
                 continue
-            new_data.flat[i] = ds[slice_]
+            key = (tuple(ds.files.shape), ds.files.fileuri_array.shape, size)
+            if key not in plans:
+                rows = ds._slice_header_rows(slice_)
+                plans[key] = (rows, np.arange(size) if rows is None else np.arange(size)[rows])
+            rows, tile_rows = plans[key]
+            header_rows.append((rows, offset + tile_rows))
+        return header_rows or None
 
-        # We want the TiledDataset constructor to reconstitute the
-        # header table from all the sliced header tables of the
-        # sub-datasets
-        meta = copy.copy(self.meta)  # shallow copy so we don't share the dict
-        meta["headers"] = None
+    @staticmethod
+    def _headers_match(combined, tiles, offsets, sizes):
+        """
+        Whether the header table of each tile is the rows of the combined table starting at its offset.
 
-        return TiledDataset(new_data, meta=meta, mask=self.data.mask)
+        This compares the filenames of the first and last row of each tile,
+        and is `False` if the tables don't have a filename column.
+        """
+        if "FILENAME" not in combined.colnames:
+            return False
+        filenames = combined["FILENAME"]
+        for (ds, _), offset, size in zip(tiles, offsets, sizes):
+            if size == 0:
+                continue
+            if "FILENAME" not in ds.headers.colnames:
+                return False
+            tile_filenames = ds.headers["FILENAME"]
+            if (filenames[offset] != tile_filenames[0]
+                    or filenames[offset + size - 1] != tile_filenames[-1]):
+                return False
+        return True
 
 
 class TiledDataset(Collection):
@@ -127,9 +210,8 @@ class TiledDataset(Collection):
 
     .. note::
 
-        This class does not currently implement helper functions to regrid the
-        data. This functionality will be added in the future, see the reproject
-        and montage packages for possible ways to achieve this.
+        The `~.TiledDataset.regrid` method regrids 2D tiles onto one pixel
+        grid. For more control over the regridding see the reproject package.
 
     Parameters
     ----------
@@ -162,22 +244,25 @@ class TiledDataset(Collection):
         meta = meta or {}
         inventory = meta.get("inventory", inventory or {})
 
-        # If headers are saved as one Table for the whole TiledDataset, use those first
-        # Otherwise stack the headers saved for component Datasets
+        # If headers are saved as one Table for the whole TiledDataset, use those.
+        # Otherwise the headers of the component Datasets are stacked when
+        # they are first used, in a copy of the meta so a table built for
+        # this grid of tiles is never shared with other TiledDatasets.
+        # Grids made by indexing another grid use the table of that grid.
         if meta.get("headers", None) is None:
-            ds_headers = [Table(ds.headers) for ds in self._data.compressed()]
-            sizes = [len(h) for h in ds_headers]
-            offsets = np.cumsum([0, *sizes[:-1]])
-            meta["headers"] = vstack(ds_headers)
-
-            # Then distribute headers (back) out to component Datasets as slices of the main Table
-            for i, ds in enumerate(self._data.compressed()):
-                ds.meta["headers"] = meta["headers"][offsets[i]:offsets[i] + sizes[i]]
+            meta = copy.copy(meta)
+            meta["headers"] = None
 
         self._validate_component_datasets(self._data, inventory)
         self._meta = meta
         self._meta["inventory"] = inventory
         self._files = DKISTFileManager(TiledDatasetFileManager(parent=self), parent_ndcube=self)
+        # The grid this one was taken from, and the flat indices of the tiles in it
+        self._header_parent = None
+        # The stacked header table, and the row each tile starts at in it
+        self._header_offsets = None
+        # The footprints of the tiles on the sky, built when first needed
+        self._footprint_index = None
 
     def __contains__(self, x):
         return any(ele is x for ele in self._data.flat)
@@ -193,7 +278,18 @@ class TiledDataset(Collection):
         if isinstance(new_data, (Dataset, np.ma.core.MaskedConstant)):
             return new_data
 
-        return type(self)(new_data.data, mask=new_data.mask, meta=self.meta)
+        positions = np.arange(self._data.size).reshape(self.shape)[aslice]
+        return self._subgrid(new_data.data, new_data.mask, positions)
+
+    def _subgrid(self, datasets, mask, positions):
+        """
+        A grid of some of the tiles of this grid, which uses the header table of this grid.
+
+        ``positions`` are the indices of the tiles in the flattened grid.
+        """
+        subgrid = type(self)(datasets, mask=mask, meta=self._meta)
+        subgrid._header_parent = (self, positions)
+        return subgrid
 
     @staticmethod
     def _validate_component_datasets(datasets, inventory):
@@ -216,9 +312,57 @@ class TiledDataset(Collection):
         """
         A single `astropy.table.Table` containing all the FITS headers for all
         files in this dataset.
+
+        If the table was not provided when the `.TiledDataset` was created, it
+        is built from the headers of the tiles the first time it is used. A
+        grid made by indexing another grid always has the table of that grid.
         """
+        if self._meta["headers"] is None:
+            if self._header_parent is not None:
+                self._meta["headers"] = self._header_parent[0].combined_headers
+            else:
+                self._meta["headers"] = self._stack_tile_headers()
         return self._meta["headers"]
 
+    def _stack_tile_headers(self) -> Table:
+        """
+        Stack the header tables of the tiles, and replace them with slices of the stacked table.
+
+        This is only done by the grid the tiles were given to, grids made by
+        indexing it use its table and never replace the headers of the tiles.
+        """
+        datasets = self._data.compressed()
+        sizes = [len(ds.headers) for ds in datasets]
+        offsets = np.cumsum([0, *sizes[:-1]])
+        headers = vstack([Table(ds.headers) for ds in datasets])
+
+        # Then distribute headers (back) out to component Datasets as slices of the main Table
+        for ds, offset, size in zip(datasets, offsets, sizes):
+            ds.meta["headers"] = headers[offset:offset + size]
+
+        tile_offsets = np.full(self.shape, -1)
+        tile_offsets[~np.ma.getmaskarray(self._data)] = offsets
+        self._header_offsets = (headers, tile_offsets)
+        return headers
+
+    def _tile_header_offsets(self) -> NDArray[np.int_] | None:
+        """
+        The row of the combined header table the headers of each tile start at.
+
+        Returns `None` if the table was not stacked from the tiles by this
+        grid, or the grid it was taken from.
+        """
+        if self._header_parent is not None:
+            parent, positions = self._header_parent
+            offsets = parent._tile_header_offsets()
+            if offsets is None or parent._meta["headers"] is not self._meta["headers"]:
+                return None
+            return offsets.ravel()[positions]
+        if self._header_offsets is None:
+            return None
+        headers, offsets = self._header_offsets
+        return offsets if self._meta["headers"] is headers else None
+
     @property
     def mask(self) -> NDArray[np.bool_]:
         """
@@ -237,13 +381,16 @@ class TiledDataset(Collection):
         """
         Represent this `.TiledDataset` as a 1D array.
         """
-        return type(self)(self._data.compressed(), meta=self.meta)
+        positions = np.flatnonzero(~np.ma.getmaskarray(self._data))
+        return self._subgrid(self._data.compressed(), None, positions)
 
     @property
     def meta(self) -> dict[Any, Any]:
         """
         A dictionary of extra metadata about the dataset.
         """
+        # Make sure the headers have been stacked
+        self._meta["headers"] = self.combined_headers
         return self._meta
 
     @property
@@ -320,7 +467,7 @@ class TiledDataset(Collection):
         if swap_tile_limits not in ["x", "y", "xy", None]:
             raise RuntimeError("swap_tile_limits must be one of ['x', 'y', 'xy', None]")
 
-        if len(self.meta.get("history", {}).get("entries", [])) == 0:
+        if len(self._meta.get("history", {}).get("entries", [])) == 0:
             warnings.warn(
                 "The metadata ASDF file that produced this dataset is out of date and "
                 "will result in incorrect plots. Please re-download the metadata ASDF file.",
@@ -342,6 +489,12 @@ class TiledDataset(Collection):
                 f"Applying slice '{slice_index}' to this dataset resulted in a {nd_sliced} "
                 "dimensional dataset, you should pass a slice which results in a 2D dataset for each tile."
             )
+        # Compute the data of all the tiles together, so that the files are
+        # read in parallel and each tile is plotted from memory
+        tiles = [tile for tile in sliced_dataset._data.compressed() if isinstance(tile.data, da.Array)]
+        for tile, data in zip(tiles, dask.compute(*(tile.data for tile in tiles))):
+            tile._data = data
+
         dataset_ncols, dataset_nrows = sliced_dataset.shape
         gridspec = GridSpec(nrows=dataset_nrows, ncols=dataset_ncols, figure=figure)
         for col in range(dataset_ncols):
@@ -439,9 +592,136 @@ class TiledDataset(Collection):
              helioprojective latitude |        x        |        x
         """
 
-        return TiledDatasetSlicer(self._data, self.meta)
+        return TiledDatasetSlicer(self._data, self._meta, self._tile_header_offsets())
+
+    @property
+    def _footprints(self) -> FootprintIndex:
+        if self._footprint_index is None:
+            self._footprint_index = FootprintIndex(self._data.data)
+        return self._footprint_index
+
+    def tiles_intersecting(self, region: SkyCoord) -> NDArray[np.bool_]:
+        """
+        Find the tiles which overlap a region of the sky.
+
+        The footprints of the tiles are computed from their WCS the first
+        time this is called, after that finding the tiles does not evaluate
+        the WCS of any tile. If the pointing of a tile changes during the
+        observation (e.g. along the time axis) the tile overlaps the region
+        if any of its footprints do.
+
+        Parameters
+        ----------
+        region
+            The coordinates of the corners (or any other points) of the
+            region, the tiles are compared to the bounding box of these
+            points in the celestial frame of the first tile.
+
+        Returns
+        -------
+        `numpy.ndarray`
+            A boolean array with the shape of the grid of tiles, `True`
+            where a tile is not masked and overlaps the region.
+        """
+        return self._footprints.intersecting([region]) & ~np.ma.getmaskarray(self._data)
+
+    def crop(self, *points: Iterable[Any], keepdims: bool = False) -> Self:
+        """
+        Crop the tiles to the smallest region enclosing the given world coordinates.
+
+        Only the tiles which overlap the bounding box of the celestial
+        coordinates in ``points`` are cropped, see
+        `~.TiledDataset.tiles_intersecting`. The returned `.TiledDataset`
+        is the smallest sub-grid containing these tiles, with all other
+        tiles masked.
+
+        Parameters
+        ----------
+        points
+            The world coordinates of the corners of the region to crop to,
+            in the form accepted by `ndcube.NDCube.crop`. Each tile is
+            cropped with these points.
+        keepdims
+            If `False`, axes of length one in the cropped tiles are removed.
+
+        Returns
+        -------
+        `.TiledDataset`
+            The cropped tiles.
+        """
+        region = [coord for point in points for coord in point if isinstance(coord, SkyCoord)]
+        if not region:
+            raise ValueError("The points to crop to must contain celestial coordinates.")
+        intersecting = self._footprints.intersecting(region) & ~np.ma.getmaskarray(self._data)
+        if not intersecting.any():
+            raise ValueError("None of the tiles overlap the region to crop to.")
+
+        # The smallest sub-grid which contains all the overlapping tiles
+        grid = tuple(slice(index.min(), index.max() + 1) for index in np.nonzero(intersecting))
+        intersecting = intersecting[grid]
+        new_data = np.zeros_like(self._data.data[grid])
+        for index in zip(*np.nonzero(intersecting)):
+            new_data[index] = self._data.data[grid][index].crop(*points, keepdims=keepdims)
+
+        meta = copy.copy(self._meta)
+        meta["headers"] = None
+        return type(self)(new_data, meta=meta, mask=~intersecting)
+
+    def regrid(
+        self,
+        target_wcs,
+        shape_out: tuple[int, int],
+        *,
+        chunks: str | int | tuple = "auto",
+        order: int = 1,
+        combine: Literal["mean", "sum", "first", "last", "min", "max"] = "mean",
+    ) -> tuple[da.Array, da.Array]:
+        """
+        Regrid the tiles onto the pixel grid of ``target_wcs``.
 
-    # TODO: def regrid()
+        The result is a lazy dask array with the given ``chunks``. The tiles,
+        and the region of each tile, which intersect each chunk of the output
+        are found when the array is built, so computing a chunk only reads
+        the data it needs and the memory used scales with the size of the
+        chunks rather than the size of the tiles.
+
+        Only tiles with two pixel dimensions can be regridded, use
+        `~.TiledDataset.slice_tiles` to select one image from each tile
+        (e.g. ``ds.slice_tiles[0].regrid(...)``).
+
+        Parameters
+        ----------
+        target_wcs
+            A 2D WCS object for the output pixel grid.
+        shape_out
+            The shape of the output array.
+        chunks
+            The chunks of the output array, in any form accepted by
+            `dask.array.core.normalize_chunks`.
+        order
+            The order of the spline interpolation, see
+            `scipy.ndimage.map_coordinates`.
+        combine
+            How to combine the values of pixels where tiles overlap. One of
+            ``"mean"``, ``"sum"``, ``"first"``, ``"last"``, ``"min"`` or
+            ``"max"``, where "first" and "last" are in the order of
+            `~.TiledDataset.flat`.
+
+        Returns
+        -------
+        array
+            The regridded data, NaN where no tile overlaps the output.
+        footprint
+            The number of tiles which contributed to each output pixel.
+        """
+        tiles = list(self.flat)
+        for tile in tiles:
+            if tile.data.ndim != 2:
+                raise ValueError(
+                    f"Only tiles with two pixel dimensions can be regridded, not {tile.data.ndim}. "
+                    "Use slice_tiles to select one image from each tile."
+                )
+        return regrid_tiles(tiles, target_wcs, shape_out, chunks=chunks, order=order, combine=combine)
 
     def __repr__(self):
         """
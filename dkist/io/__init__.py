@@ -1,7 +1,49 @@
 """
 Functionality for loading many DKIST FITS files into a single Dask array.
 """
+import dkist.config as _config
+
+__all__ = ["DKISTFileManager", "conf"]
+
+
+class Conf(_config.ConfigNamespace):
+    """
+    Configuration Parameters for the `dkist.io` Package.
+    """
+    rootname = "dkist"
+
+    max_open_files = _config.ConfigItem(128,
+                                        "The maximum number of FITS files each dataset keeps open "
+                                        "between reads. Set to 0 to close every file after it is read.")
+    fits_loader = _config.ConfigItem(["astropy", "direct", "memmap"],
+                                     "The loader used to read FITS files when loading a dataset. 'astropy' "
+                                     "reads all files with astropy.io.fits, 'direct' reads uncompressed data "
+                                     "directly from the file without parsing the headers and 'memmap' reads "
+                                     "uncompressed data through a read-only memory map of the file.")
+    target_chunk_size = _config.ConfigItem("0",
+                                           "The target size of each chunk of the Dask array, e.g. '128MiB'. "
+                                           "Adjacent files are grouped into one chunk until it reaches this size. "
+                                           "Set to 0 to load every file as a separate chunk.")
+    file_chunk_shape = _config.ConfigItem([],
+                                          "The shape of the chunks each file is split into, e.g. 512, 512. "
+                                          "Each chunk only reads its own region of the file. Leave empty to "
+                                          "read every file as a whole.",
+                                          cfgtype="int_list")
+    lazy_headers = _config.ConfigItem(False,
+                                      "Read the FITS header table of a dataset from the ASDF file when it is first "
+                                      "used rather than when the dataset is loaded. Only the columns which are "
+                                      "used are read, but the ASDF file is kept open until they have all been read.")
+    header_cache = _config.ConfigItem(False,
+                                      "Cache the header columns read with Dataset.header_columns in the user "
+                                      "cache directory, so that they are not read from the ASDF file again.")
+    header_cache_size = _config.ConfigItem("512MiB",
+                                           "The maximum size of the header column cache, e.g. '512MiB'. The least "
+                                           "recently used columns are removed when it is larger than this. Set to "
+                                           "0 for no limit.")
+
+
+conf = Conf()
+
+# Put imports after conf so that conf is initialized before import
 from .file_manager import DKISTFileManager
 from .utils import filemanager_info_str, save_dataset
-
-__all__ = ["DKISTFileManager"]
@@ -27,7 +27,7 @@ class DatasetConverter(Converter):
         tag_version = tuple(map(int, tag.split("-")[1].split(".")))
         from dkist.dataset import Dataset
 
-        data = node["data"]._striped_external_array._generate_array()
+        data = node["data"].dask_array
         if subslice := node["data"]._subslice:
             data = data[*subslice]
         wcs = node["wcs"]
@@ -15,7 +15,8 @@ class FileManagerConverter(Converter):
     def from_yaml_tree(self, node, tag, ctx):
         import numpy as np
 
-        from dkist.io.dask.loaders import AstropyFITSLoader
+        from dkist.io import conf
+        from dkist.io.dask.loaders import FITS_LOADERS
         from dkist.io.dask.striped_array import FileManager
 
         url = urlparse(ctx.url or ".")
@@ -39,7 +40,7 @@ class FileManagerConverter(Converter):
             node["datatype"],
             node["shape"],
             chunksize=node.get("chunksize", None),
-            loader=AstropyFITSLoader,
+            loader=FITS_LOADERS[conf.fits_loader],
             basepath=base_path,
             subslice=subslice,
         )
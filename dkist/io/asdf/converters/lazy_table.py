@@ -0,0 +1,32 @@
+from asdf.extension import Converter
+
+
+class LazyTableConverter(Converter):
+    """
+    Write `~dkist.io.asdf.lazy_table.LazyTable` objects as the table they stand in for.
+
+    Tables are only read as `~dkist.io.asdf.lazy_table.LazyTable` objects by
+    a converter given the astropy table tags, which is done by the extension
+    returned by `~dkist.io.asdf.lazy_table.get_lazy_table_extension`.
+    """
+    tags = []
+    types = ["dkist.io.asdf.lazy_table.LazyTable"]
+
+    def __init__(self, tags=()):
+        self.tags = list(tags)
+        # All the tables read by this converter, so the open file can be attached to them
+        self.sources = []
+
+    def select_tag(self, obj, tags, ctx):
+        # Defer to the astropy table converter
+        return None
+
+    def to_yaml_tree(self, obj, tag, ctx):
+        return obj.to_table()
+
+    def from_yaml_tree(self, node, tag, ctx):
+        from dkist.io.asdf.lazy_table import LazyTable, _TableSource
+
+        source = _TableSource(node["columns"], node["colnames"], node.get("meta"), node.get("qtable", False), tag)
+        self.sources.append(source)
+        return LazyTable(source)
@@ -7,8 +7,8 @@ from asdf.extension import ManifestExtension
 from asdf.resource import DirectoryResourceMapping
 
 from dkist.io.asdf.converters import (AsymmetricMappingConverter, CoupledCompoundConverter,
-                                      DatasetConverter, FileManagerConverter,
-                                      InversionConverter, ProfilesConverter, RavelConverter,
+                                      DatasetConverter, FileManagerConverter, InversionConverter,
+                                      LazyTableConverter, ProfilesConverter, RavelConverter,
                                       TiledDatasetConverter, VaryingCelestialConverter)
 
 
@@ -37,7 +37,8 @@ def get_extensions():
     """
     Get the list of extensions.
     """
-    dkist_converters = [FileManagerConverter(), DatasetConverter(), TiledDatasetConverter(), InversionConverter(), ProfilesConverter()]
+    dkist_converters = [FileManagerConverter(), DatasetConverter(), TiledDatasetConverter(), InversionConverter(),
+                        ProfilesConverter(), LazyTableConverter()]
     wcs_converters = [VaryingCelestialConverter(), CoupledCompoundConverter(), RavelConverter(), AsymmetricMappingConverter()]
     return [
         ManifestExtension.from_uri("asdf://dkist.nso.edu/manifests/dkist-1.7.0", converters=dkist_converters),
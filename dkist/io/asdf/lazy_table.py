@@ -0,0 +1,305 @@
+"""
+Lazy loading of tables from ASDF files.
+
+The header tables stored in DKIST ASDF files can have thousands of rows and
+hundreds of columns. This module provides `LazyTable`, which stands in for
+an `astropy.table.Table` and only reads the columns which are used from the
+ASDF file. Slicing the rows of a `LazyTable` returns another `LazyTable`
+without reading any data.
+"""
+import copy
+import weakref
+import threading
+
+import numpy as np
+
+import asdf
+from asdf.extension import Converter, Extension
+from asdf.tags.core.ndarray import NDArrayType
+from asdf.util import uri_match
+
+from dkist.io.asdf.converters import LazyTableConverter
+
+__all__ = ["LazyTable", "get_lazy_table_extension"]
+
+TABLE_TAG_PATTERN = "tag:astropy.org:astropy/table/table-*"
+COLUMN_TAG_PATTERN = "tag:stsci.edu:asdf/core/column-*"
+
+
+class _TableSource:
+    """
+    The columns of a table in an open ASDF file, loaded when they are first needed.
+
+    One source is shared by all the `LazyTable` objects which are views into
+    the same table.
+    """
+
+    def __init__(self, columns, colnames, meta, qtable, tag):
+        self.columns = dict(zip(colnames, columns))
+        self.colnames = list(colnames)
+        self.meta = meta or {}
+        self.qtable = qtable
+        self.tag = tag
+        self.asdf_file = None
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        if not self.colnames:
+            return 0
+        column = self.columns[self.colnames[0]]
+        if isinstance(column, _LazyColumn):
+            return column.shape[0]
+        return len(column)
+
+    def column(self, name):
+        """
+        The full column ``name``, read from the file if it hasn't been already.
+        """
+        with self._lock:
+            if name not in self._loaded:
+                column = self.columns[name]
+                self._loaded[name] = column.load() if isinstance(column, _LazyColumn) else column
+                if len(self._loaded) == len(self.colnames) and self.asdf_file is not None:
+                    self.asdf_file.release(self)
+                    self.asdf_file = None
+            return self._loaded[name]
+
+
+class _SharedFile:
+    """
+    An open ASDF file which is closed once all the tables read from it are loaded.
+    """
+
+    def __init__(self, asdf_file, sources):
+        self.asdf_file = asdf_file
+        self._remaining = set(map(id, sources))
+        self._lock = threading.Lock()
+        for source in sources:
+            source.asdf_file = self
+        # Close the file if the tables using it are garbage collected. Unlike
+        # __del__ this runs before the file objects are finalized when they are
+        # collected as part of a reference cycle.
+        self._finalizer = weakref.finalize(self, asdf_file.close)
+        if not self._remaining:
+            self._finalizer()
+
+    def release(self, source):
+        with self._lock:
+            self._remaining.discard(id(source))
+            if not self._remaining:
+                self._finalizer()
+
+
+class _LazyColumn:
+    """
+    The node of a column with its data still in the ASDF file.
+    """
+
+    def __init__(self, node, tag):
+        self.node = node
+        self.tag = tag
+
+    @property
+    def shape(self):
+        data = self.node["data"]
+        return data.shape if isinstance(data, NDArrayType) else np.shape(data)
+
+    def load(self):
+        from asdf_astropy.converters import ColumnConverter
+
+        return ColumnConverter().from_yaml_tree(self.node, self.tag, None)
+
+
+class LazyTable:
+    """
+    A stand-in for an `astropy.table.Table` which reads its columns on first access.
+
+    Selecting columns by name only reads those columns. Selecting rows with a
+    slice or index array returns a new `LazyTable` without reading anything.
+    Any other use of the table (for example printing it, or adding a column)
+    reads the whole table and from then on this object behaves the same as
+    the `~astropy.table.Table` it has loaded.
+
+    Use `LazyTable.to_table` to get the `~astropy.table.Table` directly.
+    """
+
+    def __init__(self, source, rows=None):
+        self._source = source
+        self._rows = rows
+        self._table = None
+
+    @property
+    def colnames(self):
+        if self._table is not None:
+            return self._table.colnames
+        return list(self._source.colnames)
+
+    @property
+    def meta(self):
+        if self._table is not None:
+            return self._table.meta
+        return self._source.meta
+
+    @property
+    def loaded(self):
+        """
+        `True` if the whole table has been read.
+        """
+        return self._table is not None
+
+    def __len__(self):
+        if self._table is not None:
+            return len(self._table)
+        if self._rows is None:
+            return len(self._source)
+        return len(self._rows)
+
+    def _select_rows(self, column):
+        return column if self._rows is None else column[self._rows]
+
+    def _read_table(self, names):
+        from asdf_astropy.converters import AstropyTableConverter
+
+        node = {
+            "colnames": names,
+            "columns": [self._select_rows(self._source.column(name)) for name in names],
+            "meta": self._source.meta,
+            "qtable": self._source.qtable,
+        }
+        return AstropyTableConverter().from_yaml_tree(node, self._source.tag, None)
+
+    def to_table(self):
+        """
+        Read all the columns and return the `~astropy.table.Table`.
+        """
+        if self._table is None:
+            self._table = self._read_table(self._source.colnames)
+        return self._table
+
+    def __getitem__(self, item):
+        if self._table is not None:
+            return self._table[item]
+
+        if isinstance(item, str):
+            return self._select_rows(self._source.column(item))
+        if isinstance(item, (list, tuple)) and item and all(isinstance(i, str) for i in item):
+            return self._read_table(list(item))
+        if isinstance(item, (int, np.integer)):
+            return self.to_table()[item]
+
+        rows = np.arange(len(self._source)) if self._rows is None else self._rows
+        return type(self)(self._source, rows[item])
+
+    def __setitem__(self, item, value):
+        self.to_table()[item] = value
+
+    def copy(self, copy_data=True):
+        if self._table is not None:
+            return self._table.copy(copy_data=copy_data)
+        # The columns in the source are never modified, so they can be shared
+        return type(self)(self._source, self._rows)
+
+    def __copy__(self):
+        return self.copy(copy_data=False)
+
+    def __deepcopy__(self, memo):
+        if self._table is not None:
+            return copy.deepcopy(self._table, memo)
+        return self.copy()
+
+    def __reduce__(self):
+        # Pickle the table this object stands in for, as the ASDF file can't be pickled
+        return _loaded_table, (self.to_table(),)
+
+    def __getattr__(self, attr):
+        # Anything we don't handle lazily needs the whole table
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.to_table(), attr)
+
+    def __iter__(self):
+        return iter(self.to_table())
+
+    def __eq__(self, other):
+        return self.to_table() == other
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_table().__array__(dtype)
+
+    def __astropy_table__(self, cls, copy, **kwargs):
+        return cls(self.to_table(), copy=copy, **kwargs)
+
+    def __repr__(self):
+        return repr(self.to_table())
+
+    def __str__(self):
+        return str(self.to_table())
+
+    def _repr_html_(self):
+        return self.to_table()._repr_html_()
+
+
+def _loaded_table(table):
+    return table
+
+
+class _LazyColumnConverter(Converter):
+    tags = [COLUMN_TAG_PATTERN]
+    types = ["dkist.io.asdf.lazy_table._LazyColumn"]
+
+    def select_tag(self, obj, tags, ctx):
+        # Write the column this stands in for with the astropy column converter
+        return None
+
+    def to_yaml_tree(self, obj, tag, ctx):
+        return obj.load()
+
+    def from_yaml_tree(self, node, tag, ctx):
+        return _LazyColumn(node, tag)
+
+
+class _LazyTableExtension(Extension):
+    extension_uri = "asdf://dkist.nso.edu/dkist/extensions/lazy-table-1.0.0"
+
+    def __init__(self):
+        self._table_converter = LazyTableConverter([TABLE_TAG_PATTERN])
+        self._converters = [_LazyColumnConverter(), self._table_converter]
+        self._tags = sorted({
+            tag.tag_uri
+            for extension in asdf.get_config().extensions
+            for tag in extension.tags
+            if uri_match(TABLE_TAG_PATTERN, tag.tag_uri) or uri_match(COLUMN_TAG_PATTERN, tag.tag_uri)
+        })
+
+    @property
+    def converters(self):
+        return self._converters
+
+    @property
+    def tags(self):
+        return self._tags
+
+    def attach(self, asdf_file):
+        """
+        Give the tables read with this extension ownership of the open ``asdf_file``.
+
+        The file is closed once every table has read all of its columns.
+        """
+        _SharedFile(asdf_file, self._table_converter.sources)
+        self._table_converter.sources = []
+        # The tables now keep the file open, so the file must not keep the
+        # objects read from it alive in turn.
+        asdf_file.tree = {}
+
+
+def get_lazy_table_extension():
+    """
+    An asdf extension which reads tables as `LazyTable` objects.
+
+    Open the ASDF file with ``lazy_load=True`` and this extension, and then
+    call ``extension.attach(asdf_file)`` instead of closing the file, so that
+    the tables can read their columns later. A new extension must be used for
+    every file.
+    """
+    return _LazyTableExtension()
@@ -0,0 +1,84 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+import astropy.table
+
+from dkist import load_dataset, save_dataset
+from dkist.io import conf
+from dkist.io.asdf.lazy_table import LazyTable
+
+
+@pytest.fixture
+def lazy_visp(large_visp_dataset_file):
+    with conf.set_temp("lazy_headers", True):
+        return load_dataset(large_visp_dataset_file)
+
+
+def test_lazy_headers(lazy_visp, large_visp_dataset):
+    headers = lazy_visp.headers
+    assert isinstance(headers, LazyTable)
+    assert not headers.loaded
+    assert headers.colnames == large_visp_dataset.headers.colnames
+    assert len(headers) == len(large_visp_dataset.headers)
+
+
+def test_lazy_column(lazy_visp, large_visp_dataset):
+    headers = lazy_visp.headers
+    np.testing.assert_array_equal(headers["DINDEX3"], large_visp_dataset.headers["DINDEX3"])
+    assert list(headers._source._loaded) == ["DINDEX3"]
+    assert not headers.loaded
+
+    subtable = headers[["DINDEX3", "DINDEX4"]]
+    assert isinstance(subtable, astropy.table.Table)
+    assert subtable.colnames == ["DINDEX3", "DINDEX4"]
+    assert not headers.loaded
+
+
+def test_lazy_rows(lazy_visp, large_visp_dataset):
+    rows = lazy_visp.headers[2:10:2]
+    assert isinstance(rows, LazyTable)
+    assert not rows.loaded
+    assert len(rows) == 4
+    np.testing.assert_array_equal(rows["DINDEX3"], large_visp_dataset.headers[2:10:2]["DINDEX3"])
+
+    sliced = lazy_visp[0, 0]
+    assert isinstance(sliced.headers, LazyTable)
+    assert not sliced.headers.loaded
+    assert len(sliced.headers) == len(large_visp_dataset[0, 0].headers)
+
+
+def test_lazy_table_equal(lazy_visp, large_visp_dataset):
+    assert all(lazy_visp.headers == large_visp_dataset.headers)
+    assert lazy_visp.headers.loaded
+    # Once loaded everything is passed to the table
+    assert isinstance(lazy_visp.headers.columns, astropy.table.TableColumns)
+    assert lazy_visp.headers[0]["DINDEX3"] == large_visp_dataset.headers[0]["DINDEX3"]
+
+
+def test_file_closed(lazy_visp):
+    shared_file = lazy_visp.headers._source.asdf_file
+    assert shared_file is not None
+    for name in lazy_visp.headers.colnames:
+        lazy_visp.headers[name]
+    assert lazy_visp.headers._source.asdf_file is None
+    assert shared_file.asdf_file._closed
+
+
+def test_lazy_table_copy(lazy_visp, large_visp_dataset):
+    copied = copy.deepcopy(lazy_visp.headers)
+    assert isinstance(copied, LazyTable)
+    assert not copied.loaded
+
+    unpickled = pickle.loads(pickle.dumps(lazy_visp.headers))
+    assert isinstance(unpickled, astropy.table.Table)
+    assert all(unpickled == large_visp_dataset.headers)
+
+
+def test_save_lazy(lazy_visp, large_visp_dataset, tmp_path):
+    save_dataset(lazy_visp, tmp_path / "lazy.asdf")
+    reloaded = load_dataset(tmp_path / "lazy.asdf")
+    assert isinstance(reloaded.headers, astropy.table.Table)
+    assert all(reloaded.headers == large_visp_dataset.headers)
@@ -1,3 +1,4 @@
 from .loaders import AstropyFITSLoader, BaseFITSLoader
+from .pool import FileHandlePool
 from .striped_array import FileManager, StripedExternalArray
 from .utils import stack_loader_array
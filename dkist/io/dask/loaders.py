@@ -4,6 +4,10 @@ minimise (virtual) memory usage and the number of open files.
 """
 
 import abc
+import copy
+import math
+import mmap
+import uuid
 from pathlib import Path
 
 import numpy as np
@@ -14,7 +18,7 @@ from sunpy.util.decorators import add_common_docstring
 
 from dkist import log
 
-__all__ = ["AstropyFITSLoader", "BaseFITSLoader"]
+__all__ = ["AstropyFITSLoader", "BaseFITSLoader", "DirectFITSLoader", "LoaderFactory", "MemmapFITSLoader"]
 
 
 common_parameters = """
@@ -29,9 +33,11 @@ dtype: `numpy.dtype`
     The dtype of the resulting array
 target: `int`
     The HDU number to load the array from.
-array_container: `BaseStripedExternalArray`
-    The parent object of this class, which builds the array from a sequence
-    of these loaders.
+basepath: `pathlib.Path`, optional
+    The directory relative file uris are resolved against.
+file_pool: `dkist.io.dask.pool.FileHandlePool`, optional
+    A pool of open files shared with the other loaders for the same array. If
+    not specified the file is opened and closed on every access.
 """
 
 
@@ -45,14 +51,15 @@ class BaseFITSLoader(metaclass=abc.ABCMeta):
     time.
     """
 
-    def __init__(self, fileuri, shape, dtype, target, basepath):
+    def __init__(self, fileuri, shape, dtype, target, basepath, file_pool=None):
         self.fileuri = fileuri
         self.shape = shape
         self.dtype = dtype
         self.target = target
         self.basepath = basepath
+        self.file_pool = file_pool
         self.ndim = len(self.shape)
-        self.size = np.prod(self.shape)
+        self.size = math.prod(self.shape)
 
     def __repr__(self):
         return self.__str__()
@@ -90,13 +97,370 @@ class AstropyFITSLoader(BaseFITSLoader):
             log.debug("File %s does not exist.", self.absolute_uri)
             # Use np.broadcast_to to generate an array of the correct size, but
             # which only uses memory for one value.
-            return np.broadcast_to((np.nan,), self.shape) * np.nan
+            return np.broadcast_to((np.nan,), self.shape)[slc] * np.nan
 
-        with fits.open(self.absolute_uri,
-                       memmap=False,  # memmap is redundant with dask and delayed loading
-                       do_not_scale_image_data=True,  # don't scale as we shouldn't need to
-                       mode="denywrite") as hdul:
-            log.debug("Accessing slice %s from file %s", slc, self.absolute_uri)
+        if self.file_pool is None:
+            with self._open() as hdul:
+                return self._read_section(hdul, slc)
 
-            hdu = hdul[self.target]
-            return hdu.section[slc]
+        with self.file_pool.open((str(self.absolute_uri), self.target), self._open) as hdul:
+            return self._read_section(hdul, slc)
+
+    def _open(self):
+        return fits.open(self.absolute_uri,
+                         memmap=False,  # memmap is redundant with dask and delayed loading
+                         do_not_scale_image_data=True,  # don't scale as we shouldn't need to
+                         mode="denywrite")
+
+    def _read_section(self, hdul, slc):
+        log.debug("Accessing slice %s from file %s", slc, self.absolute_uri)
+
+        hdu = hdul[self.target]
+        return hdu.section[slc]
+
+
+FITS_BLOCK_SIZE = 2880
+FITS_CARD_SIZE = 80
+BITPIX_DTYPES = {
+    8: np.dtype("u1"),
+    16: np.dtype(">i2"),
+    32: np.dtype(">i4"),
+    64: np.dtype(">i8"),
+    -32: np.dtype(">f4"),
+    -64: np.dtype(">f8"),
+}
+
+
+def _parse_card_value(value):
+    value = value.strip()
+    if value.startswith("'"):
+        return value[1:].split("'", 1)[0].strip()
+    value = value.split("/", 1)[0].strip()
+    if value in ("T", "F"):
+        return value == "T"
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _read_fits_header(fileobj):
+    """
+    Read the header starting at the current position of ``fileobj``.
+
+    Only the keywords needed to locate and interpret the data are parsed.
+
+    Returns
+    -------
+    header : `dict`
+        The parsed keywords.
+    data_offset : `int`
+        The byte offset of the start of the data following this header.
+    """
+    wanted = ("BITPIX", "NAXIS", "PCOUNT", "GCOUNT", "GROUPS", "ZIMAGE", "EXTNAME", "EXTVER")
+    header = {}
+    while True:
+        block = fileobj.read(FITS_BLOCK_SIZE)
+        if len(block) < FITS_BLOCK_SIZE:
+            raise OSError(f"Reached the end of {fileobj.name} before the end of the header.")
+        for i in range(0, FITS_BLOCK_SIZE, FITS_CARD_SIZE):
+            card = block[i:i + FITS_CARD_SIZE].decode("ascii", errors="replace")
+            keyword = card[:8].strip()
+            if keyword == "END":
+                return header, fileobj.tell()
+            if card[8:10] == "= " and keyword.startswith(wanted):
+                header[keyword] = _parse_card_value(card[10:])
+
+
+def _fits_data_size(header):
+    naxis = [header.get(f"NAXIS{i}", 0) for i in range(1, header.get("NAXIS", 0) + 1)]
+    if not naxis:
+        return 0
+    # Random groups have a NAXIS1 of zero which is not part of the data size
+    if header.get("GROUPS", False) and naxis[0] == 0:
+        naxis = naxis[1:]
+    nbytes = abs(header["BITPIX"]) // 8 * header.get("GCOUNT", 1) * (header.get("PCOUNT", 0) + math.prod(naxis))
+    return math.ceil(nbytes / FITS_BLOCK_SIZE) * FITS_BLOCK_SIZE
+
+
+def _hdu_matches(index, header, target):
+    if isinstance(target, int):
+        return index == target
+    return str(header.get("EXTNAME", "")).upper() == str(target).upper()
+
+
+class FITSDataLayout:
+    """
+    The location and type of the data array in one HDU of a FITS file.
+    """
+    __slots__ = ["dtype", "offset", "shape"]
+
+    def __init__(self, offset, dtype, shape):
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+
+    @classmethod
+    def from_file(cls, fileobj, target):
+        """
+        Find the data for HDU ``target`` by scanning the headers in ``fileobj``.
+
+        Returns `None` if the data can not be read directly, for instance because
+        it is tile compressed.
+        """
+        index = 0
+        fileobj.seek(0)
+        while True:
+            header, offset = _read_fits_header(fileobj)
+            if _hdu_matches(index, header, target):
+                break
+            fileobj.seek(offset + _fits_data_size(header))
+            index += 1
+
+        if header.get("ZIMAGE", False) or header.get("GROUPS", False):
+            return None
+        if (dtype := BITPIX_DTYPES.get(header.get("BITPIX"))) is None:
+            return None
+        shape = tuple(header.get(f"NAXIS{i}", 0) for i in range(header.get("NAXIS", 0), 0, -1))
+        return cls(offset, dtype, shape)
+
+
+class _DirectFITSHandle:
+    """
+    An open FITS file, with the location of the data in the target HDU.
+    """
+
+    def __init__(self, path, target):
+        self.fileobj = open(path, mode="rb")
+        self._path = path
+        self._hdul = None
+        try:
+            self.layout = FITSDataLayout.from_file(self.fileobj, target)
+        except Exception:
+            self.fileobj.close()
+            raise
+
+    @property
+    def hdul(self):
+        # Only parse the file with astropy if we can not read it directly
+        if self._hdul is None:
+            self._hdul = fits.open(self._path, memmap=False, do_not_scale_image_data=True, mode="denywrite")
+        return self._hdul
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.fileobj.close()
+        if self._hdul is not None:
+            self._hdul.close()
+
+
+def _sanitize_key(slc, shape):
+    """
+    Convert an array index into a tuple of one int or slice per dimension.
+    """
+    key = list(slc) if isinstance(slc, tuple) else [slc]
+    if any(k is Ellipsis for k in key):
+        i = key.index(Ellipsis)
+        key[i:i+1] = [slice(None)] * (len(shape) - len(key) + 1)
+    key += [slice(None)] * (len(shape) - len(key))
+    for k in key:
+        if not isinstance(k, (slice, int, np.integer)):
+            raise TypeError(f"Only integers and slices are supported when reading FITS data, not {k!r}")
+    return key
+
+
+@add_common_docstring(append=common_parameters)
+class DirectFITSLoader(AstropyFITSLoader):
+    """
+    Read uncompressed FITS data directly from the file, bypassing header parsing.
+
+    The offset of the data in the target HDU is found once, by scanning the
+    header blocks for the few keywords which determine the size of each HDU.
+    The requested region is then read as a single contiguous span of bytes
+    and byteswapped in place. HDUs which can not be read like this, such as
+    tile compressed images, are read with `astropy.io.fits` instead.
+
+    As with `.AstropyFITSLoader` the data are never scaled by ``BZERO`` or
+    ``BSCALE``.
+    """
+
+    def _open(self):
+        return _DirectFITSHandle(self.absolute_uri, self.target)
+
+    def _read_section(self, handle, slc):
+        layout = handle.layout
+        if layout is None or math.prod(layout.shape) != math.prod(self.shape):
+            return super()._read_section(handle.hdul, slc)
+
+        log.debug("Directly reading slice %s from file %s", slc, self.absolute_uri)
+        shape = tuple(self.shape)
+        key = _sanitize_key(slc, shape)
+        ranges = []
+        for k, n in zip(key, shape):
+            if isinstance(k, slice):
+                ranges.append(range(*k.indices(n)))
+            else:
+                if not -n <= k < n:
+                    raise IndexError(f"index {k} is out of bounds for axis with size {n}")
+                ranges.append(range(k % n, k % n + 1))
+
+        if any(len(r) == 0 for r in ranges):
+            return np.broadcast_to(np.empty((), dtype=self.dtype), shape)[tuple(key)].copy()
+
+        # Read a contiguous block which starts at the first selected element
+        # and spans the first dimension where more than one element is selected.
+        axis = next((i for i, r in enumerate(ranges) if len(r) > 1), len(shape) - 1)
+        lo = min(ranges[axis])
+        hi = max(ranges[axis]) + 1
+        start = [r[0] for r in ranges[:axis]] + [lo] + [0] * (len(shape) - axis - 1)
+        block_shape = (hi - lo, *shape[axis + 1:])
+        count = math.prod(block_shape)
+
+        handle.fileobj.seek(layout.offset + int(np.ravel_multi_index(start, shape)) * layout.dtype.itemsize)
+        data = np.fromfile(handle.fileobj, dtype=layout.dtype, count=count)
+        if data.size != count:
+            raise OSError(f"{self.absolute_uri} is truncated.")
+        data = data.reshape(block_shape)
+
+        if layout.dtype.newbyteorder("=") == np.dtype(self.dtype):
+            if not layout.dtype.isnative:
+                data.byteswap(inplace=True)
+                data = data.view(layout.dtype.newbyteorder("="))
+        else:
+            data = data.astype(self.dtype)
+
+        # Index the block, dropping the dimensions indexed by integers and
+        # keeping the length one dimensions which were sliced.
+        first = key[axis]
+        if isinstance(first, slice):
+            r = ranges[axis]
+            stop = r.stop - lo
+            first = slice(r.start - lo, stop if stop >= 0 else None, r.step)
+        else:
+            first = 0
+        data = data[(first, *key[axis + 1:])]
+        nkeep = sum(isinstance(k, slice) for k in key[:axis])
+        return data.reshape((1,) * nkeep + data.shape)
+
+
+class _MemmapFITSHandle(_DirectFITSHandle):
+    """
+    An open FITS file, which maps the data of the target HDU into memory on first use.
+    """
+
+    def __init__(self, path, target):
+        super().__init__(path, target)
+        self._mmap = None
+
+    def array(self, shape):
+        """
+        A read-only array backed by the memory mapped data.
+        """
+        if self._mmap is None:
+            self._mmap = mmap.mmap(self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.ndarray(shape, dtype=self.layout.dtype, buffer=self._mmap, offset=self.layout.offset)
+
+    def close(self):
+        # Do not close the mapping, any views into it which are still in use
+        # keep it open, and it is unmapped once the last one is garbage collected.
+        self._mmap = None
+        super().close()
+
+
+@add_common_docstring(append=common_parameters)
+class MemmapFITSLoader(DirectFITSLoader):
+    """
+    Read uncompressed FITS data through a read-only memory map of the file.
+
+    If the data in the file have the same dtype (including byte order) as the
+    array, the returned arrays are read-only views into the file, so only the
+    pages which are actually used are ever read. Otherwise, the selected
+    elements are copied out of the mapping and converted to the dtype of the
+    array. HDUs which can not be mapped, such as tile compressed images, are
+    read with `astropy.io.fits`.
+
+    The number of files mapped at any one time is limited by the size of the
+    ``file_pool``; a mapping which has been evicted from the pool stays valid
+    until the last array viewing it is garbage collected.
+    """
+
+    def _open(self):
+        return _MemmapFITSHandle(self.absolute_uri, self.target)
+
+    def _read_section(self, handle, slc):
+        layout = handle.layout
+        if layout is None or math.prod(layout.shape) != math.prod(self.shape):
+            return AstropyFITSLoader._read_section(self, handle.hdul, slc)
+
+        log.debug("Accessing slice %s from memory mapped file %s", slc, self.absolute_uri)
+        data = handle.array(tuple(self.shape))[slc]
+        if layout.dtype == np.dtype(self.dtype):
+            return data
+        return data.astype(self.dtype)
+
+
+class LoaderFactory:
+    """
+    Create loaders which share everything except their file uri.
+
+    One factory is shared by all the files in an array, so that only the file
+    uris need to be stored per file. Loaders are created when they are needed,
+    so changes to the attributes of the factory (e.g. ``basepath``) are seen
+    by all subsequent reads.
+
+    Parameters
+    ----------
+    loader: `type`
+        The `BaseFITSLoader` subclass to create.
+    shape: `tuple`
+        The shape of the array in each file.
+    dtype: `numpy.dtype`
+        The dtype of the resulting array
+    target: `int`
+        The HDU number to load the array from.
+    basepath: `pathlib.Path`, optional
+        The directory relative file uris are resolved against.
+    file_pool: `dkist.io.dask.pool.FileHandlePool`, optional
+        A pool of open files shared by all the loaders.
+    """
+    __slots__ = ["_token", "basepath", "dtype", "file_pool", "loader", "shape", "target"]
+
+    def __init__(self, loader, shape, dtype, target, basepath, file_pool=None):
+        self.loader = loader
+        self.shape = shape
+        self.dtype = dtype
+        self.target = target
+        self.basepath = basepath
+        self.file_pool = file_pool
+        # Arrays read through this factory even after its attributes change,
+        # so it is identified by this token rather than by its attributes
+        self._token = uuid.uuid4().hex
+
+    def __dask_tokenize__(self):
+        return (type(self).__name__, self._token)
+
+    def __deepcopy__(self, memo):
+        # A copy can be given a different basepath, so it needs its own token
+        return type(self)(*(copy.deepcopy(getattr(self, attr), memo)
+                            for attr in ("loader", "shape", "dtype", "target", "basepath", "file_pool")))
+
+    def __call__(self, fileuri):
+        return self.loader(fileuri, self.shape, self.dtype, self.target, self.basepath, file_pool=self.file_pool)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} for {self.loader.__name__} shape: {self.shape} dtype: {self.dtype}>"
+
+
+FITS_LOADERS = {
+    "astropy": AstropyFITSLoader,
+    "direct": DirectFITSLoader,
+    "memmap": MemmapFITSLoader,
+}
+"""
+The loader classes which can be selected with the ``fits_loader`` option of `dkist.io.conf`.
+"""
@@ -0,0 +1,174 @@
+"""
+A pool of open file handles shared by all the loaders of one array.
+
+Opening a FITS file and parsing its headers is often more expensive than
+reading a small region of the data, so rather than opening the file on every
+chunk access the loaders check handles out of a bounded, least recently used,
+pool.
+"""
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+from dkist import log
+
+__all__ = ["FileHandlePool"]
+
+
+class _PoolEntry:
+    __slots__ = ["closed", "handle", "lock"]
+
+    def __init__(self):
+        self.handle = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def close(self):
+        # Wait for any reader to finish with the handle before closing it.
+        with self.lock:
+            self.closed = True
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+
+class FileHandlePool:
+    """
+    A thread-safe, bounded, least recently used pool of open file handles.
+
+    Handles are keyed by an arbitrary hashable (normally the absolute path of
+    the file and the HDU being read) and are created by an ``opener`` callable
+    the first time they are requested. Each handle is only used by one thread
+    at a time, and the least recently used handles are closed once there are
+    more than ``max_open_files`` of them.
+
+    Parameters
+    ----------
+    max_open_files : `int`, optional
+        The maximum number of handles to keep open. If not specified the
+        ``max_open_files`` option of `dkist.io.conf` is used. If this is less
+        than one, handles are closed as soon as they have been used.
+    """
+
+    def __init__(self, max_open_files=None):
+        self._max_open_files = max_open_files
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __del__(self):
+        # Close the files rather than relying on their own finalisers
+        self.clear()
+
+    def __getstate__(self):
+        # Open files and locks can not be sent to another process, so the
+        # pool is reconstructed empty.
+        return {"_max_open_files": self._max_open_files}
+
+    def __setstate__(self, state):
+        self.__init__(state["_max_open_files"])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __repr__(self):
+        return f"<{type(self).__name__} with {len(self)} of {self.max_open_files} handles open>"
+
+    @property
+    def max_open_files(self):
+        """
+        The maximum number of handles this pool will keep open.
+        """
+        if self._max_open_files is None:
+            from dkist.io import conf  # noqa: PLC0415
+
+            return conf.max_open_files
+        return self._max_open_files
+
+    @max_open_files.setter
+    def max_open_files(self, value):
+        self._max_open_files = value
+        with self._lock:
+            evicted = self._evict()
+        for entry in evicted:
+            entry.close()
+
+    def _evict(self):
+        # Must be called with self._lock held
+        evicted = []
+        while len(self._entries) > max(self.max_open_files, 0):
+            _, entry = self._entries.popitem(last=False)
+            evicted.append(entry)
+        return evicted
+
+    def _checkout(self, key, opener):
+        """
+        Return the entry for key, with its lock held and its handle open.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = _PoolEntry()
+                    self._entries[key] = entry
+                    evicted = self._evict()
+                else:
+                    self._entries.move_to_end(key)
+                    evicted = []
+
+            for old in evicted:
+                old.close()
+
+            entry.lock.acquire()
+            # The entry may have been evicted between being looked up and the
+            # lock being acquired, if so try again with a fresh entry.
+            if entry.closed:
+                entry.lock.release()
+                continue
+
+            if entry.handle is None:
+                try:
+                    log.debug("Opening %s", key)
+                    entry.handle = opener()
+                except BaseException:
+                    entry.closed = True
+                    entry.lock.release()
+                    with self._lock:
+                        if self._entries.get(key) is entry:
+                            del self._entries[key]
+                    raise
+
+            return entry
+
+    @contextmanager
+    def open(self, key, opener):
+        """
+        Check out the handle for ``key``, opening it with ``opener()`` if needed.
+
+        The handle is only valid inside the ``with`` block.
+        """
+        if self.max_open_files < 1:
+            handle = opener()
+            try:
+                yield handle
+            finally:
+                handle.close()
+            return
+
+        entry = self._checkout(key, opener)
+        try:
+            yield entry.handle
+        finally:
+            entry.lock.release()
+
+    def clear(self):
+        """
+        Close all open handles.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
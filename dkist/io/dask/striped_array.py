@@ -21,12 +21,14 @@ from collections.abc import Iterable
 
 import dask.array
 import numpy as np
+from dask.utils import parse_bytes
 from numpy.typing import DTypeLike, NDArray
 
 from astropy.wcs.wcsapi.wrappers.sliced_wcs import sanitize_slices
 
-from dkist.io.dask.loaders import BaseFITSLoader
-from dkist.io.dask.utils import stack_loader_array
+from dkist.io.dask.loaders import BaseFITSLoader, LoaderFactory
+from dkist.io.dask.pool import FileHandlePool
+from dkist.io.dask.utils import _compose_slices, stack_loader_array
 from dkist.io.utils import filemanager_info_str
 
 __all__ = ["FileManager", "StripedExternalArray"]
@@ -61,6 +63,8 @@ class BaseStripedExternalArray(abc.ABC):
     dtype: DTypeLike
     shape: Iterable[int]
     chunksize: Iterable[int] | None
+    target_chunk_bytes: int | None
+    file_chunks: Iterable[int] | None
 
     @abc.abstractproperty
     def fileuri_array(self) -> NDArray[np.str_]:
@@ -80,7 +84,7 @@ class BaseStripedExternalArray(abc.ABC):
         """
 
     def __len__(self) -> int:
-        return self.loader_array.size
+        return self.fileuri_array.size
 
     def __eq__(self, other) -> bool:
         uri = (self.fileuri_array == other.fileuri_array).all()
@@ -106,7 +110,31 @@ class BaseStripedExternalArray(abc.ABC):
         """
         The final shape of the reconstructed data array.
         """
-        return self._output_shape_from_ref_array(self.shape, self.loader_array)
+        return self._output_shape_from_ref_array(self.shape, self.fileuri_array)
+
+    def _chunk_parameters(self) -> dict[str, Any]:
+        """
+        The chunking options passed to `stack_loader_array`, with defaults from `dkist.io.conf`.
+        """
+        from dkist.io import conf  # noqa: PLC0415
+
+        target_chunk_bytes = self.target_chunk_bytes
+        if target_chunk_bytes is None:
+            target_chunk_bytes = parse_bytes(conf.target_chunk_size)
+        file_chunks = self.file_chunks
+        if file_chunks is None:
+            file_chunks = conf.file_chunk_shape
+        return {
+            "chunksize": tuple(self.chunksize) if self.chunksize is not None else None,
+            "target_chunk_bytes": target_chunk_bytes,
+            "file_chunks": tuple(file_chunks) or None,
+        }
+
+    def _array_key(self) -> tuple:
+        """
+        A key which changes whenever an array generated from this object would be different.
+        """
+        return (self._state, tuple(self._chunk_parameters().items()))
 
     def _generate_array(self) -> dask.array.Array:
         """
@@ -116,7 +144,9 @@ class BaseStripedExternalArray(abc.ABC):
         still have a reference to this `~.FileManager` object, meaning changes
         to this object will be reflected in the data loaded by the array.
         """
-        return stack_loader_array(self.loader_array, self.output_shape, self.chunksize)
+        return stack_loader_array(
+            self.fileuri_array, self.output_shape, loader_factory=self._loader_factory, **self._chunk_parameters(),
+        )
 
 
 class StripedExternalArray(BaseStripedExternalArray):
@@ -130,6 +160,8 @@ class StripedExternalArray(BaseStripedExternalArray):
         loader: type[BaseFITSLoader],
         basepath: os.PathLike = None,
         chunksize: Iterable[int] = None,
+        target_chunk_bytes: int | None = None,
+        file_chunks: Iterable[int] | None = None,
     ):
         shape = tuple(shape)
         self.shape = shape
@@ -138,13 +170,17 @@ class StripedExternalArray(BaseStripedExternalArray):
         self._loader = loader
         self._basepath = self._sanitize_basepath(basepath)
         self.chunksize = chunksize
+        self.target_chunk_bytes = target_chunk_bytes
+        self.file_chunks = file_chunks
+        # Incremented whenever a change to this object invalidates previously generated arrays
+        self._state = 0
         self._fileuri_array = np.atleast_1d(np.array(fileuris))
+        # All the loaders share one pool of open files
+        self._file_pool = FileHandlePool()
 
-        loader_array = np.empty_like(self._fileuri_array, dtype=object)
-        for i, fileuri in enumerate(self._fileuri_array.flat):
-            loader_array.flat[i] = loader(fileuri, shape, dtype, target, self.basepath)
-
-        self._loader_array = loader_array
+        # Loaders are only created when they are needed, from this one factory
+        self._loader_factory = LoaderFactory(loader, shape, dtype, target, self.basepath, file_pool=self._file_pool)
+        self._loader_array = None
 
     def __str__(self: FileManagerProtocol) -> str:
         return filemanager_info_str(self)
@@ -155,7 +191,7 @@ class StripedExternalArray(BaseStripedExternalArray):
 
     @property
     def ndim(self):
-        return len(self.loader_array.shape)
+        return self.fileuri_array.ndim
 
     @staticmethod
     def _sanitize_basepath(value):
@@ -171,8 +207,18 @@ class StripedExternalArray(BaseStripedExternalArray):
     @basepath.setter
     def basepath(self, value: os.PathLike | str | None):
         self._basepath = self._sanitize_basepath(value)
-        for loader in self._loader_array.flat:
-            loader.basepath = self._basepath
+        self._state += 1
+        # Any files we have open are from the old location
+        self._file_pool.clear()
+        self._loader_factory.basepath = self._basepath
+        self._loader_array = None
+
+    @property
+    def file_pool(self) -> FileHandlePool:
+        """
+        The pool of open files shared by all the loaders for this array.
+        """
+        return self._file_pool
 
     @property
     def fileuri_array(self) -> NDArray[np.str_]:
@@ -188,7 +234,13 @@ class StripedExternalArray(BaseStripedExternalArray):
 
         These loader objects implement the minimal array-like interface for
         conversion to a dask array.
+
+        .. note::
+           The loaders are created the first time this array is accessed, and
+           again after the ``basepath`` changes.
         """
+        if self._loader_array is None:
+            self._loader_array = np.vectorize(self._loader_factory, otypes=[object])(self._fileuri_array)
         return self._loader_array
 
 
@@ -200,8 +252,17 @@ class StripedExternalArrayView(BaseStripedExternalArray):
     __slots__ = ["parent", "parent_slice"]
 
     def __init__(self, parent: StripedExternalArray, aslice: tuple | slice | int):
+        aslice = tuple(aslice) if isinstance(aslice, (tuple, list)) else (aslice,)
+        # A view of a view is a single view of the root array, so that
+        # repeated slicing doesn't build a chain of views.
+        if isinstance(parent, StripedExternalArrayView):
+            try:
+                aslice = _compose_slices(parent.parent.fileuri_array.shape, parent.parent_slice, aslice)
+                parent = parent.parent
+            except IndexError:
+                pass
         self.parent = parent
-        self.parent_slice = tuple(aslice) if isinstance(aslice, (tuple, list)) else (aslice,)
+        self.parent_slice = aslice
 
     def __getattr__(self, attr):
         return getattr(self.parent, attr)
@@ -231,7 +292,7 @@ class StripedExternalArrayView(BaseStripedExternalArray):
         """
         # array call here to ensure that a length one array is returned rather
         # than a single element.
-        return np.array(self._fileuri_array[self.parent_slice])
+        return np.array(self.parent.fileuri_array[self.parent_slice])
 
     @property
     def loader_array(self) -> NDArray[np.object_]:
@@ -254,21 +315,25 @@ class FileManager:
     ----------
     striped_external_array
     """
-    __slots__ = ["_striped_external_array", "_subslice"]
+    __slots__ = ["_array_cache", "_striped_external_array", "_subslice"]
 
     @classmethod
-    def from_parts(cls, fileuris, target, dtype, shape, *, loader, basepath=None, chunksize=None, subslice=None):
+    def from_parts(cls, fileuris, target, dtype, shape, *, loader, basepath=None, chunksize=None, subslice=None,
+                   target_chunk_bytes=None, file_chunks=None):
         """
         An initialization helper for constructing the `StripedExternalArray` and the `FileManager` together.
         """
         striped_array = StripedExternalArray(
             fileuris, target, dtype, shape, loader=loader, basepath=basepath, chunksize=None,
+            target_chunk_bytes=target_chunk_bytes, file_chunks=file_chunks,
         )
         return cls(striped_array, subslice)
 
     def __init__(self, striped_external_array: StripedExternalArray, subslice=None):
         self._striped_external_array = striped_external_array
         self._subslice = subslice
+        # A tuple of the key of the striped array and the dask array generated from it
+        self._array_cache = None
 
     def __eq__(self, other):
         return self._striped_external_array == other._striped_external_array
@@ -310,17 +375,20 @@ class FileManager:
     def _generate_array(self):
         return self._striped_external_array._generate_array()
 
-    # @cached_property
     @property
     def dask_array(self):
         """
         The Dask array managed by this FileManager.
 
         .. note::
-           This array is cached, so only generated once.
+           This array is cached, so only generated once. It is regenerated if
+           the ``basepath`` or the chunking options change.
 
         """
-        return self._generate_array()
+        key = self._striped_external_array._array_key()
+        if self._array_cache is None or self._array_cache[0] != key:
+            self._array_cache = (key, self._generate_array())
+        return self._array_cache[1]
 
     @property
     def fileuri_array(self):
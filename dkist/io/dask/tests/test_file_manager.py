@@ -1,12 +1,16 @@
+import copy
 from pathlib import Path
 
 import dask.array as da
 import numpy as np
 import pytest
+from dask.core import flatten
 from numpy.testing import assert_allclose
 
 from dkist.data.test import rootdir
+from dkist.io import conf
 from dkist.io.dask.striped_array import FileManager, StripedExternalArray, StripedExternalArrayView
+from dkist.io.dask.utils import _compose_slices, _group_adjacent
 
 eitdir = Path(rootdir) / "EIT"
 
@@ -72,6 +76,16 @@ def test_basepath_change(file_manager):
     assert np.isnan(array).all()
     file_manager.basepath = eitdir
     assert not np.isnan(array).any()
+    # The array reads from the new basepath, so it still has the same name as a new array
+    assert file_manager._generate_array().name == array.name
+
+
+def test_array_name_independent_managers(eit_dataset):
+    first = copy.deepcopy(eit_dataset).files._fm
+    second = copy.deepcopy(eit_dataset).files._fm
+    second.basepath = "elsewhere"
+    assert first.filenames == second.filenames
+    assert first._generate_array().name != second._generate_array().name
 
 
 def test_sliced_basepath_change(file_manager):
@@ -179,3 +193,182 @@ def test_file_manager_slice_slice(large_visp_dataset):
     assert len(spectrum.files) == 1
     assert spectrum.files._fm.output_shape == stokesI.files._fm.output_shape[1:]
     assert spectrum.files._fm._striped_external_array.loader_array.shape == ()
+
+
+@pytest.mark.accept_cli_dataset
+def test_file_manager_slice_slice_single_view(large_visp_dataset):
+    root = large_visp_dataset.files._fm._striped_external_array
+    sliced = large_visp_dataset[1:][1][2:5][-1]
+    view = sliced.files._fm._striped_external_array
+    assert isinstance(view, StripedExternalArrayView)
+    assert view.parent is root
+    assert view.parent_slice == (2, 4)
+    assert sliced.files.filenames == large_visp_dataset[2, 4].files.filenames
+
+
+@pytest.mark.parametrize(("first", "second"), [
+    ((0,), ()),
+    ((slice(1, 3),), (1,)),
+    ((slice(None), 2), (slice(-2, None),)),
+    ((slice(None, -1), slice(1, None)), (-1, slice(None, 2))),
+    ((slice(3, 1),), (slice(None),)),
+    ((slice(None, None, -1), slice(None, None, 2)), (slice(1, 3), slice(None, None, -1))),
+])
+def test_compose_slices(first, second):
+    array = np.arange(4 * 5 * 6).reshape(4, 5, 6)
+    composed = _compose_slices(array.shape, first, second)
+    assert np.array_equal(array[composed], array[first][second])
+
+
+@pytest.mark.parametrize(("first", "second"), [
+    ((0, 0, 0), (0,)),
+    ((slice(None),), (4,)),
+    ((np.array([0, 1]),), ()),
+    ((slice(None),), (Ellipsis,)),
+])
+def test_compose_slices_invalid(first, second):
+    with pytest.raises(IndexError):
+        _compose_slices((4, 5, 6), first, second)
+
+
+@pytest.mark.parametrize(("shape", "n", "expected"), [
+    ((11,), 1, ((1,) * 11,)),
+    ((11,), 4, ((4, 4, 3),)),
+    ((11,), 100, ((11,),)),
+    ((3, 4), 2, ((1, 1, 1), (2, 2))),
+    ((3, 4), 8, ((2, 1), (4,))),
+    ((3, 4), 5, ((1, 1, 1), (4,))),
+])
+def test_group_adjacent(shape, n, expected):
+    assert _group_adjacent(shape, n) == expected
+
+
+@pytest.mark.parametrize("n_files", [1, 4, 100])
+def test_grouped_chunks(file_manager, loader_array, n_files):
+    expected = file_manager._generate_array().compute()
+    file_bytes = 128 * 128 * 8
+
+    file_manager._striped_external_array.target_chunk_bytes = n_files * file_bytes
+    array = file_manager._generate_array()
+    assert array.chunks[0] == _group_adjacent(loader_array.shape, n_files)[0]
+    assert array.numblocks[0] == len(array.dask)
+    assert_allclose(array.compute(), expected)
+
+
+def test_grouped_chunks_config(file_manager):
+    with conf.set_temp("target_chunk_size", "1MiB"):
+        array = file_manager._generate_array()
+    assert array.chunksize[0] == 8
+
+
+def test_unique_names(file_manager):
+    array = file_manager._generate_array()
+    assert array.name == file_manager._generate_array().name
+    assert array.name != file_manager[1:]._generate_array().name
+
+    file_manager._striped_external_array.target_chunk_bytes = 2**20
+    assert array.name != file_manager._generate_array().name
+
+    # Arrays from different files can be combined without their tasks colliding
+    stacked = da.stack([file_manager[:2]._generate_array(), file_manager[2:4]._generate_array()])
+    assert_allclose(stacked.compute(), array[:4].compute().reshape(stacked.shape))
+
+
+@pytest.mark.parametrize("file_chunks", [(32, 32), (50, -1), (128, 100)])
+def test_file_chunks(file_manager, file_chunks):
+    expected = file_manager._generate_array().compute()
+
+    file_manager._striped_external_array.file_chunks = file_chunks
+    array = file_manager._generate_array()
+    assert array.chunks[1:] == da.core.normalize_chunks(file_chunks, (128, 128))
+    assert_allclose(array.compute(), expected)
+
+    # Slicing only keeps the tasks for the chunks which overlap the slice
+    sliced = array[:, :10, :10]
+    graph = sliced.dask.cull(set(flatten(sliced.__dask_keys__())))
+    assert sum(key[0] == array.name for key in graph.keys()) == array.numblocks[0]
+    assert_allclose(sliced.compute(), expected[:, :10, :10])
+
+
+def test_file_chunks_grouped(file_manager):
+    expected = file_manager._generate_array().compute()
+
+    sea = file_manager._striped_external_array
+    sea.file_chunks = (64, 64)
+    sea.target_chunk_bytes = 4 * 64 * 64 * 8
+    array = file_manager._generate_array()
+    assert array.chunksize == (4, 64, 64)
+    assert_allclose(array.compute(), expected)
+
+
+def test_file_chunks_config(file_manager):
+    with conf.set_temp("file_chunk_shape", [64, 32]):
+        array = file_manager._generate_array()
+    assert array.chunksize == (1, 64, 32)
+
+
+def test_file_chunks_dummy_axis(small_visp_dataset):
+    sea = small_visp_dataset.files._fm._striped_external_array
+    expected = sea._generate_array().compute()
+
+    sea.file_chunks = (-1, 7)
+    array = sea._generate_array()
+    assert array.shape == sea.output_shape
+    assert array.chunks[-1] == (7, 7, 7, 4)
+    assert_allclose(array.compute(), expected)
+
+
+def test_file_chunks_missing_files(file_manager):
+    file_manager.basepath = None
+    file_manager._striped_external_array.file_chunks = (50, 50)
+    array = file_manager._generate_array()
+    assert np.isnan(array.compute()).all()
+
+
+def test_dask_array_cached(file_manager):
+    array = file_manager.dask_array
+    assert file_manager.dask_array is array
+
+    file_manager.basepath = file_manager.basepath
+    new_array = file_manager.dask_array
+    assert new_array is not array
+    assert file_manager.dask_array is new_array
+
+    file_manager._striped_external_array.file_chunks = (64, 64)
+    assert file_manager.dask_array is not new_array
+    assert file_manager.dask_array.chunksize == (1, 64, 64)
+
+    with conf.set_temp("target_chunk_size", "1MiB"):
+        assert file_manager.dask_array.chunksize == (11, 64, 64)
+    assert file_manager.dask_array.chunksize == (1, 64, 64)
+
+
+def test_sliced_dask_array_cached(file_manager):
+    sliced_manager = file_manager[2:5]
+    array = sliced_manager.dask_array
+    assert sliced_manager.dask_array is array
+
+    # Changing the basepath of the parent invalidates the sliced array
+    file_manager.basepath = None
+    assert sliced_manager.dask_array is not array
+    assert np.isnan(sliced_manager.dask_array).all()
+
+
+def test_loaders_created_lazily(file_manager):
+    sea = file_manager._striped_external_array
+    assert sea._loader_array is None
+
+    # Generating the array and changing the basepath don't need the loaders
+    file_manager.basepath = eitdir
+    array = file_manager._generate_array()
+    assert sea._loader_array is None
+
+    loaders = sea.loader_array
+    assert sea.loader_array is loaders
+    assert [loader.fileuri for loader in loaders.flat] == file_manager.filenames
+    assert {loader.basepath for loader in loaders.flat} == {eitdir}
+
+    file_manager.basepath = None
+    assert {loader.basepath for loader in sea.loader_array.flat} == {None}
+    # Existing arrays read from the new basepath
+    assert np.isnan(array).all()
@@ -0,0 +1,143 @@
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from dkist.data.test import rootdir
+from dkist.io.dask.loaders import AstropyFITSLoader
+from dkist.io.dask.pool import FileHandlePool
+from dkist.io.dask.striped_array import FileManager
+
+eitdir = Path(rootdir) / "EIT"
+
+
+class DummyHandle:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def eit_file_manager():
+    fileuris = sorted(p.name for p in eitdir.glob("*.fits"))
+    return FileManager.from_parts(fileuris, 0, "float64", (128, 128),
+                                  loader=AstropyFITSLoader, basepath=eitdir)
+
+
+def test_pool_reuses_handles():
+    pool = FileHandlePool(max_open_files=2)
+    opened = []
+
+    def opener():
+        opened.append(DummyHandle("a"))
+        return opened[-1]
+
+    with pool.open("a", opener) as h1:
+        pass
+    with pool.open("a", opener) as h2:
+        pass
+
+    assert h1 is h2
+    assert len(opened) == 1
+    assert not h1.closed
+    assert "a" in pool
+
+
+def test_pool_evicts_least_recently_used():
+    pool = FileHandlePool(max_open_files=2)
+    handles = {}
+
+    def opener(name):
+        def _open():
+            handles[name] = DummyHandle(name)
+            return handles[name]
+        return _open
+
+    for name in ("a", "b", "a", "c"):
+        with pool.open(name, opener(name)):
+            pass
+
+    assert len(pool) == 2
+    assert "b" not in pool
+    assert handles["b"].closed
+    assert not handles["a"].closed
+
+    pool.clear()
+    assert len(pool) == 0
+    assert all(h.closed for h in handles.values())
+
+
+def test_pool_disabled():
+    pool = FileHandlePool(max_open_files=0)
+    with pool.open("a", lambda: DummyHandle("a")) as handle:
+        assert not handle.closed
+    assert handle.closed
+    assert len(pool) == 0
+
+
+def test_pool_failed_open():
+    pool = FileHandlePool()
+
+    def opener():
+        raise OSError("no file")
+
+    with pytest.raises(OSError, match="no file"):
+        with pool.open("a", opener):
+            pass
+    assert "a" not in pool
+
+
+def test_pool_pickle():
+    pool = FileHandlePool(max_open_files=3)
+    with pool.open("a", lambda: DummyHandle("a")):
+        pass
+
+    new_pool = pickle.loads(pickle.dumps(pool))
+    assert new_pool.max_open_files == 3
+    assert len(new_pool) == 0
+
+
+def test_shared_pool(eit_file_manager):
+    sea = eit_file_manager._striped_external_array
+    pools = {loader.file_pool for loader in sea.loader_array.flat}
+    assert pools == {sea.file_pool}
+
+    array = eit_file_manager._generate_array()
+    expected = array.compute()
+    assert len(sea.file_pool) == min(len(sea), sea.file_pool.max_open_files)
+    assert_allclose(array.compute(), expected)
+
+    sea.basepath = None
+    assert len(sea.file_pool) == 0
+    assert np.isnan(array).all()
+
+
+def test_threaded_reads(eit_file_manager):
+    sea = eit_file_manager._striped_external_array
+    sea.file_pool.max_open_files = 2
+    loaders = list(sea.loader_array.flat)
+    expected = [loader.data for loader in loaders]
+
+    errors = []
+
+    def read(i):
+        try:
+            for _ in range(5):
+                assert_allclose(loaders[i % len(loaders)][10:20], expected[i % len(loaders)][10:20])
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(sea.file_pool) <= 2
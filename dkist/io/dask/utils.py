@@ -1,14 +1,19 @@
+import math
 import warnings
+from itertools import product, accumulate
 
 import dask
 import numpy as np
+from dask.array.core import normalize_chunks
+from dask.base import tokenize
 
 from dkist.utils.exceptions import DKISTDeprecationWarning
 
 __all__ = ["stack_loader_array"]
 
 
-def stack_loader_array(loader_array, output_shape, chunksize=None):
+def stack_loader_array(loader_array, output_shape, chunksize=None, *, target_chunk_bytes=None, file_chunks=None,
+                       loader_factory=None):
     """
     Converts an array of loaders to a dask array that loads a chunk from each loader
 
@@ -16,48 +21,163 @@ def stack_loader_array(loader_array, output_shape, chunksize=None):
 
     Parameters
     ----------
-    loader_array : `dkist.io.loaders.BaseFITSLoader`
-        An array of loader objects
+    loader_array : `numpy.ndarray`
+        An array of `dkist.io.loaders.BaseFITSLoader` objects, or an array of
+        file uris if ``loader_factory`` is specified.
     output_shape : tuple[int]
         The intended shape of the final array
     chunksize : tuple[int]
         Can be used to set a chunk size. If not provided, each batch is one chunk
+    target_chunk_bytes : int, optional
+        If specified, adjacent files are grouped together so that each chunk
+        (and therefore each task) reads as many files as fit in this many
+        bytes. If not specified, or smaller than one file, each file is one
+        chunk.
+    file_chunks : tuple, optional
+        If specified, each file is split into chunks of this shape, in any
+        form accepted by `dask.array.core.normalize_chunks`. Each task then
+        only reads its region of the file. If not specified each chunk
+        contains the whole of each file.
+    loader_factory : `dkist.io.dask.loaders.LoaderFactory`, optional
+        If specified, ``loader_array`` is an array of file uris and each task
+        creates the loaders for its files with this factory when it is run.
 
     Returns
     -------
     array : `dask.array.Array`
     """
-    file_shape = loader_array.flat[0].shape
+    first_loader = loader_factory(loader_array.flat[0]) if loader_factory else loader_array.flat[0]
+    file_shape = tuple(first_loader.shape)
+    dtype = np.dtype(first_loader.dtype)
 
-    tasks = {}
-    for i, loader in enumerate(loader_array.flat):
-        # The key identifies this chunk's position in the (partially-flattened) final data cube
-        key = ("load_files", i)
-        key += (0,) * len(file_shape)
-        # Each task will be to call _call_loader, with the loader as an argument
-        tasks[key] = (_call_loader, loader)
-
-    dsk = dask.highlevelgraph.HighLevelGraph.from_collections("load_files", tasks, dependencies=())
-    # Specifies that each chunk occupies a space of 1 pixel in the first dimension, and all the pixels in the others
-    chunks = (*((1,) * loader_array.size,), *((s,) for s in file_shape))
-    array = dask.array.Array(dsk,
-                             name="load_files",
-                             chunks=chunks,
-                             dtype=loader_array.flat[0].dtype)
-    # Now impose the higher dimensions on the data cube
-    array = array.reshape(output_shape)
+    # The loader dimensions are dropped from the output if there is only one file.
+    n_loader_dims = loader_array.ndim if loader_array.size > 1 else 0
+    loader_array = loader_array.reshape(loader_array.shape[:n_loader_dims])
+    frame_shape = tuple(output_shape[n_loader_dims:])
+
+    loader_chunks = None
     if chunksize is not None:
         warnings.warn("Using the dask file loader with a non-default chunksize is deprecated. "
                       "If you see this warning loading an ASDF file please open an issue "
                       "on GitHub: https://github.com/DKISTDC/dkist/issues", DKISTDeprecationWarning)
-        # If requested, re-chunk the array. Not sure this is optimal
-        new_chunks = (1,) * (array.ndim - len(chunksize)) + chunksize
-        array = array.rechunk(new_chunks)
-    return array
+        chunksize = (1,) * (len(output_shape) - len(chunksize)) + tuple(chunksize)
+        loader_chunks = normalize_chunks(chunksize[:n_loader_dims], loader_array.shape)
+        file_chunks = chunksize[n_loader_dims:]
+
+    frame_chunks = normalize_chunks(file_chunks or frame_shape, frame_shape, dtype=dtype)
+    if loader_chunks is None:
+        files_per_chunk = 1
+        if target_chunk_bytes:
+            chunk_size = math.prod(max(c) for c in frame_chunks) * dtype.itemsize
+            files_per_chunk = max(1, int(target_chunk_bytes // chunk_size))
+        loader_chunks = _group_adjacent(loader_array.shape, files_per_chunk)
+
+    # The loaders read from the basepath they have when the array is computed,
+    # so it isn't part of the name. The factory, or the loaders, identify the
+    # array instead.
+    name = "load_files-" + tokenize(
+        loader_array if loader_factory else [loader.fileuri for loader in loader_array.flat],
+        loader_factory if loader_factory else [id(loader) for loader in loader_array.flat],
+        type(first_loader).__name__,
+        first_loader.target,
+        file_shape,
+        dtype.str,
+        loader_chunks,
+        frame_chunks,
+    )
+
+    # Any leading dummy dimension of the file is not in the output
+    dummy_dims = (0,) * (len(file_shape) - len(frame_shape))
+
+    tasks = {}
+    for (loader_idx, loader_block), (frame_idx, region) in product(_blocks(loader_chunks), _blocks(frame_chunks)):
+        # The key identifies this chunk's position in the final data cube
+        key = (name, *loader_idx, *frame_idx)
+        # Each task will be to call _call_loaders, with an array of loaders and the region of the files as arguments
+        tasks[key] = (_call_loaders, loader_array[(*loader_block, ...)], dummy_dims + region, dtype, loader_factory)
+
+    dsk = dask.highlevelgraph.HighLevelGraph.from_collections(name, tasks, dependencies=())
+    return dask.array.Array(dsk, name=name, chunks=(*loader_chunks, *frame_chunks), dtype=dtype)
+
+
+def _blocks(chunks):
+    """
+    List the index and the slices of every block of an array with these chunks.
+    """
+    slices = [[slice(start - size, start) for start, size in zip(accumulate(c), c)] for c in chunks]
+    return list(zip(np.ndindex(*map(len, chunks)), product(*slices)))
+
+
+def _group_adjacent(shape, n):
+    """
+    Chunk a loader array so that each chunk holds at most ``n`` adjacent files.
+
+    Files are grouped along the last dimension first, and only grouped along
+    the preceding dimension once whole rows of the last dimension fit in one
+    chunk.
+    """
+    chunks = []
+    for dim in shape[::-1]:
+        size = max(1, min(n, dim))
+        chunks.append((size,) * (dim // size) + ((dim % size,) if dim % size else ()))
+        n = n // dim if size == dim else 1
+    return tuple(chunks[::-1])
+
+
+def _call_loaders(loaders, region, dtype, loader_factory=None):
+    if loader_factory is not None:
+        loaders = np.vectorize(loader_factory, otypes=[object])(loaders)
+    region_shape = tuple(s.stop - s.start for s in region if isinstance(s, slice))
+    if loaders.size == 1:
+        # Avoid a copy if there is only one file in this chunk
+        return np.reshape(loaders.flat[0][region], loaders.shape + region_shape)
+
+    # The data needs extra dimensions for the leading indices of the data cube
+    # which index the files
+    data = np.empty(loaders.shape + region_shape, dtype=dtype)
+    for idx in np.ndindex(loaders.shape):
+        data[idx] = np.reshape(loaders[idx][region], region_shape)
+    return data
+
+
+def _compose_slices(shape, first, second):
+    """
+    Combine two consecutive indexing operations into one.
+
+    Indexing an array of shape ``shape`` with the result is the same as
+    indexing it with ``first`` and then indexing that with ``second``. Both
+    must be sequences of integers and slices, missing trailing entries select
+    the whole axis.
+
+    Raises
+    ------
+    IndexError
+        If the indices can't be composed, because one of them isn't an integer
+        or a slice, is out of bounds, or there are too many of them.
+    """
+    first = list(first) + [slice(None)] * (len(shape) - len(first))
+    second = list(second)
+    if len(first) > len(shape):
+        raise IndexError("too many indices")
 
+    composed = []
+    for size, index in zip(shape, first):
+        if not isinstance(index, (int, np.integer, slice)):
+            raise IndexError(f"can't compose index {index!r}")
+        # A range applies both indices exactly, including negative ones
+        axis = range(size)[index]
+        if isinstance(axis, range):
+            index = second.pop(0) if second else slice(None)
+            if not isinstance(index, (int, np.integer, slice)):
+                raise IndexError(f"can't compose index {index!r}")
+            axis = axis[index]
+        if not isinstance(axis, range):
+            composed.append(axis)
+        elif len(axis) == 0:
+            composed.append(slice(0, 0))
+        else:
+            composed.append(slice(axis.start, axis.stop if axis.stop >= 0 else None, axis.step))
 
-def _call_loader(loader):
-    data = loader.data
-    # The data needs an extra dimension for the leading index of the intermediate data cube, which has a leading
-    # index for file number
-    return np.expand_dims(data, 0)
+    if second:
+        raise IndexError("too many indices")
+    return tuple(composed)
@@ -31,10 +31,12 @@ class DKISTFileManager:
     __slots__ = ["_fm", "_inventory_cache", "_ndcube"]
 
     @classmethod
-    def from_parts(cls, fileuris, target, dtype, shape, *, loader, basepath=None, chunksize=None):
+    def from_parts(cls, fileuris, target, dtype, shape, *, loader, basepath=None, chunksize=None,
+                   target_chunk_bytes=None, file_chunks=None):
         return cls(
             FileManager.from_parts(
-                fileuris, target, dtype, shape, loader=loader, basepath=basepath, chunksize=chunksize
+                fileuris, target, dtype, shape, loader=loader, basepath=basepath, chunksize=chunksize,
+                target_chunk_bytes=target_chunk_bytes, file_chunks=file_chunks,
             )
         )
 
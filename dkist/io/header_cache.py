@@ -0,0 +1,326 @@
+"""
+A local cache of the columns of the header tables in DKIST ASDF files.
+
+Each column read from a header table is cached as an ``npz`` file in the
+user cache directory, in a directory named by a checksum of the ASDF file, so
+that reading the same columns after opening the file again does not need the
+ASDF file to be parsed. Adding a column only writes the file for that column.
+The least recently used columns are removed once the cache is larger than
+``dkist.io.conf.header_cache_size``.
+"""
+import os
+import json
+import struct
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from functools import lru_cache
+from dataclasses import dataclass
+from urllib.parse import quote
+
+import numpy as np
+import platformdirs
+from dask.utils import parse_bytes
+
+from asdf.constants import BLOCK_FLAG_STREAMED, BLOCK_MAGIC
+from astropy.table import Column, MaskedColumn, Table
+
+from dkist import log
+
+__all__ = ["HeaderRows", "HeaderSource", "asdf_checksum", "get_header_cache_dir"]
+
+
+def get_header_cache_dir():
+    """
+    The directory the header column caches are written to.
+    """
+    return Path(platformdirs.user_cache_dir("dkist")) / "headers"
+
+
+def _first_block_offset(fobj):
+    """
+    The offset of the first binary block in an ASDF file, or `None` if there are no blocks.
+    """
+    overlap = len(BLOCK_MAGIC) - 1
+    position = 0
+    previous = b""
+    while chunk := fobj.read(2**20):
+        buffer = previous + chunk
+        if (index := buffer.find(BLOCK_MAGIC)) >= 0:
+            return position - len(previous) + index
+        previous = buffer[-overlap:]
+        position += len(chunk)
+    return None
+
+
+@lru_cache(maxsize=128)
+def _file_checksum(path, size, mtime_ns):
+    sha = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as fobj:
+        first_block = _first_block_offset(fobj)
+        fobj.seek(0)
+        sha.update(fobj.read(first_block) if first_block is not None else fobj.read())
+        if first_block is None:
+            return sha.hexdigest()
+
+        # The headers of the blocks include their sizes and checksums, so
+        # the data in the blocks don't have to be read
+        fobj.seek(first_block)
+        while fobj.read(len(BLOCK_MAGIC)) == BLOCK_MAGIC:
+            header_size, = struct.unpack(">H", fobj.read(2))
+            header = fobj.read(header_size)
+            sha.update(header)
+            flags, allocated_size = struct.unpack(">I4xQ", header[:16])
+            if flags & BLOCK_FLAG_STREAMED:
+                break
+            fobj.seek(allocated_size, os.SEEK_CUR)
+    return sha.hexdigest()
+
+
+def asdf_checksum(filepath):
+    """
+    A SHA-256 checksum of the contents of an ASDF file.
+
+    The checksum is of the tree and the headers of the binary blocks, which
+    contain the checksums of the data in the blocks. It is only computed
+    again if the size or modification time of the file changes.
+    """
+    filepath = Path(filepath).resolve()
+    stat = filepath.stat()
+    return _file_checksum(filepath, stat.st_size, stat.st_mtime_ns)
+
+
+def _evict(cache_dir, max_size, keep=()):
+    """
+    Delete the least recently used files in ``cache_dir`` until it is no larger than ``max_size`` bytes.
+
+    The files in ``keep`` are not deleted.
+    """
+    files = []
+    for path in cache_dir.glob("*/*.npz"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime_ns, stat.st_size, path))
+
+    size = sum(file_size for _, file_size, _ in files)
+    for _, file_size, path in sorted(files, key=lambda file: file[0]):
+        if size <= max_size:
+            break
+        if path in keep:
+            continue
+        try:
+            path.unlink()
+        except OSError as err:
+            log.debug("Could not remove header cache %s: %s", path, err)
+            continue
+        size -= file_size
+        # Remove the directory of a table once none of its columns are cached
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+
+class HeaderSource:
+    """
+    A header table and the ASDF file it was read from.
+
+    Parameters
+    ----------
+    filepath : `pathlib.Path`
+        The ASDF file the table was read from.
+    key : `str`
+        A name for the table, unique within the ASDF file.
+    table : `astropy.table.Table` or `dkist.io.asdf.lazy_table.LazyTable`
+        The table as it was read from the file.
+    """
+
+    def __init__(self, filepath, key, table):
+        self.filepath = Path(filepath)
+        self.key = key
+        self.table = table
+        # The columns which have been read, from the cache files or the table
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # The table is never modified through this object, so copies can share it
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_columns"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self):
+        """
+        The directory the columns of this table are cached in.
+        """
+        return get_header_cache_dir() / f"{asdf_checksum(self.filepath)}-{self.key}"
+
+    def cache_file(self, name):
+        """
+        The file the column ``name`` is cached in.
+        """
+        # Header keys are valid file names, but make sure any other names are too
+        return self.cache_dir / f"{quote(name, safe='')}.npz"
+
+    def columns(self, names, rows=None, *, use_cache=True):
+        """
+        A table of the columns ``names`` of the rows ``rows`` of the header table.
+
+        Parameters
+        ----------
+        names : `list` of `str`
+            The names of the columns.
+        rows : array-like, optional
+            The rows of the table to select. Defaults to all rows.
+        use_cache : `bool`, optional
+            If `True` read the columns from the cache, and add the columns which
+            aren't cached yet to it.
+        """
+        if not use_cache:
+            table = Table([self.table[name] for name in names], names=names, copy=False)
+        else:
+            with self._lock:
+                written = []
+                for name in names:
+                    if name in self._columns:
+                        continue
+                    column = self._read_cache(name)
+                    if column is None:
+                        column = self.table[name]
+                        # Columns which can't be written to a cache file are only kept in memory
+                        if self._cacheable(column) and self._write_cache(name, column):
+                            written.append(self.cache_file(name))
+                    self._columns[name] = column
+                if written:
+                    from dkist.io import conf  # noqa: PLC0415
+
+                    max_size = parse_bytes(conf.header_cache_size)
+                    if max_size:
+                        _evict(get_header_cache_dir(), max_size, keep=written)
+            table = Table([self._columns[name] for name in names], names=names, copy=False)
+
+        if rows is None:
+            return table
+        return table[rows]
+
+    @staticmethod
+    def _cacheable(column):
+        # Object columns can't be written without pickle
+        return column.dtype.kind != "O"
+
+    def _read_cache(self, name):
+        """
+        Read the column ``name`` from its cache file, or return `None` if it isn't cached.
+        """
+        cache_file = self.cache_file(name)
+        if not cache_file.exists():
+            return None
+
+        try:
+            with np.load(cache_file, allow_pickle=False) as npz:
+                kwargs = {"name": name}
+                if "unit" in npz.files:
+                    kwargs["unit"] = str(npz["unit"])
+                if "meta" in npz.files:
+                    kwargs["meta"] = json.loads(str(npz["meta"]))
+                if "mask" in npz.files:
+                    column = MaskedColumn(npz["data"], mask=npz["mask"], **kwargs)
+                else:
+                    column = Column(npz["data"], **kwargs)
+            # Mark the file as recently used, so it is the last to be evicted
+            os.utime(cache_file)
+        except (OSError, ValueError, KeyError) as err:
+            log.debug("Ignoring header cache %s: %s", cache_file, err)
+            return None
+        return column
+
+    def _write_cache(self, name, column):
+        """
+        Write the column ``name`` to its cache file, returning `True` if it was written.
+        """
+        arrays = {"data": np.asarray(column)}
+        if isinstance(column, MaskedColumn):
+            arrays["mask"] = np.asarray(column.mask)
+        if column.unit is not None:
+            arrays["unit"] = np.array(column.unit.to_string())
+        if column.meta:
+            try:
+                arrays["meta"] = np.array(json.dumps(dict(column.meta)))
+            except TypeError:
+                log.debug("Not caching the metadata of header column %s", name)
+
+        cache_file = self.cache_file(name)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file so that other processes never read a partial cache
+            with tempfile.NamedTemporaryFile(dir=cache_file.parent, suffix=".tmp", delete=False) as fobj:
+                np.savez(fobj, **arrays)
+            Path(fobj.name).replace(cache_file)
+        except OSError as err:
+            log.debug("Could not write header cache %s: %s", cache_file, err)
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class HeaderRows:
+    """
+    The rows of a `HeaderSource` which the header table of a dataset was selected from.
+
+    Parameters
+    ----------
+    source : `HeaderSource`
+        The header table as it was read from the ASDF file.
+    rows : `slice`, `numpy.ndarray` or `None`
+        The rows of the source table, or `None` for all of them.
+    headers : `astropy.table.Table` or `dkist.io.asdf.lazy_table.LazyTable`
+        The header table of the dataset these rows were selected for. If the
+        dataset's headers are replaced they no longer match the source.
+    """
+    source: HeaderSource
+    rows: slice | np.ndarray | None
+    headers: object
+
+    def matches(self, headers):
+        """
+        Whether ``headers`` is the table these rows were selected for.
+        """
+        return headers is self.headers
+
+    def select(self, rows, headers):
+        """
+        The rows of the source selected by indexing these rows with ``rows``.
+
+        Parameters
+        ----------
+        rows : `slice`, array-like or `None`
+            The rows to select, relative to these rows. `None` selects all of them.
+        headers
+            The header table of the selected rows.
+        """
+        if rows is None:
+            rows = self.rows
+        elif self.rows is not None:
+            source_rows = self.rows
+            if isinstance(source_rows, slice):
+                source_rows = np.arange(len(self.source.table))[source_rows]
+            rows = source_rows[rows]
+        return type(self)(self.source, rows, headers)
+
+    def columns(self, names, *, use_cache=True):
+        """
+        A table of the columns ``names`` of these rows, see `HeaderSource.columns`.
+        """
+        return self.source.columns(names, self.rows, use_cache=use_cache)
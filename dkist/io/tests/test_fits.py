@@ -5,9 +5,12 @@ import pytest
 from numpy.testing import assert_allclose
 
 import asdf
+from astropy.io import fits
 
 from dkist.data.test import rootdir
-from dkist.io.dask.loaders import AstropyFITSLoader
+from dkist.io import conf
+from dkist.io.dask.loaders import AstropyFITSLoader, DirectFITSLoader, MemmapFITSLoader
+from dkist.io.dask.pool import FileHandlePool
 from dkist.io.dask.striped_array import FileManager
 
 eitdir = Path(rootdir) / "EIT"
@@ -88,3 +91,90 @@ def test_slicing(absolute_fl):
     sarr = absolute_fl[aslice]
 
     assert_allclose(sarr, absolute_fl.data[aslice])
+
+
+@pytest.fixture
+def direct_fl(absolute_ear):
+    return DirectFITSLoader(absolute_ear.fileuri, absolute_ear.shape, absolute_ear.dtype, absolute_ear.target, None)
+
+
+@pytest.mark.parametrize("aslice", [
+    np.s_[:],
+    np.s_[10:20, 10:20],
+    np.s_[5],
+    np.s_[..., 3],
+    np.s_[::-3, 7],
+    np.s_[100:10:-7, ::5],
+    np.s_[3:3],
+])
+def test_direct_slicing(absolute_fl, direct_fl, aslice):
+    expected = absolute_fl[aslice]
+    sarr = direct_fl[aslice]
+
+    assert sarr.shape == expected.shape
+    assert sarr.dtype.isnative
+    assert_allclose(sarr, expected)
+
+
+def test_direct_dummy_axis():
+    visp = Path(rootdir) / "small_visp"
+    astropy_fl = AstropyFITSLoader("0.fits", (1, 10, 25), "float64", 0, visp)
+    direct_fl = DirectFITSLoader("0.fits", (1, 10, 25), "float64", 0, visp)
+
+    for aslice in (np.s_[:], np.s_[0], np.s_[0, 3:5, 2], np.s_[:, ::2, -1]):
+        assert_allclose(direct_fl[aslice], astropy_fl[aslice])
+
+
+def test_direct_extensions(tmp_path):
+    data = np.arange(40 * 30, dtype=np.int32).reshape(40, 30)
+    fits.HDUList([fits.PrimaryHDU(np.zeros((3, 3), dtype=">i2")),
+                  fits.ImageHDU(data, name="IMAGE"),
+                  fits.CompImageHDU(data, name="COMPRESSED")]).writeto(tmp_path / "test.fits")
+
+    for target in (1, "image", 2, "COMPRESSED"):
+        fl = DirectFITSLoader("test.fits", (40, 30), "int32", target, tmp_path)
+        assert_allclose(fl[5:9, 2:4], data[5:9, 2:4])
+
+    with DirectFITSLoader("test.fits", (40, 30), "int32", 2, tmp_path)._open() as handle:
+        # Compressed data are read with astropy
+        assert handle.layout is None
+
+
+def test_direct_missing_file(tmp_path):
+    fl = DirectFITSLoader("missing.fits", (10, 10), "float64", 0, tmp_path)
+    assert np.isnan(fl.data).all()
+
+
+def test_loader_config():
+    with conf.set_temp("fits_loader", "direct"), asdf.open(eitdir / "eit_test_dataset.asdf") as f:
+        fm = f.tree["dataset"].files._fm
+
+    loader = fm._striped_external_array.loader_array.flat[0]
+    assert isinstance(loader, DirectFITSLoader)
+    assert not np.isnan(fm._generate_array()).any()
+
+
+def test_memmap_views(tmp_path):
+    data = np.arange(40 * 30, dtype=">f4").reshape(40, 30)
+    fits.PrimaryHDU(data).writeto(tmp_path / "test.fits")
+
+    pool = FileHandlePool()
+    fl = MemmapFITSLoader("test.fits", (40, 30), ">f4", 0, tmp_path, file_pool=pool)
+    sarr = fl[5:9, 2:4]
+
+    assert_allclose(sarr, data[5:9, 2:4])
+    assert not sarr.flags.writeable
+    assert not sarr.flags.owndata
+
+    # The view outlives the mapping being evicted from the pool
+    pool.clear()
+    assert_allclose(sarr, data[5:9, 2:4])
+
+
+def test_memmap_byteswap(absolute_fl):
+    fl = MemmapFITSLoader(absolute_fl.fileuri, absolute_fl.shape, "float64", 0, None)
+    sarr = fl[10:20, ::3]
+
+    assert sarr.dtype == np.dtype("float64")
+    assert sarr.flags.writeable
+    assert_allclose(sarr, absolute_fl[10:20, ::3])
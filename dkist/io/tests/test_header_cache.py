@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pytest
+
+import asdf
+import astropy.units as u
+from astropy.table import Column, Table
+
+from dkist.io import conf
+from dkist.io.header_cache import HeaderRows, HeaderSource, asdf_checksum
+
+
+@pytest.fixture
+def header_source(tmp_path, mocker):
+    mocker.patch("platformdirs.user_cache_dir", return_value=str(tmp_path / "cache"))
+    filepath = tmp_path / "headers.asdf"
+    table = Table({
+        "EXPTIME": Column([1.0, 2.0, 3.0], unit=u.s, meta={"comment": "exposure"}),
+        "DINDEX3": [1, 2, 3],
+        "OBJECT": np.array([1, "two", None], dtype=object),
+    })
+    asdf.AsdfFile({"data": np.arange(10)}).write_to(filepath)
+    return HeaderSource(filepath, "headers", table)
+
+
+def test_asdf_checksum(tmp_path):
+    filepath = tmp_path / "test.asdf"
+    asdf.AsdfFile({"data": np.arange(10)}).write_to(filepath)
+    checksum = asdf_checksum(filepath)
+    assert asdf_checksum(filepath) == checksum
+
+    # Changing only the data in a block changes the checksum
+    asdf.AsdfFile({"data": np.arange(10)[::-1].copy()}).write_to(filepath)
+    assert asdf_checksum(filepath) != checksum
+
+
+def test_header_source_cache(header_source, mocker):
+    columns = header_source.columns(["EXPTIME", "DINDEX3"])
+    assert header_source.cache_file("EXPTIME").exists()
+    assert header_source.cache_file("DINDEX3").exists()
+
+    # A new source for the same file reads the columns from the cache files
+    source = HeaderSource(header_source.filepath, header_source.key, header_source.table)
+    read = mocker.spy(source, "_read_cache")
+    cached = source.columns(["EXPTIME", "DINDEX3"], rows=[0, 2])
+    assert cached["EXPTIME"].unit == u.s
+    assert cached["EXPTIME"].meta == {"comment": "exposure"}
+    assert (cached == columns[[0, 2]]).all()
+
+    # Each cache file is only read once
+    source.columns(["DINDEX3"])
+    assert read.call_count == 2
+
+
+def test_header_source_uncacheable_column(header_source, mocker):
+    write = mocker.spy(header_source, "_write_cache")
+    header_source.columns(["DINDEX3"])
+    assert write.call_count == 1
+
+    # Object columns are not written to the cache
+    columns = header_source.columns(["OBJECT", "DINDEX3"])
+    assert columns["OBJECT"].tolist() == [1, "two", None]
+    assert write.call_count == 1
+    assert [f.name for f in header_source.cache_dir.iterdir()] == ["DINDEX3.npz"]
+
+    source = HeaderSource(header_source.filepath, header_source.key, header_source.table)
+    write = mocker.spy(source, "_write_cache")
+    source.columns(["OBJECT"])
+    write.assert_not_called()
+
+
+def test_header_source_cache_size(header_source, tmp_path):
+    header_source.columns(["EXPTIME"])
+    other = HeaderSource(tmp_path / "headers.asdf", "other", header_source.table)
+    other.columns(["EXPTIME"])
+    size = header_source.cache_file("EXPTIME").stat().st_size
+
+    # The least recently used column is removed, with the directory it was in
+    os.utime(header_source.cache_file("EXPTIME"), ns=(0, 0))
+    with conf.set_temp("header_cache_size", str(2 * size + 1)):
+        other.columns(["DINDEX3"])
+    assert not header_source.cache_dir.exists()
+    assert other.cache_file("EXPTIME").exists()
+    assert other.cache_file("DINDEX3").exists()
+
+
+def test_header_rows(header_source):
+    rows = HeaderRows(header_source, None, header_source.table)
+    assert rows.matches(header_source.table)
+    assert not rows.matches(header_source.table.copy())
+
+    sliced = rows.select(slice(1, None), None).select([1], None)
+    assert sliced.rows.tolist() == [2]
+    assert sliced.columns(["DINDEX3"])["DINDEX3"].tolist() == [3]
+    assert rows.select(None, None).rows is None
@@ -7,6 +7,7 @@ import astropy.units as u
 from astropy.modeling.models import Tabular1D
 
 from dkist import load_dataset, save_dataset
+from dkist.wcs import compile_wcs
 from dkist.wcs.models import (Ravel, generate_celestial_transform,
                               update_celestial_transform_parameters)
 
@@ -33,6 +34,16 @@ def test_pixel_to_world(benchmark, visp_dataset_no_headers):
     benchmark(ds.wcs.pixel_to_world_values, *pxcoords)
 
 
+@pytest.mark.benchmark
+@pytest.mark.parametrize("compiled", [False, True])
+def test_pixel_to_world_single_pixel(benchmark, compiled, visp_dataset_no_headers):
+    wcs = visp_dataset_no_headers.wcs.low_level_wcs
+    if compiled:
+        wcs = compile_wcs(wcs)
+
+    benchmark(wcs.pixel_to_world_values, 10, 20, 30, 1)
+
+
 @pytest.mark.benchmark
 @pytest.mark.walltime
 @pytest.mark.parametrize("axes", [
@@ -1,3 +1,7 @@
 """
 Functions, helpers and models for constructing WCSes.
 """
+from .compiled import CompiledTransform, CompiledWCS, compile_transform, compile_wcs
+from .utils import dask_pixel_to_world_values
+
+__all__ = ["CompiledTransform", "CompiledWCS", "compile_transform", "compile_wcs", "dask_pixel_to_world_values"]
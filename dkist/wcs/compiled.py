@@ -0,0 +1,474 @@
+"""
+Compiled evaluation of the transforms of DKIST WCSes.
+
+The transforms of DKIST WCSes are deep trees of compound models. Calling one
+validates the inputs, handles units and broadcasts for every node of the
+tree, which costs a few milliseconds per call however few pixels are
+converted. Compiling a transform walks the tree once and flattens it into a
+list of numpy functions acting on unitless arrays, with any unit conversions
+worked out in advance, so that evaluating it only costs the arithmetic.
+"""
+import numpy as np
+
+import astropy.units as u
+from astropy.modeling import CompoundModel
+from astropy.modeling import models as m
+from astropy.wcs.wcsapi.wrappers import SlicedLowLevelWCS
+from astropy.wcs.wcsapi.wrappers.base import BaseWCSWrapper
+
+from dkist.wcs.models import BaseVaryingCelestialTransform, CoupledCompoundModel, Ravel, Unravel
+
+__all__ = ["CompiledTransform", "CompiledWCS", "compile_transform", "compile_wcs"]
+
+# Models for which calling ``evaluate`` with the raw parameter values gives the
+# same result as calling the model with inputs in its input units.
+_EVALUATE_MODELS = (
+    m.Shift,
+    m.Scale,
+    m.Multiply,
+    m.Const1D,
+    m.Linear1D,
+    m.AffineTransformation2D,
+    m.Rotation2D,
+    m.Pix2SkyProjection,
+    m.Sky2PixProjection,
+    m.RotateNative2Celestial,
+    m.RotateCelestial2Native,
+    Ravel,
+    Unravel,
+)
+
+
+def _as_tuple(outputs, n_outputs):
+    return (outputs,) if n_outputs == 1 else tuple(outputs)
+
+
+def _scale_kernel(factor):
+    def kernel(array):
+        return (array * factor,)
+    return kernel
+
+
+def _evaluate_kernel(model):
+    parameters = model._param_sets(raw=True, units=False)
+    n_outputs = model.n_outputs
+
+    def kernel(*arrays):
+        return _as_tuple(model.evaluate(*arrays, *parameters), n_outputs)
+    return kernel
+
+
+def _varying_celestial_kernel(model):
+    # These models convert their parameters to the units they need themselves
+    parameters = model._param_sets(raw=True, units=True)
+    if type(model.projection) is not m.Pix2Sky_TAN:
+        def kernel(*arrays):
+            return tuple(model.evaluate(*arrays, *parameters))
+        return kernel
+
+    # The parameters are fixed, so the TAN parameters for every index can be looked up once
+    cdelt, lon_pole = (parameter[0] for parameter in parameters)
+    cdelt = cdelt.to_value(u.deg / u.pix) if isinstance(cdelt, u.Quantity) else cdelt
+    lon_pole = lon_pole.to_value(u.deg) if isinstance(lon_pole, u.Quantity) else lon_pole
+    index_parameters = model._compute_index_parameters(cdelt)
+    lon_pole = np.deg2rad(lon_pole)
+
+    def kernel(x, y, *inds):
+        x, y, *inds = np.broadcast_arrays(x, y, *inds)
+        inds = [model.sanitize_index(ind) for ind in inds]
+        return model._map_tan_with_parameters(x, y, inds, index_parameters, lon_pole, inverse=model._is_inverse)
+    return kernel
+
+
+def _tabular_kernel(model):
+    if model.lookup_table.ndim != 1 or model.bounds_error or model.fill_value is None:
+        return None
+    points = np.asarray(u.Quantity(model.points[0]).value, dtype=float)
+    values = np.asarray(u.Quantity(model.lookup_table).value)
+    if len(points) < 2 or model.method not in ("linear", "nearest"):
+        return None
+    if points[0] > points[-1]:
+        points, values = points[::-1], values[::-1]
+    fill_value = model.fill_value
+
+    if model.method == "linear":
+        def kernel(x):
+            return (np.interp(x, points, values, left=fill_value, right=fill_value),)
+        return kernel
+
+    def kernel(x):
+        # The same choice of the nearest point as scipy.interpolate.interpn
+        i = np.clip(np.searchsorted(points, x) - 1, 0, len(points) - 2)
+        with np.errstate(invalid="ignore"):
+            distance = (x - points[i]) / (points[i + 1] - points[i])
+        result = values[np.where(distance <= 0.5, i, i + 1)].astype(float)
+        result[(x < points[0]) | (x > points[-1]) | np.isnan(x)] = fill_value
+        return (result,)
+    return kernel
+
+
+def _model_kernel(model, input_units, output_units):
+    """
+    Call ``model`` itself, for models which can't be compiled.
+    """
+    n_outputs = model.n_outputs
+
+    def kernel(*arrays):
+        inputs = [array if unit is None else array << unit for array, unit in zip(arrays, input_units)]
+        outputs = _as_tuple(model(*inputs), n_outputs)
+        return tuple(
+            output if unit is None else u.Quantity(output).to_value(unit)
+            for output, unit in zip(outputs, output_units)
+        )
+    return kernel
+
+
+def _leaf_kernel(model):
+    if isinstance(model, BaseVaryingCelestialTransform):
+        return _varying_celestial_kernel(model)
+    if isinstance(model, m.Tabular1D):
+        return _tabular_kernel(model)
+    if isinstance(model, _EVALUATE_MODELS) and len(model) == 1:
+        return _evaluate_kernel(model)
+    return None
+
+
+class _Compiler:
+    """
+    Flatten a model tree into a list of steps acting on numbered arrays.
+
+    The arrays are called registers here. The inputs of the model are the
+    first registers and every step reads some registers and writes its
+    outputs to new ones. Mappings don't need a step, they only change which
+    registers are passed on to the next model.
+    """
+
+    def __init__(self, n_inputs):
+        self.n_inputs = n_inputs
+        self.n_registers = n_inputs
+        self.steps = []
+        # The inputs each register depends on, the inputs which are used as
+        # indices into lookup tables and the sizes of the tables along them
+        self.sources = [frozenset([i]) for i in range(n_inputs)]
+        self.lookup_inputs = set()
+        self.lookup_sizes = {}
+
+    def add_step(self, kernel, inputs, n_outputs):
+        outputs = list(range(self.n_registers, self.n_registers + n_outputs))
+        self.n_registers += n_outputs
+        self.steps.append((kernel, tuple(inputs), tuple(outputs)))
+        self.sources.extend([frozenset().union(*(self.sources[i] for i in inputs))] * n_outputs)
+        return outputs
+
+    def add_lookup(self, registers, sizes):
+        """
+        Record that ``registers`` index a lookup table with ``sizes`` along each axis.
+        """
+        for register, size in zip(registers, sizes):
+            self.lookup_inputs.update(self.sources[register])
+            # The size is only known for the inputs which index the table directly
+            if register < self.n_inputs:
+                self.lookup_sizes[register] = max(self.lookup_sizes.get(register, 0), int(size))
+
+    def compile(self, model, registers, units):
+        """
+        Add the steps to evaluate ``model`` on ``registers``, which have ``units``.
+
+        Returns the registers of the outputs of the model and their units.
+        """
+        if isinstance(model, m.Mapping):
+            return [registers[i] for i in model.mapping], [units[i] for i in model.mapping]
+
+        if isinstance(model, CoupledCompoundModel):
+            left = self.compile(model.left, registers[:model.left.n_inputs], units[:model.left.n_inputs])
+            right = self.compile(model.right, registers[-model.right.n_inputs:], units[-model.right.n_inputs:])
+            return left[0] + right[0], left[1] + right[1]
+
+        if isinstance(model, CompoundModel) and model.op == "|":
+            registers, units = self.compile(model.left, registers, units)
+            return self.compile(model.right, registers, units)
+
+        if isinstance(model, CompoundModel) and model.op == "&":
+            n_left = model.left.n_inputs
+            left = self.compile(model.left, registers[:n_left], units[:n_left])
+            right = self.compile(model.right, registers[n_left:], units[n_left:])
+            return left[0] + right[0], left[1] + right[1]
+
+        return self.compile_leaf(model, registers, units)
+
+    def compile_leaf(self, model, registers, units):
+        registers, units = list(registers), list(units)
+        if isinstance(model, BaseVaryingCelestialTransform):
+            self.add_lookup(registers[2:], model.table_shape)
+        elif isinstance(model, (m.Tabular1D, m.Tabular2D)):
+            self.add_lookup(registers, [np.floor(np.max(u.Quantity(points).value)) + 1 for points in model.points])
+        kernel = None if isinstance(model, CompoundModel) else _leaf_kernel(model)
+
+        # Convert the inputs to the units the model expects, as calling it would
+        if kernel is not None and model.input_units:
+            for i, name in enumerate(model.inputs):
+                expected = model.input_units.get(name)
+                if expected is None or units[i] is None or units[i] == expected:
+                    continue
+                try:
+                    factor = units[i].to(expected)
+                except u.UnitsError:
+                    kernel = None
+                    break
+                registers[i], = self.add_step(_scale_kernel(factor), [registers[i]], 1)
+                units[i] = expected
+
+        # The units of the outputs only depend on the units of the inputs, so
+        # find them by calling the model once
+        probe = [np.zeros(1) if unit is None else np.zeros(1) << unit for unit in units]
+        outputs = _as_tuple(model(*probe), model.n_outputs)
+        output_units = [getattr(output, "unit", None) for output in outputs]
+
+        if kernel is None:
+            kernel = _model_kernel(model, units, output_units)
+        return self.add_step(kernel, registers, model.n_outputs), output_units
+
+
+class CompiledTransform:
+    """
+    A model compiled to a flat list of numpy functions on unitless arrays.
+
+    Use `compile_transform` to create one.
+
+    Parameters
+    ----------
+    model : `astropy.modeling.Model`
+        The model to compile.
+    input_units : `tuple` of `astropy.units.Unit`, optional
+        The units the inputs will be given in. ``None`` for any input means
+        that input is passed to the model without units. Defaults to no units.
+    output_units : `tuple` of `astropy.units.Unit`, optional
+        The units to return the outputs in. Defaults to the units the model
+        returns.
+    """
+
+    def __init__(self, model, input_units=None, output_units=None):
+        self.model = model
+        self.input_units = tuple(input_units or [None] * model.n_inputs)
+        if len(self.input_units) != model.n_inputs:
+            raise ValueError(f"Expected {model.n_inputs} input units, got {len(self.input_units)}.")
+
+        compiler = _Compiler(model.n_inputs)
+        self._outputs, units = compiler.compile(model, list(range(model.n_inputs)), list(self.input_units))
+        self._steps = compiler.steps
+        self._n_registers = compiler.n_registers
+        #: The inputs which are used, possibly after other steps, as indices into lookup tables.
+        self.lookup_inputs = frozenset(compiler.lookup_inputs)
+        #: The sizes of the lookup tables along the inputs which index them directly.
+        self.lookup_sizes = dict(compiler.lookup_sizes)
+
+        if output_units is None:
+            output_units = units
+        self.output_units = tuple(output_units)
+        if len(self.output_units) != model.n_outputs:
+            raise ValueError(f"Expected {model.n_outputs} output units, got {len(self.output_units)}.")
+        self._output_factors = [
+            1 if unit is None or target is None else unit.to(target)
+            for unit, target in zip(units, self.output_units)
+        ]
+
+    @property
+    def n_inputs(self):
+        return self.model.n_inputs
+
+    @property
+    def n_outputs(self):
+        return self.model.n_outputs
+
+    def __repr__(self):
+        return f"<{type(self).__name__}({self.model.name or type(self.model).__name__}, steps={len(self._steps)})>"
+
+    def __call__(self, *inputs):
+        """
+        Evaluate the compiled model.
+
+        The inputs are values in ``input_units`` and the outputs are values
+        in ``output_units``, all with the broadcast shape of the inputs. As
+        for a model, a single output is returned on its own and multiple
+        outputs as a tuple.
+        """
+        if len(inputs) != self.n_inputs:
+            raise ValueError(f"Expected {self.n_inputs} inputs, got {len(inputs)}.")
+        arrays = np.broadcast_arrays(*(np.asarray(array, dtype=float) for array in inputs))
+        shape = arrays[0].shape
+
+        registers = [None] * self._n_registers
+        registers[:self.n_inputs] = [array.reshape(-1) for array in arrays]
+        for kernel, step_inputs, step_outputs in self._steps:
+            for register, output in zip(step_outputs, kernel(*(registers[i] for i in step_inputs))):
+                registers[register] = output
+
+        outputs = []
+        for register, factor in zip(self._outputs, self._output_factors):
+            output = registers[register] if factor == 1 else registers[register] * factor
+            outputs.append(np.broadcast_to(output, (int(np.prod(shape)),)).reshape(shape)[()])
+        return outputs[0] if self.n_outputs == 1 else tuple(outputs)
+
+    def evaluate_model(self, *inputs):
+        """
+        Evaluate the model tree this was compiled from on the same inputs.
+        """
+        inputs = [array if unit is None else np.asarray(array, dtype=float) << unit
+                  for array, unit in zip(inputs, self.input_units)]
+        outputs = _as_tuple(self.model(*inputs), self.n_outputs)
+        outputs = [
+            output if unit is None else u.Quantity(output).to_value(unit)
+            for output, unit in zip(outputs, self.output_units)
+        ]
+        return outputs[0] if self.n_outputs == 1 else tuple(outputs)
+
+    def check(self, *inputs, rtol=1e-12, atol=0):
+        """
+        Check that the compiled model gives the same result as the model tree.
+
+        Raises
+        ------
+        ValueError
+            If any output differs by more than the tolerances.
+        """
+        expected = _as_tuple(self.evaluate_model(*inputs), self.n_outputs)
+        result = _as_tuple(self(*inputs), self.n_outputs)
+        for i, (value, expected_value) in enumerate(zip(result, expected)):
+            if not np.allclose(value, expected_value, rtol=rtol, atol=atol, equal_nan=True):
+                raise ValueError(f"Output {i} of the compiled {self.model.name or 'model'} does not match the model.")
+
+
+def compile_transform(model, input_units=None, output_units=None):
+    """
+    Compile a model to a flat list of numpy functions on unitless arrays.
+
+    Evaluating the compiled model gives the same result as calling the model,
+    but without validating and converting the inputs of every model in the
+    tree, which makes it much faster for small numbers of points.
+
+    Parameters
+    ----------
+    model : `astropy.modeling.Model`
+        The model to compile.
+    input_units : `tuple` of `astropy.units.Unit`, optional
+        The units the inputs will be given in. Defaults to no units.
+    output_units : `tuple` of `astropy.units.Unit`, optional
+        The units to return the outputs in. Defaults to the units the model
+        returns.
+
+    Returns
+    -------
+    `CompiledTransform`
+    """
+    return CompiledTransform(model, input_units=input_units, output_units=output_units)
+
+
+def _transform_units(transform, input_frame, output_frame):
+    # gwcs only adds units to the inputs if the transform uses them
+    if not transform.uses_quantity or input_frame is None or output_frame is None:
+        return None, None
+    return tuple(input_frame.unit), tuple(output_frame.unit)
+
+
+class CompiledWCS(BaseWCSWrapper):
+    """
+    A gWCS with its forward and backward transforms compiled.
+
+    This is a low level WCS which gives the same values as the gWCS it wraps,
+    but converts small numbers of points much faster. Both transforms are
+    checked against the gWCS when it is created.
+
+    Parameters
+    ----------
+    wcs : `gwcs.WCS`
+        The WCS to compile. It must not have a bounding box.
+    check : `bool`, optional
+        If `True` check the compiled transforms against the gWCS.
+    """
+
+    def __init__(self, wcs, check=True):
+        super().__init__(wcs)
+        if wcs.bounding_box is not None:
+            raise ValueError("Compiling a WCS with a bounding box is not supported.")
+
+        forward = wcs.forward_transform
+        self._forward = compile_transform(forward, *_transform_units(forward, wcs.input_frame, wcs.output_frame))
+        try:
+            backward = wcs.backward_transform
+        except NotImplementedError:
+            self._backward = None
+        else:
+            self._backward = compile_transform(backward, *_transform_units(backward, wcs.output_frame, wcs.input_frame))
+
+        if check:
+            self.check()
+
+    def check(self, rtol=1e-12, atol=0):
+        """
+        Check the compiled transforms against the gWCS on a sample of pixels.
+
+        The pixels are every combination of the pixel indices along the axes
+        which index lookup tables, each at five points along the diagonal of
+        the other axes. This checks every entry of the lookup tables, which
+        are the parts of the transforms which vary most between datasets. If
+        the WCS has no ``pixel_shape``, the number of indices along each axis
+        is the size of the lookup tables indexed by it.
+
+        Raises
+        ------
+        ValueError
+            If the compiled transforms don't match the gWCS.
+        """
+        shape = self._wcs.pixel_shape
+        if shape is None:
+            shape = [self._forward.lookup_sizes.get(axis, 5) for axis in range(self.pixel_n_dim)]
+        lookup_axes = sorted(self._forward.lookup_inputs)
+        table_pixels = np.indices([shape[i] for i in lookup_axes]).reshape(len(lookup_axes), -1)
+        pixel = [np.linspace(0, n - 1, 5)[:, None] for n in shape]
+        for axis, index in zip(lookup_axes, table_pixels):
+            pixel[axis] = index[None, :]
+        pixel = [array.ravel() for array in np.broadcast_arrays(*pixel)]
+        self._forward.check(*pixel, rtol=rtol, atol=atol)
+        if self._backward is not None:
+            world = np.array(_as_tuple(self._wcs.pixel_to_world_values(*pixel), self.world_n_dim))
+            # Pixels with no world coordinates can't be converted back
+            world = world[:, np.isfinite(world).all(axis=0)]
+            self._backward.check(*world, rtol=rtol, atol=atol)
+
+    def pixel_to_world_values(self, *pixel_arrays):
+        return self._forward(*pixel_arrays)
+
+    def world_to_pixel_values(self, *world_arrays):
+        if self._backward is None:
+            return self._wcs.world_to_pixel_values(*world_arrays)
+        return self._backward(*world_arrays)
+
+
+def compile_wcs(wcs, check=True):
+    """
+    Compile the transforms of a DKIST WCS.
+
+    Parameters
+    ----------
+    wcs : `gwcs.WCS` or `astropy.wcs.wcsapi.SlicedLowLevelWCS`
+        The WCS of a dataset, as returned by ``Dataset.wcs``. A high level WCS
+        with a ``low_level_wcs`` is also accepted.
+    check : `bool`, optional
+        If `True` check the compiled transforms against the WCS.
+
+    Returns
+    -------
+    `astropy.wcs.wcsapi.BaseLowLevelWCS`
+        A `CompiledWCS`, or a `~astropy.wcs.wcsapi.SlicedLowLevelWCS` of one
+        if ``wcs`` was sliced.
+
+    Examples
+    --------
+    >>> from dkist.wcs import compile_wcs
+    >>> wcs = compile_wcs(ds.wcs)  # doctest: +SKIP
+    >>> wcs.pixel_to_world_values(10, 20, 0, 0)  # doctest: +SKIP
+    """
+    wcs = getattr(wcs, "low_level_wcs", wcs)
+    if isinstance(wcs, SlicedLowLevelWCS):
+        return SlicedLowLevelWCS(CompiledWCS(wcs._wcs, check=check), wcs._slices_array)
+    return CompiledWCS(wcs, check=check)
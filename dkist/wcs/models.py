@@ -1,6 +1,9 @@
+import copy
+import threading
 from abc import ABC
 from typing import Literal
-from itertools import product
+from functools import partial
+from collections import OrderedDict
 from collections.abc import Iterable
 
 import numpy as np
@@ -148,6 +151,113 @@ def update_celestial_transform_parameters(
     return transform
 
 
+class _ParameterCache:
+    """
+    A bounded, thread safe, least recently used cache.
+
+    Copies and pickles of the cache are empty, so that models holding one can
+    be copied.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Get the value for ``key``, calling ``compute()`` to create it if it isn't cached.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __deepcopy__(self, memo):
+        return type(self)(self.maxsize)
+
+    def __reduce__(self):
+        return type(self), (self.maxsize,)
+
+
+class _Identity:
+    """
+    Compare and hash an object by its identity.
+
+    This keeps the object alive, so its id can't be reused while it is part
+    of a cache key.
+    """
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+    def __hash__(self):
+        return id(self.obj)
+
+
+# The attributes of a model, other than its parameters, which its inverse is built from
+_INVERSE_ATTRIBUTES = ("lookup_table", "points", "pc_table", "crval_table", "crpix_table", "projection")
+
+
+def _inverse_key(model):
+    """
+    A cache key for the inverse of ``model``.
+
+    The key changes if the parameters change, or if any submodel, inverse set
+    on a submodel, or lookup table is replaced. Modifying a lookup table in
+    place is not detected.
+    """
+    key = [model.parameters.tobytes()]
+    submodels = model.traverse_postorder() if isinstance(model, CompoundModel) else [model]
+    for submodel in submodels:
+        key.append(_Identity(submodel))
+        key.append(_Identity(submodel._user_inverse))
+        key.extend(_Identity(getattr(submodel, name, None)) for name in _INVERSE_ATTRIBUTES)
+    return tuple(key)
+
+
+class _PerThread:
+    """
+    One object for each thread, created by ``factory`` when it is first needed.
+
+    Copies and pickles start without any objects.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def get(self):
+        obj = getattr(self._local, "obj", None)
+        if obj is None:
+            obj = self._local.obj = self.factory()
+        return obj
+
+    def __deepcopy__(self, memo):
+        return type(self)(copy.deepcopy(self.factory, memo))
+
+    def __reduce__(self):
+        return type(self), (self.factory,)
+
+
 class BaseVaryingCelestialTransform(Model, ABC):
     """
     Shared components between the forward and reverse varying celestial transforms.
@@ -165,6 +275,14 @@ class BaseVaryingCelestialTransform(Model, ABC):
 
     n_outputs = 2
 
+    #: The number of values of ``cdelt`` to keep the precomputed parameters of
+    #: every lookup table index for. Set to 0 to compute them on every call.
+    parameter_cache_size = 4
+
+    #: The number of points the vectorised TAN transform is evaluated for at
+    #: once, which bounds the memory used by its temporary arrays.
+    tan_block_size = 2**14
+
     @staticmethod
     def _validate_table_shapes(pc_table, crval_table, crpix_table):
         table_shape = None
@@ -204,12 +322,7 @@ class BaseVaryingCelestialTransform(Model, ABC):
     @deprecated_renamed_argument("crpix", "crpix_table", "1.12", warning_type=DKISTDeprecationWarning)
     def __init__(self, *args, crval_table=None, pc_table=None, crpix_table=None, projection=m.Pix2Sky_TAN(), **kwargs):
         super().__init__(*args, **kwargs)
-        (
-            self.table_shape,
-            self.pc_table,
-            self.crval_table,
-            self.crpix_table
-        ) = self._validate_table_shapes(np.asanyarray(pc_table), np.asanyarray(crval_table), np.asanyarray(crpix_table))
+        self._set_tables(pc_table, crval_table, crpix_table)
 
         if not isinstance(projection, m.Pix2SkyProjection):
             raise TypeError("The projection keyword should be a Pix2SkyProjection model class.")
@@ -222,10 +335,8 @@ class BaseVaryingCelestialTransform(Model, ABC):
             self.inputs = ("x", "y", "z", "q", "m")[:self.n_inputs]
             self.outputs = ("lon", "lat")
 
-        if len(self.table_shape) != self.n_inputs-2:
-            raise ValueError(f"This model can only be constructed with a {self.n_inputs-2}-dimensional lookup table.")
-
-        self._transform = generate_celestial_transform(
+        self._new_transform = partial(
+            generate_celestial_transform,
             crpix=[0, 0],
             cdelt=[1, 1],
             pc=np.identity(2),
@@ -233,6 +344,88 @@ class BaseVaryingCelestialTransform(Model, ABC):
             lon_pole=180,
             projection=projection,
         )
+        # Each thread updates the parameters of its own transform in place
+        self._thread_transforms = _PerThread(self._new_transform)
+
+    def _set_tables(self, pc_table, crval_table, crpix_table):
+        """
+        Validate and set the lookup tables, and start new caches for them.
+        """
+        table_shape, *tables = self._validate_table_shapes(
+            np.asanyarray(pc_table), np.asanyarray(crval_table), np.asanyarray(crpix_table),
+        )
+        if len(table_shape) != self.n_inputs-2:
+            raise ValueError(f"This model can only be constructed with a {self.n_inputs-2}-dimensional lookup table.")
+
+        # The tables can only be replaced, not modified in place, so the
+        # caches only need to be replaced when they are set. The inverse
+        # shares the old caches, so they are not cleared.
+        self.table_shape = table_shape
+        self._pc_table, self._crval_table, self._crpix_table = (self._readonly(table) for table in tables)
+        self._parameter_cache = _ParameterCache(self.parameter_cache_size) if self.parameter_cache_size else None
+        self._inverse_cache = _ParameterCache(1)
+
+    @staticmethod
+    def _readonly(table):
+        table = table.view()
+        table.flags.writeable = False
+        return table
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Copied tables are writeable again
+        for name in ("_pc_table", "_crval_table", "_crpix_table"):
+            self.__dict__[name] = self._readonly(state[name])
+
+    @property
+    def pc_table(self):
+        return self._pc_table
+
+    @pc_table.setter
+    def pc_table(self, value):
+        self._set_tables(value, self.crval_table, self.crpix_table)
+
+    @property
+    def crval_table(self):
+        return self._crval_table
+
+    @crval_table.setter
+    def crval_table(self, value):
+        self._set_tables(self.pc_table, value, self.crpix_table)
+
+    @property
+    def crpix_table(self):
+        return self._crpix_table
+
+    @crpix_table.setter
+    def crpix_table(self, value):
+        self._set_tables(self.pc_table, self.crval_table, value)
+
+    def _with_shared_cache(self, model):
+        # The inverse transform uses the same precomputed parameters
+        model._parameter_cache = self._parameter_cache
+        return model
+
+    def _cached_inverse(self, inverse_class):
+        """
+        The inverse model, which is only built again when the parameters or tables change.
+
+        The inverse shares the lookup tables and the precomputed parameters of
+        this model. The same inverse is returned by every call, so it should
+        be treated as read-only, use ``model.inverse.copy()`` to modify it.
+        """
+        def build():
+            return self._with_shared_cache(inverse_class(
+                crpix_table=self.crpix_table,
+                cdelt=self.cdelt,
+                lon_pole=self.lon_pole,
+                pc_table=self.pc_table,
+                crval_table=self.crval_table,
+                projection=self.projection,
+            ))
+
+        key = (_inverse_key(self), self.cdelt.unit, self.lon_pole.unit)
+        return self._inverse_cache.get(key, build)
 
     @property
     @deprecated(since="1.12", alternative="crpix_table")
@@ -243,6 +436,9 @@ class BaseVaryingCelestialTransform(Model, ABC):
         """
         Generate a spatial model based on an index for the pc and crval tables.
 
+        Every call returns a new model, so the models can be used from
+        different threads.
+
         Parameters
         ----------
         zind : int
@@ -256,13 +452,19 @@ class BaseVaryingCelestialTransform(Model, ABC):
         -------
         `astropy.modeling.CompoundModel`
 
+        """
+        return self._update_transform(self._new_transform(), ind, cdelt=cdelt, lon_pole=lon_pole)
+
+    def _update_transform(self, transform, ind, cdelt=None, lon_pole=None):
+        """
+        Set the parameters of ``transform`` to the ones at index ``ind`` of the tables.
         """
         # If we are out of bounds of the lookup table return a constant model
         fill_val = np.nan
         if (np.array(ind) > np.array(self.table_shape) - 1).any() or (np.array(ind) < 0).any():
             return m.Const1D(fill_val) & m.Const1D(fill_val)
 
-        # The self._transform is always unitless and always in degrees.
+        # The transform is always unitless and always in degrees.
         # So we need to strip down the parameters to be in the correct units
 
         # If we are being called from inside evaluate we can skip the lookup
@@ -300,7 +502,7 @@ class BaseVaryingCelestialTransform(Model, ABC):
             lon_pole = lon_pole.to_value(u.deg)
 
         return update_celestial_transform_parameters(
-            self._transform,
+            transform,
             crpix=crpix,
             cdelt=cdelt,
             pc=pc,
@@ -308,6 +510,212 @@ class BaseVaryingCelestialTransform(Model, ABC):
             lon_pole=lon_pole,
         )
 
+    def _unitless_tables(self):
+        """
+        The pc, crval and crpix tables without units, in the units used by ``self._transform``.
+        """
+        tables = []
+        for table, unit in ((self.pc_table, u.pix), (self.crval_table, u.deg), (self.crpix_table, u.pix)):
+            if isinstance(table, u.Quantity):
+                table = table.to_value(unit)
+            tables.append(np.asarray(table, dtype=float))
+        return tables
+
+    def _compute_index_parameters(self, cdelt):
+        """
+        The parameters of the TAN transform for every index of the lookup tables.
+
+        The arrays are flattened over the table shape.
+        """
+        pc_table, crval_table, crpix_table = self._unitless_tables()
+        # The affine transform followed by the scale is one matrix
+        matrix = pc_table.reshape(-1, 2, 2) * np.asarray(cdelt)[:, None]
+        lat_ref = np.deg2rad(crval_table.reshape(-1, 2)[:, 1])
+        return {
+            "matrix": matrix,
+            "inverse_matrix": np.linalg.inv(matrix),
+            "crpix": crpix_table.reshape(-1, 2),
+            "lon_ref": crval_table.reshape(-1, 2)[:, 0],
+            "sin_lat_ref": np.sin(lat_ref),
+            "cos_lat_ref": np.cos(lat_ref),
+        }
+
+    def _index_parameters(self, cdelt):
+        """
+        The parameters for every index, from the cache if ``cdelt`` has been used before.
+        """
+        if self._parameter_cache is None:
+            return self._compute_index_parameters(cdelt)
+        key = tuple(np.asarray(cdelt, dtype=float))
+        return self._parameter_cache.get(key, lambda: self._compute_index_parameters(cdelt))
+
+    def _map_tan(self, x, y, inds, cdelt, lon_pole, inverse=False):
+        """
+        Evaluate a TAN transform for every pixel at once.
+
+        This computes the same thing as calling ``transform_at_index`` for
+        every index, but with the parameters for each pixel looked up from the
+        tables and all the steps of the transform done as array operations.
+        """
+        if isinstance(cdelt, u.Quantity):
+            cdelt = cdelt.to_value(u.deg / u.pix)
+        if isinstance(lon_pole, u.Quantity):
+            lon_pole = lon_pole.to_value(u.deg)
+        return self._map_tan_with_parameters(
+            x, y, inds, self._index_parameters(cdelt), np.deg2rad(lon_pole), inverse=inverse,
+        )
+
+    def _map_tan_with_parameters(self, x, y, inds, params, lon_pole, inverse=False):
+        """
+        Evaluate a TAN transform with the parameters from ``_index_parameters``.
+
+        ``lon_pole`` is in radians. The points are evaluated in blocks of
+        ``tan_block_size``, so the temporary arrays don't use more memory than
+        the outputs however many points there are.
+        """
+        n_inds = len(inds)
+        iterator = np.nditer(
+            [x, y, *inds, None, None],
+            flags=["external_loop", "buffered", "zerosize_ok"],
+            op_flags=[["readonly"]] * (n_inds + 2) + [["writeonly", "allocate"]] * 2,
+            op_dtypes=[float, float] + [int] * n_inds + [float, float],
+            buffersize=self.tan_block_size,
+        )
+        with iterator, np.errstate(invalid="ignore", divide="ignore"):
+            for x_block, y_block, *ind_blocks, x_out, y_out in iterator:
+                x_out[...], y_out[...] = self._map_tan_block(
+                    x_block, y_block, ind_blocks, params, lon_pole, inverse=inverse,
+                )
+            return iterator.operands[-2], iterator.operands[-1]
+
+    def _map_tan_block(self, x, y, inds, params, lon_pole, inverse=False):
+        # Look up the parameters for each pixel, out of bounds indices give nan
+        in_bounds = np.ones(np.shape(x), dtype=bool)
+        for ind, size in zip(inds, self.table_shape):
+            in_bounds &= (ind >= 0) & (ind < size)
+        flat_ind = np.ravel_multi_index(tuple(np.where(in_bounds, ind, 0) for ind in inds), self.table_shape)
+        crpix = params["crpix"][flat_ind]
+        lon_ref = params["lon_ref"][flat_ind]
+        sin_lat_ref = params["sin_lat_ref"][flat_ind]
+        cos_lat_ref = params["cos_lat_ref"][flat_ind]
+
+        if inverse:
+            x_out, y_out = self._tan_world_to_pixel(
+                x, y, params["inverse_matrix"][flat_ind], crpix, lon_ref, sin_lat_ref, cos_lat_ref, lon_pole,
+            )
+        else:
+            x_out, y_out = self._tan_pixel_to_world(
+                x, y, params["matrix"][flat_ind], crpix, lon_ref, sin_lat_ref, cos_lat_ref, lon_pole,
+            )
+        x_out[~in_bounds] = np.nan
+        y_out[~in_bounds] = np.nan
+        return x_out, y_out
+
+    @staticmethod
+    def _tan_pixel_to_world(x, y, matrix, crpix, lon_ref, sin_lat_ref, cos_lat_ref, lon_pole):
+        # Shift, rotate and scale to intermediate world coordinates
+        dx = x - crpix[..., 0]
+        dy = y - crpix[..., 1]
+        xi = matrix[..., 0, 0] * dx + matrix[..., 0, 1] * dy
+        eta = matrix[..., 1, 0] * dx + matrix[..., 1, 1] * dy
+
+        # Deproject onto the native sphere
+        r = np.hypot(xi, eta)
+        phi = np.where(r == 0, 0, np.arctan2(xi, -eta))
+        theta = np.arctan2(np.rad2deg(1), r)
+
+        # Rotate the native sphere to the celestial sphere
+        dphi = phi - lon_pole
+        sin_theta, cos_theta = np.sin(theta), np.cos(theta)
+        xx = sin_theta * cos_lat_ref - cos_theta * sin_lat_ref * np.cos(dphi)
+        yy = -cos_theta * np.sin(dphi)
+        zz = sin_theta * sin_lat_ref + cos_theta * cos_lat_ref * np.cos(dphi)
+        lon = np.mod(lon_ref + np.rad2deg(np.arctan2(yy, xx)), 360)
+        lat = np.rad2deg(np.arctan2(zz, np.hypot(xx, yy)))
+        return lon, lat
+
+    @staticmethod
+    def _tan_world_to_pixel(lon, lat, inverse_matrix, crpix, lon_ref, sin_lat_ref, cos_lat_ref, lon_pole):
+        # Rotate the celestial sphere to the native sphere
+        dlon = np.deg2rad(lon - lon_ref)
+        lat = np.deg2rad(lat)
+        sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+        xx = sin_lat * cos_lat_ref - cos_lat * sin_lat_ref * np.cos(dlon)
+        yy = -cos_lat * np.sin(dlon)
+        sin_theta = sin_lat * sin_lat_ref + cos_lat * cos_lat_ref * np.cos(dlon)
+        phi = lon_pole + np.arctan2(yy, xx)
+
+        # Project onto the plane, points on or behind the native equator have no projection
+        r = np.rad2deg(1) * np.hypot(xx, yy) / sin_theta
+        r = np.where(sin_theta > 0, r, np.nan)
+        xi = r * np.sin(phi)
+        eta = -r * np.cos(phi)
+
+        # Invert the scale and rotation and shift back to pixel coordinates
+        x = inverse_matrix[..., 0, 0] * xi + inverse_matrix[..., 0, 1] * eta + crpix[..., 0]
+        y = inverse_matrix[..., 1, 0] * xi + inverse_matrix[..., 1, 1] * eta + crpix[..., 1]
+        return x, y
+
+    @staticmethod
+    def _group_by_index(inds):
+        """
+        Sort the pixels by their index into the lookup tables.
+
+        Returns
+        -------
+        order : `numpy.ndarray`
+            The flat positions of the pixels sorted by index.
+        unique : `numpy.ndarray`
+            The ``(n_groups, len(inds))`` array of the indices which occur, in order.
+        bounds : `numpy.ndarray`
+            The ``n_groups + 1`` boundaries of each group in ``order``.
+        """
+        flat_inds = [ind.ravel() for ind in inds]
+        # lexsort sorts by the last key first
+        order = np.lexsort(flat_inds[::-1])
+        sorted_inds = [ind[order] for ind in flat_inds]
+
+        # A new group starts wherever any of the indices change
+        starts = np.zeros(order.size, dtype=bool)
+        starts[:1] = True
+        for ind in sorted_inds:
+            starts[1:] |= ind[1:] != ind[:-1]
+        starts = np.flatnonzero(starts)
+
+        unique = np.stack(sorted_inds, axis=-1)[starts]
+        bounds = np.append(starts, order.size)
+        return order, unique, bounds
+
+    def _map_by_index(self, x, y, inds, cdelt, lon_pole, inverse=False):
+        """
+        Evaluate the transform for each lookup table index which occurs in ``inds``.
+        """
+        order, unique, bounds = self._group_by_index(inds)
+        x_sorted = np.ravel(x)[order]
+        y_sorted = np.ravel(y)[order]
+        x_out = np.empty(x_sorted.shape, dtype=float)
+        y_out = np.empty(y_sorted.shape, dtype=float)
+
+        for ind, start, stop in zip(unique, bounds[:-1], bounds[1:]):
+            segment = slice(start, stop)
+            if (ind > np.array(self.table_shape) - 1).any() or (ind < 0).any():
+                # Out of bounds of the lookup table, the constant model from
+                # transform_at_index has no inverse
+                x_out[segment], y_out[segment] = np.nan, np.nan
+                continue
+
+            sct = self._update_transform(self._thread_transforms.get(), tuple(ind), cdelt=cdelt, lon_pole=lon_pole)
+            if inverse:
+                sct = sct.inverse
+            x_out[segment], y_out[segment] = sct(x_sorted[segment], y_sorted[segment])
+
+        # Scatter the results back to the positions of the pixels
+        x_result = np.empty(x_out.shape, dtype=float)
+        y_result = np.empty(y_out.shape, dtype=float)
+        x_result[order] = x_out
+        y_result[order] = y_out
+        return x_result.reshape(np.shape(x)), y_result.reshape(np.shape(y))
+
     def _map_transform(self, *arrays, cdelt, lon_pole, inverse=False):
         # We need to broadcast the arrays together so they are all the same shape
         barrays = np.broadcast_arrays(*arrays, subok=True)
@@ -320,29 +728,14 @@ class BaseVaryingCelestialTransform(Model, ABC):
             # Because we have set input_units_strict to True we can assume that
             # all inputs have the correct units for the transform
             arrays = [arr.value for arr in barrays]
+        else:
+            arrays = barrays
 
-        x_out = np.empty_like(arrays[0])
-        y_out = np.empty_like(arrays[1])
-
-        # We now loop over every unique value of z and compute the transform.
-        # This means we make the minimum number of calls possible to the transform.
-        ranges = [np.unique(ind) for ind in inds]
-        for ind in product(*ranges):
+        if type(self.projection) is m.Pix2Sky_TAN:
             # Scalar parameters are reshaped to be length one arrays by modeling
-            sct = self.transform_at_index(ind, cdelt=cdelt[0], lon_pole=lon_pole[0])
-
-            # Call this transform for all values of x, y where z == zind
-            masks = [inds[i] == ind[i] for i in range(len(ind))]
-            if len(masks) > 1:
-                mask = np.logical_and(*masks)
-            else:
-                mask = masks[0]
-            if inverse:
-                xx, yy = sct.inverse(arrays[0][mask], arrays[1][mask])
-            else:
-                xx, yy = sct(arrays[0][mask], arrays[1][mask])
-
-            x_out[mask], y_out[mask] = xx, yy
+            x_out, y_out = self._map_tan(arrays[0], arrays[1], inds, cdelt[0], lon_pole[0], inverse=inverse)
+        else:
+            x_out, y_out = self._map_by_index(arrays[0], arrays[1], inds, cdelt[0], lon_pole[0], inverse=inverse)
 
         # Put the units back if we started with some
         if isinstance(barrays[0], u.Quantity):
@@ -394,14 +787,7 @@ class VaryingCelestialTransform(BaseVaryingCelestialTransform):
 
     @property
     def inverse(self):
-        return InverseVaryingCelestialTransform(
-            crpix_table=self.crpix_table,
-            cdelt=self.cdelt,
-            lon_pole=self.lon_pole,
-            pc_table=self.pc_table,
-            crval_table=self.crval_table,
-            projection=self.projection,
-        )
+        return self._cached_inverse(InverseVaryingCelestialTransform)
 
 
 class VaryingCelestialTransform2D(BaseVaryingCelestialTransform):
@@ -409,14 +795,7 @@ class VaryingCelestialTransform2D(BaseVaryingCelestialTransform):
 
     @property
     def inverse(self):
-        return InverseVaryingCelestialTransform2D(
-            crpix_table=self.crpix_table,
-            cdelt=self.cdelt,
-            lon_pole=self.lon_pole,
-            pc_table=self.pc_table,
-            crval_table=self.crval_table,
-            projection=self.projection,
-        )
+        return self._cached_inverse(InverseVaryingCelestialTransform2D)
 
 
 class VaryingCelestialTransform3D(BaseVaryingCelestialTransform):
@@ -424,14 +803,7 @@ class VaryingCelestialTransform3D(BaseVaryingCelestialTransform):
 
     @property
     def inverse(self):
-        return InverseVaryingCelestialTransform3D(
-            crpix_table=self.crpix_table,
-            cdelt=self.cdelt,
-            lon_pole=self.lon_pole,
-            pc_table=self.pc_table,
-            crval_table=self.crval_table,
-            projection=self.projection,
-        )
+        return self._cached_inverse(InverseVaryingCelestialTransform3D)
 
 
 class InverseVaryingCelestialTransform(BaseVaryingCelestialTransform):
@@ -537,6 +909,7 @@ class CoupledCompoundModel(CompoundModel):
         # ones in the right model
         self.inputs = left.inputs + right.inputs[shared_inputs:]
         self.shared_inputs = shared_inputs
+        self._inverse_cache = _ParameterCache(1)
 
     def _evaluate(self, *args, **kw):
         leftval = self.left(*(args[:self.left.n_inputs]), **kw)
@@ -546,6 +919,17 @@ class CoupledCompoundModel(CompoundModel):
 
     @property
     def inverse(self):
+        """
+        The inverse of the coupled model.
+
+        Building the inverse is slow, so the same model is returned until the
+        parameters, the submodels, or their inverses or lookup tables are
+        replaced. It is shared between calls, so it should be treated as
+        read-only, use ``model.inverse.copy()`` to modify it.
+        """
+        return self._inverse_cache.get(_inverse_key(self), self._build_inverse)
+
+    def _build_inverse(self):
         left_inverse = self.left.inverse
         right_inverse = self.right.inverse
 
@@ -727,6 +1111,14 @@ class Ravel(Model):
         self.inputs = tuple([f"x{idx}" for idx in range(self.n_inputs)])
         self.outputs = "y",
 
+    def _strides(self):
+        """
+        The step in the raveled index for one step along each axis.
+        """
+        sizes = self.array_shape if self.order == "F" else self.array_shape[::-1]
+        strides = np.cumprod([1, *sizes[:-1]], dtype=np.int64)
+        return strides if self.order == "F" else strides[::-1]
+
     def evaluate(self, *inputs_):
         """Evaluate the forward ravel for a given tuple of pixel values."""
         if hasattr(inputs_[0], "unit"):
@@ -735,21 +1127,37 @@ class Ravel(Model):
         else:
             has_units = False
             input_values = inputs_
-        input_values = [item.flatten() if isinstance(item, np.ndarray) else item for item in input_values]
-        # round the index values, but clip them if they exceed the array bounds
-        # the bounds are one less than the shape dimension value
-        array_bounds = np.array(self.array_shape) - 1
-        rounded_inputs = np.clip(np.rint(input_values).astype(int), None, array_bounds[:, np.newaxis])
-        result = np.ravel_multi_index(rounded_inputs, self.array_shape, order=self.order).astype(float)
-        index = 0 if self.order == "F" else -1
-        # Adjust the result to allow a fractional part for interpolation in Tabular1D
-        fraction = input_values[index] - rounded_inputs[index]
-        result += fraction
+        # Broadcasting returns views, so the inputs are never copied
+        input_values = np.broadcast_arrays(*(np.asanyarray(item, dtype=float) for item in input_values))
+        shape = input_values[0].shape
+        fast_axis = 0 if self.order == "F" else len(self.array_shape) - 1
+
+        # The raveled index is accumulated in int64 so that it is exact for any table size
+        flat_index = np.zeros(shape, dtype=np.int64)
+        rounded = np.empty(shape, dtype=np.int64)
+        work = np.empty(shape, dtype=float)
+        result = np.zeros(shape, dtype=float)
+        invalid = np.zeros(shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for axis, (value, size, stride) in enumerate(zip(input_values, self.array_shape, self._strides())):
+                # round the index values, but clip them if they exceed the array bounds
+                # the bounds are one less than the shape dimension value
+                np.rint(value, out=work)
+                np.minimum(work, size - 1, out=work)
+                if (work < 0).any():
+                    raise ValueError("invalid entry in coordinates array")
+                invalid |= np.isnan(work)
+                np.copyto(rounded, work, casting="unsafe")
+                if axis == fast_axis:
+                    # Adjust the result to allow a fractional part for interpolation in Tabular1D
+                    np.subtract(value, work, out=result)
+                np.multiply(rounded, stride, out=rounded)
+                flat_index += rounded
+        result += flat_index
+        result[invalid] = np.nan
         # Put the units back if they were there...
         if has_units:
-            result = result * u.pix
-        else:
-            result = np.array([result])
+            result = result << u.pix
         return result
 
     @property
@@ -807,24 +1215,39 @@ class Unravel(Model):
 
     def evaluate(self, input_):
         """Evaluate the reverse ravel (unravel) for a given pixel value."""
-        if hasattr(input_, "unit"):
-            has_units = True
-            input_value = [item.to_value(u.pix) for item in input_]
-            input_value_int = [int(item) for item in input_value]
+        has_units = hasattr(input_, "unit")
+        input_value = input_.to_value(u.pix) if has_units else np.asanyarray(input_)
+        shape = input_value.shape
+        array_shape = tuple(self.array_shape)
+
+        # Integer indices are used exactly, floats are truncated like int()
+        invalid = np.zeros(shape, dtype=bool)
+        flat_index = np.empty(shape, dtype=np.int64)
+        if input_value.dtype.kind in "iu":
+            flat_index[...] = input_value
+            fraction = None
         else:
-            has_units = False
-            input_value = input_
-            input_value_int = [int(item) for item in input_]
-
-        result = list(np.unravel_index(input_value_int, self.array_shape, order=self.order))
-        result = [item.astype(float) for item in result]
+            invalid = ~np.isfinite(input_value)
+            np.copyto(flat_index, np.trunc(np.where(invalid, 0, input_value)), casting="unsafe")
+            fraction = np.remainder(input_value, 1)
+        if (flat_index < 0).any() or (flat_index >= np.prod(array_shape, dtype=np.int64)).any():
+            raise ValueError("invalid entry in index array")
+
+        # Peel off the index along each axis, starting with the fastest varying one
+        axes = range(len(array_shape)) if self.order == "F" else range(len(array_shape) - 1, -1, -1)
+        result = [None] * len(array_shape)
+        remainder = np.empty(shape, dtype=np.int64)
+        for axis in axes:
+            np.divmod(flat_index, array_shape[axis], out=(flat_index, remainder))
+            result[axis] = remainder.astype(float)
+            result[axis][invalid] = np.nan
         # Adjust the result to allow a fractional part for interpolation in Tabular1D
         index = 0 if self.order == "F" else -1
-        fraction = np.remainder(input_value, 1)
-        result[index] += fraction
+        if fraction is not None:
+            result[index] += fraction
         if has_units:
-            result = result * u.pix
-        return result
+            result = [item << u.pix for item in result]
+        return tuple(result)
 
     @property
     def inverse(self):
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+import astropy.units as u
+from astropy.modeling import models as m
+from astropy.wcs.wcsapi.wrappers import SlicedLowLevelWCS
+
+from dkist.wcs import CompiledTransform, CompiledWCS, compile_transform, compile_wcs
+from dkist.wcs.models import Ravel, Unravel, VaryingCelestialTransform
+
+
+def test_compile_transform():
+    model = (m.Shift(-10 * u.pix) & m.Shift(5 * u.pix)) | m.Mapping((1, 0, 1)) | (
+        m.Multiply(2 * u.arcsec / u.pix) & m.Linear1D(slope=3 * u.nm / u.pix, intercept=1 * u.nm) & m.Identity(1)
+    )
+    compiled = compile_transform(model, input_units=(u.pix, u.pix), output_units=(u.deg, u.nm, u.pix))
+    assert compiled.n_inputs == 2
+    assert compiled.n_outputs == 3
+    # The mappings don't add any steps
+    assert len(compiled._steps) == 4
+
+    x, y = np.arange(12.).reshape(3, 4), np.arange(4.)
+    result = compiled(x, y)
+    expected = model(x * u.pix, y * u.pix)
+    # All the outputs have the broadcast shape of the inputs
+    assert all(r.shape == (3, 4) for r in result)
+    np.testing.assert_allclose(result[0], np.broadcast_to(expected[0].to_value(u.deg), (3, 4)))
+    np.testing.assert_allclose(result[1], expected[1].to_value(u.nm))
+    np.testing.assert_allclose(result[2], np.broadcast_to(expected[2].to_value(u.pix), (3, 4)))
+    compiled.check(x, y)
+
+    # Scalar inputs give scalar outputs
+    assert all(np.ndim(r) == 0 for r in compiled(1, 2))
+
+
+def test_compile_transform_without_units():
+    model = m.Shift(1) | m.Multiply(2)
+    compiled = compile_transform(model)
+    assert compiled(3) == 8
+    assert compiled.output_units == (None,)
+
+
+def test_compile_transform_unsupported_models():
+    # Models without a compiled kernel are called directly
+    model = (m.Shift(1) & m.Gaussian1D(amplitude=2, mean=0, stddev=3)) | (m.Shift(1) + m.Scale(2)) & m.Identity(1)
+    compiled = compile_transform(model)
+    x = np.linspace(-5, 5, 11)
+    np.testing.assert_allclose(compiled(x, x), model(x, x))
+
+
+def test_compile_transform_wrong_units():
+    with pytest.raises(ValueError, match="Expected 2 input units, got 1"):
+        compile_transform(m.Shift(1) & m.Shift(1), input_units=(u.pix,))
+
+
+def test_compile_transform_check_fails(mocker):
+    compiled = compile_transform(m.Shift(1 * u.pix), input_units=(u.pix,))
+    mocker.patch.object(compiled, "evaluate_model", return_value=np.zeros(3))
+    with pytest.raises(ValueError, match="does not match"):
+        compiled.check(np.arange(3))
+
+
+@pytest.mark.parametrize("method", ["linear", "nearest"])
+def test_compile_tabular(method):
+    model = m.Tabular1D(points=np.array([0, 1, 2, 4, 8]) * u.pix, lookup_table=np.array([1, 5, 2, 3, 0]) * u.s,
+                        method=method, bounds_error=False)
+    compiled = compile_transform(model, input_units=(u.pix,))
+    x = np.array([-1, 0, 0.5, 1.5, 2.999, 3, 3.001, 6, 8, 9])
+    np.testing.assert_array_equal(compiled(x), model(x * u.pix).to_value(u.s))
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_compile_ravel_unravel(order):
+    ravel = Ravel((3, 4, 5), order=order)
+    x = [np.array([0, 1.2, 2.9]), np.array([3, 0.4, 1]), np.array([4.3, 2, 0])]
+    compiled = compile_transform(ravel)
+    np.testing.assert_allclose(compiled(*x), ravel(*x))
+
+    unravel = ravel.inverse
+    assert isinstance(unravel, Unravel)
+    y = np.array([0, 13.5, 59])
+    np.testing.assert_allclose(compile_transform(unravel)(y), unravel(y))
+
+
+def test_compile_lookup_inputs():
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2),
+                                    crval_table=np.zeros((10, 2)), crpix_table=[0, 0])
+    compiled = compile_transform(vct & m.Tabular1D(points=np.arange(6), lookup_table=np.arange(6.)))
+    assert compiled.lookup_inputs == {2, 3}
+    assert compiled.lookup_sizes == {2: 10, 3: 6}
+
+    # Inputs which only index a table after other steps have no known size
+    ravel = Ravel((3, 4)) | m.Tabular1D(points=np.arange(12), lookup_table=np.arange(12.))
+    compiled = compile_transform(m.Identity(1) & ravel)
+    assert compiled.lookup_inputs == {1, 2}
+    assert compiled.lookup_sizes == {}
+
+
+@pytest.mark.parametrize("dataset", ["large_visp_dataset", "visp_dataset_no_headers", "croppable_visp_dataset"])
+def test_compile_wcs(dataset, request):
+    ds = request.getfixturevalue(dataset)
+    wcs = ds.wcs.low_level_wcs
+    compiled = compile_wcs(ds.wcs)
+    assert isinstance(compiled, CompiledWCS)
+    assert compiled.world_axis_physical_types == wcs.world_axis_physical_types
+
+    rng = np.random.default_rng(42)
+    pixel = [rng.uniform(0, n - 1, 20) for n in ds.data.shape[::-1]]
+    world = compiled.pixel_to_world_values(*pixel)
+    expected = wcs.pixel_to_world_values(*pixel)
+    for actual, expect in zip(world, expected):
+        np.testing.assert_allclose(actual, expect, rtol=1e-12)
+
+    for actual, expect in zip(compiled.world_to_pixel_values(*expected), wcs.world_to_pixel_values(*expected)):
+        np.testing.assert_allclose(actual, expect, rtol=1e-12, atol=1e-9)
+
+
+def test_compile_sliced_wcs(large_visp_dataset):
+    ds = large_visp_dataset[1, :, 10:20]
+    compiled = compile_wcs(ds.wcs)
+    assert isinstance(compiled, SlicedLowLevelWCS)
+    assert isinstance(compiled._wcs, CompiledWCS)
+
+    pixel = [np.arange(5.) for _ in range(ds.wcs.pixel_n_dim)]
+    for actual, expect in zip(compiled.pixel_to_world_values(*pixel), ds.wcs.low_level_wcs.pixel_to_world_values(*pixel)):
+        np.testing.assert_allclose(actual, expect, rtol=1e-12)
+
+
+def test_compile_wcs_check_tables(croppable_cryo_dataset, mocker):
+    check = mocker.spy(CompiledTransform, "check")
+    compiled = compile_wcs(croppable_cryo_dataset.wcs)
+    pixel = check.call_args_list[0].args[1:]
+    # Every index of the lookup tables is checked
+    lookup_axes = sorted(compiled._forward.lookup_inputs)
+    assert lookup_axes == [2, 3, 4]
+    indices = {tuple(index) for index in np.transpose([pixel[axis] for axis in lookup_axes])}
+    assert indices == set(np.ndindex(croppable_cryo_dataset.data.shape[::-1][2:]))
+
+
+def test_compile_wcs_bounding_box(identity_gwcs):
+    identity_gwcs.bounding_box = ((0, 10), (0, 10))
+    with pytest.raises(ValueError, match="bounding box"):
+        compile_wcs(identity_gwcs)
@@ -66,6 +66,42 @@ def test_coupled(vct_crval, linear_time):
     assert u.allclose(inverse(*world), pixel, atol=1e-9*u.pix)
 
 
+def test_coupled_inverse_cached(vct_crval, linear_time):
+    tfrm = CoupledCompoundModel("&", vct_crval, linear_time, shared_inputs=1)
+    inverse = tfrm.inverse
+    assert tfrm.inverse is inverse
+
+    # Changing any parameter builds a new inverse
+    linear_time.slope = 2 * u.s / u.pix
+    new_inverse = tfrm.inverse
+    assert new_inverse is not inverse
+    pixel = (0, 0, 2) * u.pix
+    assert u.allclose(new_inverse(*tfrm(*pixel)), pixel, atol=1e-6 * u.pix)
+
+
+def test_coupled_inverse_cached_replaced(vct_crval):
+    tabular_time = m.Tabular1D(points=np.arange(3) * u.pix, lookup_table=np.arange(3) * u.s)
+    tfrm = CoupledCompoundModel("&", vct_crval, tabular_time, shared_inputs=1)
+    pixel = (0, 0, 2) * u.pix
+    inverse = tfrm.inverse
+
+    # Replacing a lookup table builds a new inverse
+    tabular_time.lookup_table = np.arange(3) * 2 * u.s
+    assert tfrm.inverse is not inverse
+    assert u.allclose(tfrm.inverse(*tfrm(*pixel)), pixel, atol=1e-6 * u.pix)
+
+    inverse = tfrm.inverse
+    vct_crval.crval_table = ((0, 1), (2, 3), (6, 7)) * u.arcsec
+    assert tfrm.inverse is not inverse
+    assert u.allclose(tfrm.inverse(*tfrm(*pixel)), pixel, atol=1e-6 * u.pix)
+
+    # So does setting the inverse of a submodel
+    inverse = tfrm.inverse
+    tabular_time.inverse = m.Const1D(1 * u.pix)
+    assert tfrm.inverse is not inverse
+    assert u.allclose(tfrm.inverse(*tfrm(*pixel))[2], 1 * u.pix)
+
+
 def test_coupled_2d(vct_2d_pc, linear_time):
     double_time = linear_time & linear_time
     tfrm = CoupledCompoundModel("&", vct_2d_pc, double_time, shared_inputs=2)
@@ -1,4 +1,5 @@
 import copy
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pytest
@@ -206,7 +207,8 @@ def test_varying_transform_crval():
 
     pixel = (0*u.pix, 0*u.pix, 2*u.pix)
     world = vct(*pixel)
-    assert u.allclose(world, (3.59999722e+02, 2.78325906e-13)*u.deg)
+    # The latitude is zero to within rounding error
+    assert u.allclose(world, (3.59999722e+02, 0)*u.deg, atol=1e-10*u.deg)
 
     assert u.allclose(vct.inverse(*world, 2*u.pix), pixel[:2], atol=0.01*u.pix)
 
@@ -527,6 +529,219 @@ def _evaluate_unravel(array_shape, index, order="C"):
     return tuple(indices)
 
 
+def test_vct_parameter_cache():
+    pc_table = np.array([rotation_matrix(a)[:2, :2] for a in np.linspace(0, 90, 10)])
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=pc_table,
+                                    crval_table=[0, 0], crpix_table=[5, 5])
+    pixel = (np.arange(4.), np.arange(4.), np.arange(4.))
+
+    world = vct(*pixel)
+    assert len(vct._parameter_cache) == 1
+    # The inverse shares the cache
+    inverse = vct.inverse
+    assert inverse._parameter_cache is vct._parameter_cache
+    assert np.allclose(inverse(*world, pixel[2]), pixel[:2])
+    assert len(vct._parameter_cache) == 1
+
+    # Changing cdelt doesn't use the old parameters
+    vct.cdelt = [2, 2]
+    new_world = vct(*pixel)
+    assert len(vct._parameter_cache) == 2
+    expected = [vct.transform_at_index(int(z))(x, y) for x, y, z in zip(*pixel)]
+    assert np.allclose(np.transpose(new_world), expected)
+
+    # Copies get their own cache
+    copied = copy.deepcopy(vct)
+    assert copied._parameter_cache is not vct._parameter_cache
+    assert len(copied._parameter_cache) == 0
+    assert np.allclose(copied(*pixel), new_world)
+
+
+def test_vct_inverse_cached():
+    pc_table = np.array([rotation_matrix(a)[:2, :2] for a in np.linspace(0, 90, 10)])
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=pc_table,
+                                    crval_table=[0, 0], crpix_table=[5, 5])
+    inverse = vct.inverse
+    assert vct.inverse is inverse
+    # The inverse shares the tables
+    assert np.shares_memory(inverse.pc_table, vct.pc_table)
+    assert np.shares_memory(inverse.crval_table, vct.crval_table)
+
+    # Changing a parameter builds a new inverse
+    vct.cdelt = [2, 2]
+    new_inverse = vct.inverse
+    assert new_inverse is not inverse
+    assert np.allclose(new_inverse.cdelt, [2, 2])
+    pixel = (np.arange(4.), np.arange(4.), np.arange(4.))
+    assert np.allclose(new_inverse(*vct(*pixel), pixel[2]), pixel[:2])
+
+    # Copies don't share the inverse
+    assert copy.deepcopy(vct).inverse is not new_inverse
+
+
+def test_vct_replace_tables():
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2),
+                                    crval_table=[[0, 0], [1, 1]], crpix_table=[0, 0])
+    pixel = (np.arange(1., 5.), np.arange(1., 5.), np.array([0., 1., 0., 1.]))
+    world = vct(*pixel)
+    inverse = vct.inverse
+
+    # The tables can't be modified in place, only replaced
+    with pytest.raises(ValueError, match="read-only"):
+        vct.crval_table[1] = [2, 2]
+
+    # Replacing a table doesn't use the parameters or the inverse from the old tables
+    vct.crval_table = [[0, 0], [2, 2]]
+    new_world = vct(*pixel)
+    expected = [vct.transform_at_index(int(z))(x, y) for x, y, z in zip(*pixel)]
+    assert np.allclose(np.transpose(new_world), expected)
+    assert not np.allclose(new_world, world)
+    assert vct.inverse is not inverse
+    assert np.allclose(vct.inverse(*new_world, pixel[2]), pixel[:2])
+    # The old inverse still uses the old tables
+    assert np.allclose(inverse(*world, pixel[2]), pixel[:2])
+
+    # The new table is validated against the others
+    with pytest.raises(ValueError, match="tables should match"):
+        vct.pc_table = np.broadcast_to(np.identity(2), (3, 2, 2))
+
+    # Copies of the tables are also read-only
+    assert not copy.deepcopy(vct).crval_table.flags.writeable
+
+
+def test_vct_parameter_cache_bounded():
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2)[None],
+                                    crval_table=[0, 0], crpix_table=[0, 0])
+    for i in range(1, 10):
+        vct.cdelt = [i, i]
+        vct(0, 0, 0)
+    assert len(vct._parameter_cache) == vct.parameter_cache_size
+
+
+def test_vct_parameter_cache_disabled(mocker):
+    mocker.patch.object(VaryingCelestialTransform, "parameter_cache_size", 0)
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2)[None],
+                                    crval_table=[0, 0], crpix_table=[0, 0])
+    assert vct._parameter_cache is None
+    assert np.allclose(vct(0, 0, 0), (0, 0))
+
+
+def test_vct_parameter_cache_threads():
+    pc_table = np.array([rotation_matrix(a)[:2, :2] for a in np.linspace(0, 90, 10)])
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=pc_table,
+                                    crval_table=[0, 0], crpix_table=[5, 5])
+    pixel = np.mgrid[:10, :10, :10].astype(float)
+    expected = vct(*pixel)
+    vct._parameter_cache.clear()
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: vct(*pixel), range(16)))
+    for result in results:
+        assert np.allclose(result, expected)
+    assert len(vct._parameter_cache) == 1
+
+
+def test_vct_transform_at_index_new_model():
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2),
+                                    crval_table=[[0, 0], [1, 1]], crpix_table=[0, 0])
+    trans0 = vct.transform_at_index(0)
+    trans1 = vct.transform_at_index(1)
+    assert trans0 is not trans1
+    assert u.allclose(trans0.right.lon, 0)
+    assert u.allclose(trans1.right.lon, 1)
+
+
+def test_vct_threads_per_index():
+    # ARC is evaluated one index at a time, with a transform for each thread
+    rng = default_rng(0)
+    crval_table = rng.uniform(0, 10, (20, 2))
+    vct = VaryingCelestialTransform(cdelt=[1, 1], lon_pole=180, pc_table=np.identity(2),
+                                    crval_table=crval_table, crpix_table=[0, 0], projection=m.Pix2Sky_ARC())
+    pixels = [np.mgrid[:5, :5, i:i + 10].astype(float) for i in range(10)]
+    expected = [vct(*pixel) for pixel in pixels]
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda pixel: vct(*pixel), pixels * 4))
+    for result, expect in zip(results, expected * 4):
+        assert np.allclose(result, expect)
+
+    copied = copy.deepcopy(vct)
+    assert copied._thread_transforms is not vct._thread_transforms
+    assert np.allclose(copied(*pixels[0]), expected[0])
+
+
+def test_vct_tan_blocks(mocker):
+    rng = default_rng(0)
+    pc_table = np.array([rotation_matrix(a)[:2, :2] for a in rng.uniform(0, 360, 6)])
+    vct = VaryingCelestialTransform(cdelt=[0.01, 0.02], lon_pole=180, pc_table=pc_table,
+                                    crval_table=rng.uniform(0, 10, (6, 2)), crpix_table=[5, 5])
+    # Broadcast inputs, with indices outside the table
+    pixel = (*np.mgrid[:20, :30].astype(float), np.arange(-1, 7)[:, None, None])
+    world = vct(*pixel)
+    assert world[0].shape == (8, 20, 30)
+
+    # Evaluating the points in blocks which don't divide the grid evenly gives the same result
+    mocker.patch.object(vct, "tan_block_size", 37)
+    blocked = vct(*pixel)
+    np.testing.assert_allclose(blocked, world)
+    assert np.isnan(blocked[0][[0, -1]]).all()
+    assert np.allclose(vct.inverse(*blocked, pixel[2])[0][1:-1], pixel[0])
+
+
+def test_vct_group_by_index():
+    inds = [np.array([[2, 0, 2], [1, 2, 0]]), np.array([[5, 3, 5], [3, 4, 3]])]
+    order, unique, bounds = VaryingCelestialTransform2D._group_by_index(inds)
+
+    # Only the index pairs which occur are visited, in sorted order
+    assert unique.tolist() == [[0, 3], [1, 3], [2, 4], [2, 5]]
+    assert bounds.tolist() == [0, 2, 3, 4, 6]
+    flat_inds = np.stack([ind.ravel() for ind in inds], axis=-1)
+    for ind, start, stop in zip(unique, bounds[:-1], bounds[1:]):
+        assert (flat_inds[order[start:stop]] == ind).all()
+
+
+@pytest.mark.parametrize("projection", [pytest.param(m.Pix2Sky_TAN(), id="TAN"), pytest.param(m.Pix2Sky_ARC(), id="ARC")])
+@pytest.mark.parametrize("table_shape", [(6,), (3, 4)])
+@pytest.mark.parametrize("has_units", [pytest.param(True, id="With Units"), pytest.param(False, id="Without Units")])
+def test_vct_matches_transform_at_index(has_units, table_shape, projection):
+    rng = default_rng(42)
+    angles = rng.uniform(0, 360, table_shape)
+    pc_table = np.array([rotation_matrix(a)[:2, :2] for a in angles.flat]).reshape((*table_shape, 2, 2))
+    crval_table = np.stack([rng.uniform(0, 360, table_shape), rng.uniform(-80, 80, table_shape)], axis=-1)
+    crpix_table = rng.uniform(0, 20, (*table_shape, 2))
+    cdelt = [0.01, 0.02]
+    lon_pole = 170
+    npts = 200
+    pixel = [rng.uniform(0, 20, npts), rng.uniform(0, 20, npts)]
+    # Include indices outside the lookup table
+    indices = [rng.integers(-1, size + 1, npts) for size in table_shape]
+    if has_units:
+        pc_table = pc_table * u.pix
+        crval_table = crval_table * u.deg
+        crpix_table = crpix_table * u.pix
+        cdelt = cdelt * u.deg / u.pix
+        lon_pole = lon_pole * u.deg
+        pixel = [p * u.pix for p in pixel]
+        indices = [i * u.pix for i in indices]
+
+    vct_class = VaryingCelestialTransform if len(table_shape) == 1 else VaryingCelestialTransform2D
+    vct = vct_class(cdelt=cdelt, lon_pole=lon_pole, pc_table=pc_table, crval_table=crval_table,
+                    crpix_table=crpix_table, projection=projection)
+    world = vct(*pixel, *indices)
+    ipixel = vct.inverse(*world, *indices)
+
+    for i in range(npts):
+        index = tuple(int(getattr(ind[i], "value", ind[i])) for ind in indices)
+        in_bounds = all(0 <= ind < size for ind, size in zip(index, table_shape))
+        if not in_bounds:
+            assert np.isnan(world[0][i])
+            assert np.isnan(world[1][i])
+            continue
+        sct = vct.transform_at_index(index)
+        expected = sct(*[getattr(p[i], "value", p[i]) for p in pixel])
+        actual = [getattr(w[i], "value", w[i]) for w in world]
+        assert np.allclose(actual, expected, atol=1e-10)
+        assert u.allclose([p[i] for p in ipixel], [p[i] for p in pixel])
+
+
 @pytest.mark.parametrize("ndim", [pytest.param(2, id="2D"), pytest.param(3, id="3D")])
 @pytest.mark.parametrize("has_units", [pytest.param(True, id="With Units"), pytest.param(False, id="Without Units")])
 @pytest.mark.parametrize("input_type", [pytest.param("array", id="Array Inputs"), pytest.param("scalar", id="Scalar Inputs")])
@@ -632,6 +847,52 @@ def test_ravel_ordering(ndim, order):
         assert int(ravel_value) == values[tuple(inputs)]
 
 
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_ravel_keeps_shape(order):
+    ravel = Ravel((4, 5, 6), order=order)
+    inputs = np.mgrid[:4, :5, :6].astype(float)
+    raveled = ravel(*inputs)
+    assert raveled.shape == (4, 5, 6)
+    assert np.array_equal(raveled, np.arange(120).reshape((4, 5, 6), order=order))
+
+    unraveled = ravel.inverse(raveled)
+    assert len(unraveled) == 3
+    for actual, expected in zip(unraveled, inputs):
+        assert actual.shape == (4, 5, 6)
+        assert np.array_equal(actual, expected)
+
+
+def test_ravel_nan():
+    ravel = Ravel((4, 5))
+    assert np.isnan(ravel([1, np.nan], [2, 3])).tolist() == [False, True]
+    unraveled = ravel.inverse(np.array([np.nan, 7.5]))
+    assert np.isnan(unraveled[0][0])
+    assert np.isnan(unraveled[1][0])
+    assert np.allclose([unraveled[0][1], unraveled[1][1]], [1, 2.5])
+
+
+def test_ravel_out_of_bounds():
+    ravel = Ravel((4, 5))
+    with pytest.raises(ValueError, match="invalid entry"):
+        ravel(-1, 2)
+    with pytest.raises(ValueError, match="invalid entry"):
+        ravel.inverse(20)
+
+
+def test_ravel_large_index():
+    # The raveled index of the last element is larger than a float can represent exactly
+    array_shape = (2**20, 2**20, 2**20)
+    unravel = Unravel(array_shape)
+    index = np.array([2**60 - 1, 2**53 + 1], dtype=np.int64)
+    result = unravel.evaluate(index)
+    assert [r[0] for r in result] == [2**20 - 1] * 3
+    assert [r[1] for r in result] == [2**13, 0, 1]
+
+    # Larger than a 32 bit integer
+    ravel = Ravel((2**12, 2**12, 2**12))
+    assert ravel.evaluate(2**12 - 1, 2**12 - 1, 2**12 - 1.25) == 2**36 - 1.25
+
+
 @pytest.mark.parametrize("ndim", [pytest.param(2, id="2D"), pytest.param(3, id="3D")])
 @pytest.mark.parametrize("order", ["C", "F"])
 def test_ravel_repr(ndim, order):
@@ -713,7 +974,13 @@ def test_varying_transform_crval_crpix():
     assert trans1[0].offset == -4
     assert trans1[1].offset == -4
 
+    # transform_at_index returns a new model for every index, so the first
+    # model still has the parameters of index 0.
+    assert trans0[0].offset == -5
+
     world_0 = trans0(0,0)
     world_1 = trans1(0,0)
 
-    assert world_0 == world_1
+    assert u.allclose(world_0, (360 - 3/3600, -3/3600), atol=1e-9)
+    assert u.allclose(world_1, (360 - 1/3600, -1/3600), atol=1e-9)
+    assert u.allclose(vct(0*u.pix, 0*u.pix, [0, 1]*u.pix), np.transpose([world_0, world_1])*u.deg)
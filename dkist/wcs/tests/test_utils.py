@@ -0,0 +1,40 @@
+import dask
+import dask.array as da
+import numpy as np
+import pytest
+from dask.array.core import normalize_chunks
+
+from dkist.wcs import dask_pixel_to_world_values
+
+
+def test_dask_pixel_to_world_values(large_visp_dataset):
+    wcs = large_visp_dataset.wcs
+    shape = large_visp_dataset.data.shape[::-1]
+    pixel = np.meshgrid(*[np.arange(0, n, 3) for n in shape], indexing="ij")
+
+    world = dask_pixel_to_world_values(wcs, *pixel, chunks=(7, 5, 2, 2))
+    assert len(world) == wcs.world_n_dim
+    assert all(isinstance(w, da.Array) for w in world)
+    assert world[0].chunks == normalize_chunks((7, 5, 2, 2), pixel[0].shape)
+
+    expected = wcs.pixel_to_world_values(*pixel)
+    for actual, expect in zip(dask.compute(*world, scheduler="threads"), expected):
+        np.testing.assert_allclose(actual, expect)
+
+
+def test_dask_pixel_to_world_values_broadcast(large_visp_dataset):
+    wcs = large_visp_dataset.wcs
+    pixel = [da.arange(10, chunks=4)[:, None, None, None], np.arange(5)[:, None, None], 1, np.arange(3)]
+
+    world = dask_pixel_to_world_values(wcs, *pixel)
+    assert world[0].shape == (10, 5, 1, 3)
+    assert world[0].chunks[0] == (4, 4, 2)
+
+    expected = wcs.pixel_to_world_values(*np.broadcast_arrays(*(np.asarray(p) for p in pixel)))
+    for actual, expect in zip(dask.compute(*world), expected):
+        np.testing.assert_allclose(actual, expect)
+
+
+def test_dask_pixel_to_world_values_wrong_inputs(large_visp_dataset):
+    with pytest.raises(ValueError, match="Expected 4 pixel arrays, got 2"):
+        dask_pixel_to_world_values(large_visp_dataset.wcs, 1, 2)
@@ -0,0 +1,62 @@
+"""
+Helpers for evaluating WCSes.
+"""
+import dask.array as da
+import numpy as np
+
+__all__ = ["dask_pixel_to_world_values"]
+
+
+def _pixel_to_world_block(*pixel_blocks, wcs, n_world):
+    world = wcs.pixel_to_world_values(*pixel_blocks)
+    if n_world == 1:
+        world = (world,)
+    return np.stack(np.broadcast_arrays(*world), axis=0).astype(float, copy=False)
+
+
+def dask_pixel_to_world_values(wcs, *pixel_arrays, chunks=None):
+    """
+    Compute world coordinates from pixel coordinates in parallel with dask.
+
+    The pixel arrays are broadcast together and split into chunks. Each
+    chunk is converted with ``wcs.pixel_to_world_values`` in a separate dask
+    task, so computing the result uses all the workers of the dask scheduler.
+
+    Parameters
+    ----------
+    wcs : `astropy.wcs.wcsapi.BaseLowLevelWCS`
+        The WCS to evaluate. A high level WCS with a ``low_level_wcs`` is also
+        accepted.
+    pixel_arrays : array-like
+        One array of pixel coordinates for each pixel dimension of ``wcs``.
+        These can be numpy or dask arrays.
+    chunks : optional
+        The chunks to split the broadcast pixel arrays into, in any form
+        accepted by `dask.array.Array.rechunk`. If not given, dask arrays keep
+        their chunks and other arrays are split into chunks automatically.
+
+    Returns
+    -------
+    `tuple` of `dask.array.Array`
+        One array of world values for each world dimension of ``wcs``.
+    """
+    wcs = getattr(wcs, "low_level_wcs", wcs)
+    if len(pixel_arrays) != wcs.pixel_n_dim:
+        raise ValueError(f"Expected {wcs.pixel_n_dim} pixel arrays, got {len(pixel_arrays)}.")
+
+    pixel_arrays = da.broadcast_arrays(*(da.asarray(array) for array in pixel_arrays))
+    if chunks is not None:
+        pixel_arrays = [array.rechunk(chunks) for array in pixel_arrays]
+
+    n_world = wcs.world_n_dim
+    world = da.map_blocks(
+        _pixel_to_world_block,
+        *pixel_arrays,
+        wcs=wcs,
+        n_world=n_world,
+        new_axis=0,
+        chunks=((n_world,), *pixel_arrays[0].chunks),
+        dtype=float,
+        token="pixel_to_world_values",
+    )
+    return tuple(world[i] for i in range(n_world))